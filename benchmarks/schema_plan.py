@@ -0,0 +1,51 @@
+"""
+Compares documents/sec for each document provider when generated through a Mimesis Schema and Field (as
+DocumentProvider.generate used to) against generating through the provider's compiled SchemaPlan
+
+python -m benchmarks.schema_plan --quantity 5000
+"""
+import time
+
+import click
+from mimesis.schema import Schema
+
+from document_providers import document_provider_mapping
+
+
+def mimesis_schema_generate(document_provider) -> dict:
+    """
+    Generates a document the way DocumentProvider.generate did before schemas were compiled into plans
+    """
+    document_schema = Schema(lambda: document_provider.create_schema(document_provider.field))
+    return document_schema.create(iterations=1)[0]
+
+
+def documents_per_second(generate, quantity: int) -> float:
+    start = time.perf_counter()
+    for _ in range(quantity):
+        generate()
+    return quantity / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("-q", "--quantity", type=click.INT, default=5000, help="Number of documents to time per provider")
+def benchmark(quantity):
+    """Times document generation before and after compiling schemas into plans"""
+    for provider_name, provider_type in document_provider_mapping.items():
+        document_provider = provider_type()
+
+        # Warm up both paths so one-off resolution and locale loading aren't timed
+        mimesis_schema_generate(document_provider)
+        document_provider.generate()
+
+        before = documents_per_second(lambda: mimesis_schema_generate(document_provider), quantity)
+        after = documents_per_second(document_provider.generate, quantity)
+
+        print(
+            f"{provider_name}: {before:,.0f} docs/sec with Schema/Field, {after:,.0f} docs/sec with SchemaPlan "
+            f"({after / before:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
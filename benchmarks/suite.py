@@ -0,0 +1,243 @@
+"""
+Benchmark suite measuring documents/sec for each document provider, journeys/sec for each journey provider and
+write throughput for each output format and compression, with results collected into a JSON serializable dict
+
+Run through the CLI with: python generate.py bench
+"""
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from document_providers import document_provider_mapping
+from document_providers.columnar import numpy_available
+from generate_serializer import default_serializer, dumps
+from journey_providers import journey_provider_mapping
+from output_sinks import JsonlSink, output_sink_mapping, select_output_sink
+from output_sinks.arrow import pyarrow_available
+from output_sinks.compression import compression_mapping, zstandard_available
+
+
+# How long the CLI should take to start up (python generate.py --help, in a fresh interpreter), as every
+# short-lived invocation pays it
+STARTUP_TARGET_SECONDS = 0.2
+
+
+def measure(run, quantity: int) -> dict:
+    """
+    Times run(), which should process quantity items, returning the timing and rate
+    """
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    return {
+        "quantity": quantity,
+        "seconds": round(seconds, 6),
+        "per_second": round(quantity / seconds, 2) if seconds else None,
+    }
+
+
+def benchmark_document_providers(quantity: int) -> dict:
+    """
+    Measures documents/sec for each document provider, with each backend available
+    """
+    backends = {"mimesis": False}
+    if numpy_available():
+        backends["columnar"] = True
+
+    results = {}
+    for provider_name, provider_type in document_provider_mapping.items():
+        results[provider_name] = {}
+        for backend, columnar in backends.items():
+            document_provider = provider_type(columnar=columnar)
+
+            # Warm up, so one-off schema plan resolution isn't timed
+            document_provider.generate_many(10)
+
+            results[provider_name][backend] = measure(
+                lambda: document_provider.generate_many(quantity), quantity
+            )
+
+    return results
+
+
+def benchmark_journey_providers(quantity: int, output_path: str) -> dict:
+    """
+    Measures journeys/sec (created and published) for each journey provider, staged on disk and in memory
+    """
+    results = {}
+    for provider_name, journey_type in journey_provider_mapping.items():
+        results[provider_name] = {}
+        for staging, in_memory in {"disk": False, "memory": True}.items():
+            publish_path = tempfile.mkdtemp(dir=output_path)
+
+            def run():
+                for _ in range(quantity):
+                    journey_provider = journey_type(publish_path, in_memory=in_memory)
+                    journey_provider.create_journey()
+                    journey_provider.publish_journey(publish_path)
+
+            results[provider_name][staging] = measure(run, quantity)
+            shutil.rmtree(publish_path)
+
+    return results
+
+
+class DiscardingServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with a listen backlog deep enough for every upload the client has in flight, so connections
+    are never refused (and retried) and only the client is timed
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class DiscardingHandler(BaseHTTPRequestHandler):
+    """
+    Accepts and discards PUT requests, standing in for blob storage when benchmarking uploads
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def benchmark_output_formats(quantity: int, output_path: str) -> dict:
+    """
+    Measures write throughput for each output format, writing pre-generated documents so only the sink is timed
+
+    Formats that upload documents are measured uploading to a local HTTP server, so only the client is timed, and
+    columnar formats are only measured when pyarrow is installed
+    """
+    document_provider = next(iter(document_provider_mapping.values()))()
+    documents = document_provider.generate_many(quantity)
+    size_in_bytes = sum(len(dumps(document)) + 1 for document in documents)
+
+    results = {}
+    for format_name in output_sink_mapping:
+        # Streamed output goes as fast as whatever reads it, so isn't measured
+        if output_sink_mapping[format_name].streaming:
+            continue
+        if output_sink_mapping[format_name].columnar and not pyarrow_available():
+            continue
+
+        sink_path = tempfile.mkdtemp(dir=output_path)
+        sink_options = {}
+        if output_sink_mapping[format_name].columnar:
+            sink_options["schema"] = document_provider.arrow_schema()
+
+        server = None
+        if output_sink_mapping[format_name].remote:
+            server = DiscardingServer(("127.0.0.1", 0), DiscardingHandler)
+            threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+            sink_options["upload_url"] = f"http://127.0.0.1:{server.server_port}/benchmark"
+
+        def run():
+            with select_output_sink(format_name, sink_path, "benchmark", **sink_options) as output_sink:
+                for i, document in enumerate(documents):
+                    output_sink.write(i, document)
+
+        try:
+            result = measure(run, quantity)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        result["megabytes_per_second"] = round(size_in_bytes / result["seconds"] / 1e6, 2)
+        results[format_name] = result
+        shutil.rmtree(sink_path)
+
+    return results
+
+
+def benchmark_compression(quantity: int, output_path: str) -> dict:
+    """
+    Measures write throughput and compression ratio of JSON lines output with each available compression
+    """
+    documents = next(iter(document_provider_mapping.values()))().generate_many(quantity)
+    size_in_bytes = sum(len(dumps(document)) + 1 for document in documents)
+
+    results = {}
+    for compression_name in compression_mapping:
+        if compression_name == "zstd" and not zstandard_available():
+            continue
+
+        sink_path = tempfile.mkdtemp(dir=output_path)
+
+        def run():
+            with JsonlSink(sink_path, "benchmark", compression=compression_name) as output_sink:
+                for i, document in enumerate(documents):
+                    output_sink.write(i, document)
+
+        result = measure(run, quantity)
+        result["megabytes_per_second"] = round(size_in_bytes / result["seconds"] / 1e6, 2)
+
+        compressed_size = sum(entry.stat().st_size for entry in os.scandir(sink_path))
+        result["ratio"] = round(size_in_bytes / compressed_size, 2)
+        results[compression_name] = result
+        shutil.rmtree(sink_path)
+
+    return results
+
+
+def benchmark_startup(repeats: int = 5) -> dict:
+    """
+    Measures how long the CLI takes to start up, against STARTUP_TARGET_SECONDS, along with how long the
+    interpreter alone takes to start (taking the fastest of repeats runs of each, to discount noise)
+    """
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generate.py")
+
+    def fastest(command: list) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    seconds = fastest([sys.executable, script, "--help"])
+    return {
+        "seconds": round(seconds, 6),
+        "interpreter_seconds": round(fastest([sys.executable, "-c", "pass"]), 6),
+        "target_seconds": STARTUP_TARGET_SECONDS,
+        "within_target": seconds <= STARTUP_TARGET_SECONDS,
+    }
+
+
+def run_benchmarks(document_quantity: int, journey_quantity: int, write_quantity: int) -> dict:
+    """
+    Runs the full benchmark suite, returning the results along with details of the environment they were run in
+    """
+    output_path = tempfile.mkdtemp(prefix="data-generator-bench-")
+
+    try:
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "serializer": default_serializer,
+            "startup": benchmark_startup(),
+            "document_providers": benchmark_document_providers(document_quantity),
+            "journey_providers": benchmark_journey_providers(journey_quantity, output_path),
+            "output_formats": benchmark_output_formats(write_quantity, output_path),
+            "compression": benchmark_compression(write_quantity, output_path),
+        }
+    finally:
+        shutil.rmtree(output_path, ignore_errors=True)
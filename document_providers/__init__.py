@@ -1,22 +1,40 @@
 from io import UnsupportedOperation
+from typing import TYPE_CHECKING
 
-from .document_provider import DocumentProvider
-from .starfleet_application import StarfleetApplication
-from .starfleet_account import StarfleetAccount
+from generate_registry import ProviderRegistry, lazy_attribute
 
+if TYPE_CHECKING:
+    from .document_provider import DocumentProvider
 
-document_provider_mapping = {
-    StarfleetApplication.name: StarfleetApplication,
-    StarfleetAccount.name: StarfleetAccount
+
+# Document providers by name, each imported (along with Mimesis) only once it's selected; other packages can
+# add providers through the data_generator.document_providers entry point group
+document_provider_mapping = ProviderRegistry(
+    "data_generator.document_providers",
+    {
+        "starfleet_application": "document_providers.starfleet_application:StarfleetApplication",
+        "starfleet_account": "document_providers.starfleet_account:StarfleetAccount",
+    },
+)
+
+# Classes importable from the package, loaded from their modules on first use
+lazy_attributes = {
+    "DocumentProvider": "document_providers.document_provider",
+    "StarfleetApplication": "document_providers.starfleet_application",
+    "StarfleetAccount": "document_providers.starfleet_account",
 }
 
 
-def select_document_provider(provider_name: str) -> DocumentProvider:
+def __getattr__(name: str):
+    return lazy_attribute(__name__, lazy_attributes, name)
+
+
+def select_document_provider(provider_name: str, seed=None, columnar=False, **pool_options) -> "DocumentProvider":
     """ returns an instance of a document schema provider, given the provider_name """
 
     try:
         document_provider = document_provider_mapping[provider_name.casefold()]
-        return document_provider()
+        return document_provider(seed=seed, columnar=columnar, **pool_options)
     except KeyError:
         raise UnsupportedOperation(
             f"Unsupported document_provider specified: {provider_name}"
@@ -1,5 +1,15 @@
+import random
+import uuid
+from io import UnsupportedOperation
+
 from generate_errors import DataGenerationError
-from mimesis.schema import Field, Schema
+from generate_seeds import derive_seed
+from mimesis.schema import Field
+
+from document_providers.columnar import ColumnarBackend
+from document_providers.field_profiler import FieldProfiler
+from document_providers.schema_plan import SchemaPlan
+from document_providers.value_pool import POOL_REFRESH, POOL_SIZE, create_value_pools
 
 
 class DocumentProvider:
@@ -9,23 +19,199 @@ class DocumentProvider:
 
     name = None
 
-    def __init__(self, localisation="en-GB"):
+    # Number of documents assembled per batch when generating with the columnar backend
+    batch_size = 1000
+
+    # Provider paths (i.e. "person.last_name") resolved by instances of this class, see SchemaPlan
+    resolved_paths = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each provider class keeps its own resolved paths
+        cls.resolved_paths = {}
+
+    def __init__(
+        self,
+        localisation="en-GB",
+        seed=None,
+        columnar=False,
+        pooled_paths=(),
+        pool_size=POOL_SIZE,
+        pool_refresh=POOL_REFRESH,
+    ):
+        # With a seed, each document generated in bulk is reseeded from it and its index in the run, so
+        # document i is the same however the run is split up
+        self.seed = seed
+
         # Generate a localisation field object for the DocumentProvider
-        self.field = Field(localisation)
+        # (a seed gives each instance its own random state rather than mimesis' shared one)
+        self.field = Field(localisation, seed=seed)
+
+        # Random generator for any choices a provider makes itself, rather than through the field
+        self.random = random.Random(seed)
+
+        # Compile the field into a plan that calls the provider methods used by the schema directly
+        # (generating UUIDs from the provider's own random generator, so they can be seeded too)
+        self.plan = SchemaPlan(self.field, self.resolved_paths, {"cryptographic.uuid": self.uuid})
+
+        # Optionally draw the values of expensive provider paths (i.e. text.sentence) from pools of pre-generated
+        # values, trading a little entropy for throughput (see ValuePool)
+        for name in pooled_paths:
+            if name in self.plan.overrides:
+                raise UnsupportedOperation(f"Values of {name} must be unique, so can't be pooled")
+
+        self.pools = create_value_pools(pooled_paths, localisation, pool_size, pool_refresh, seed)
+        for name, pool in self.pools.items():
+            self.plan.methods[name] = pool.draw
+
+        # Optionally generate columns of values with NumPy, for providers that implement create_batch
+        self.columns = ColumnarBackend(seed) if columnar else None
+
+    def create_schema(self, _: Field) -> dict:
+        raise NotImplementedError()
+
+    def create_batch(self, columns: ColumnarBackend, size: int) -> list:
+        """
+        Returns size documents assembled from columns of values generated by the columnar backend
 
-    def create_schema(self) -> dict:
+        Implementing this is optional; providers that don't are generated document by document with create_schema
+        """
         raise NotImplementedError()
 
+    def arrow_schema(self):
+        """
+        Returns the pyarrow schema of the provider's documents, for columnar output (i.e. Parquet), or None to
+        have it inferred from the documents
+
+        Declaring it keeps the column types the same in every file, which inference can't where documents vary
+        in shape (i.e. lists that may be empty)
+        """
+        return None
+
+    def locale_data(self, provider_name: str) -> dict:
+        """
+        Returns the Mimesis locale data behind a provider (i.e. "address"), so that fields which are a random
+        choice from it can be drawn as a column from the same vocabulary
+        """
+        return getattr(self.field._gen, provider_name)._data
+
+    @property
+    def supports_columnar(self) -> bool:
+        return type(self).create_batch is not DocumentProvider.create_batch
+
+    def uuid(self, as_object=False):
+        """
+        Stands in for cryptographic.uuid, generating a version 4 UUID from the provider's random generator
+        """
+        generated_uuid = uuid.UUID(int=self.random.getrandbits(128), version=4)
+        return generated_uuid if as_object else str(generated_uuid)
+
+    def profile_fields(self) -> FieldProfiler:
+        """
+        Wraps the provider's plan in a FieldProfiler, so every field its schema generates from then on is timed
+
+        Documents generated with the columnar backend don't go through the plan, so aren't profiled
+        """
+        self.plan = FieldProfiler(self.plan)
+        return self.plan
+
+    def reseed(self, seed: int):
+        """
+        Reseeds all of the provider's random generators, so the documents generated next depend only on the seed
+        """
+        self.random.seed(seed)
+        self.plan.reseed(seed)
+        for name, pool in self.pools.items():
+            pool.reseed(derive_seed(seed, "pool", name))
+        if self.columns is not None:
+            self.columns.reseed(seed)
+
     def generate(self) -> dict:
         try:
-            # Create Mimesis Field object for specified localisation
-            document_schema = Schema(lambda: self.create_schema(self.field))
+            # Create the document from the schema; as it's built by calling the plan afresh each time,
+            # variable parts of the schema (i.e. for-loops) vary per document
+            return self.create_schema(self.plan)
 
-            # Because we want a variance in schemas we need to handle iterations ourselves
-            fake_document = document_schema.create(iterations=1)[0]
-            return fake_document
+        except Exception as e:
+            raise DataGenerationError(
+                "Unable to generate data using the document provider"
+            ) from e
+
+    def iter_generate(self, quantity: int):
+        """
+        Lazily generates quantity documents, one at a time, so memory use doesn't grow with the quantity
+
+        This is the bulk entry point used when generating many documents; providers can override it with a
+        faster implementation that generates documents in batches. Seeded runs derive each document from its
+        index in the run, which this isn't given, so they're always generated by the base implementation (see
+        iter_generate_run)
+        """
+        return self._iter_generate(quantity, 0)
+
+    def iter_generate_run(self, quantity: int, start: int = 0):
+        """
+        Lazily generates the quantity documents from index start in the overall run, i.e. one chunk of a run
+
+        Unseeded documents don't depend on their index, so are generated through iter_generate (and any faster
+        implementation a provider overrides it with); seeded ones are generated from seeds derived from their index
+        """
+        if self.seed is None:
+            return self.iter_generate(quantity)
+
+        return self._iter_generate(quantity, start)
+
+    def _iter_generate(self, quantity: int, start: int):
+        """
+        Generates the documents for iter_generate and iter_generate_run, reseeding seeded providers from the index
+        of each document (or batch) in the overall run, starting from start
+        """
+        if self.columns is not None and self.supports_columnar:
+            yield from self.iter_generate_batches(quantity, start)
+            return
+
+        create_schema = self.create_schema
+        plan = self.plan
+
+        try:
+            for i in range(start, start + quantity):
+                if self.seed is not None:
+                    self.reseed(derive_seed(self.seed, i))
+
+                yield create_schema(plan)
 
         except Exception as e:
             raise DataGenerationError(
                 "Unable to generate data using the document provider"
             ) from e
+
+    def iter_generate_batches(self, quantity: int, start: int = 0):
+        """
+        Lazily generates quantity documents with the columnar backend, batch_size documents at a time
+
+        Seeded providers generate whole batches aligned to multiples of batch_size in the overall run, each
+        seeded from its batch number, and only yield the documents that fall within [start, start + quantity)
+        """
+        try:
+            if self.seed is None:
+                for batch_start in range(0, quantity, self.batch_size):
+                    yield from self.create_batch(self.columns, min(self.batch_size, quantity - batch_start))
+                return
+
+            stop = start + quantity
+            for batch_number in range(start // self.batch_size, -(-stop // self.batch_size)):
+                self.reseed(derive_seed(self.seed, "batch", batch_number))
+                batch = self.create_batch(self.columns, self.batch_size)
+
+                batch_start = batch_number * self.batch_size
+                yield from batch[max(start - batch_start, 0):stop - batch_start]
+
+        except Exception as e:
+            raise DataGenerationError(
+                "Unable to generate data using the document provider"
+            ) from e
+
+    def generate_many(self, quantity: int, start: int = 0) -> list:
+        """
+        Generates a list of the quantity documents from index start in the overall run
+        """
+        return list(self.iter_generate_run(quantity, start))
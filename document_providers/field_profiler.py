@@ -0,0 +1,42 @@
+import time
+
+
+class FieldProfiler:
+    """
+    Wraps a schema plan (or Field), counting the calls create_schema makes through it and the time they take,
+    per provider path (i.e. "person.telephone")
+
+    Anything else (i.e. reseed) is passed through to the wrapped plan, so a profiler can stand in for it
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+
+        # [calls, seconds] by provider path
+        self.counters = {}
+
+    def __call__(self, name=None, key=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.plan(name, key=key, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+
+            counters = self.counters.get(name)
+            if counters is None:
+                counters = self.counters[name] = [0, 0.0]
+            counters[0] += 1
+            counters[1] += elapsed
+
+    def __getattr__(self, name):
+        return getattr(self.plan, name)
+
+    def report(self) -> dict:
+        """
+        Returns the calls, cumulative seconds and seconds per call for each provider path, most expensive first
+        """
+        by_cost = sorted(self.counters.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            str(name): {"calls": calls, "seconds": round(seconds, 6), "per_call": round(seconds / calls, 9)}
+            for name, (calls, seconds) in by_cost
+        }
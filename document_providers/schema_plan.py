@@ -0,0 +1,97 @@
+from mimesis.schema import Field
+
+from generate_seeds import derive_seed
+
+
+class SchemaPlan:
+    """
+    A drop-in replacement for a Mimesis Field when creating schemas, which calls provider methods directly
+
+    Field parses and looks up a "provider.method" name on every call; a SchemaPlan binds each name to its
+    provider method the first time it is seen, so every document after the first is generated with a plain
+    dict lookup and call. Names are resolved once per DocumentProvider class (resolved_paths is shared between
+    its instances) and bound once per instance, as each instance has its own seeded providers. Overrides replace
+    the method for a name outright (i.e. to generate UUIDs from a seedable generator rather than uuid4)
+    """
+
+    def __init__(self, field: Field, resolved_paths: dict, overrides: dict = None):
+        self.field = field
+        self.resolved_paths = resolved_paths
+        self.overrides = overrides or {}
+
+        # The Mimesis providers the plan has used, which are the ones reseeded by reseed, and the last seed
+        self.providers = []
+        self.seed = None
+
+        # Bind the paths already resolved by other instances of the DocumentProvider to this field's providers
+        self.methods = {
+            name: self.bind(provider_name, method_name)
+            for name, (provider_name, method_name) in resolved_paths.items()
+        }
+        self.methods.update(self.overrides)
+
+    def bind(self, provider_name: str, method_name: str):
+        provider = getattr(self.field._gen, provider_name)
+        method = getattr(provider, method_name)
+        self.track(provider)
+        return method
+
+    def track(self, provider):
+        """
+        Adds a provider to those reseeded by reseed
+
+        A provider used for the first time since the last reseed is reseeded as it's added, so it generates the
+        same values as if it had been reseeded along with the others
+        """
+        if provider not in self.providers:
+            self.providers.append(provider)
+            if self.seed is not None:
+                self.reseed_provider(provider)
+
+    def reseed(self, seed: int):
+        """
+        Reseeds the Mimesis providers used by the plan, so the values generated next depend only on the seed
+        """
+        self.seed = seed
+        for provider in self.providers:
+            self.reseed_provider(provider)
+
+    def reseed_provider(self, provider):
+        # Each provider gets its own seed, otherwise they would all draw the same random numbers
+        # (i.e. surnames would always be picked from the same position in their list as cities)
+        provider.reseed(derive_seed(self.seed, type(provider).__name__))
+
+    def __call__(self, name=None, key=None, **kwargs):
+        try:
+            method = self.methods[name]
+        except (KeyError, TypeError):
+            # Only plain "provider.method" names are planned, anything else is left to the field to handle
+            # (including raising the same error it would have for an unsupported name)
+            if not isinstance(name, str) or name.count(".") != 1:
+                return self.call_field(name, key, kwargs)
+
+            provider_name, method_name = name.split(".")
+            try:
+                method = self.bind(provider_name, method_name)
+            except AttributeError:
+                return self.call_field(name, key, kwargs)
+
+            self.resolved_paths[name] = provider_name, method_name
+            self.methods[name] = method
+
+        result = method(**kwargs)
+        if key is not None:
+            return key(result)
+        return result
+
+    def call_field(self, name, key, kwargs: dict):
+        """
+        Generates a value through the field itself, for names the plan can't bind
+        """
+        # The field may use any of its providers, so they all need reseeding along with those the plan binds
+        if self.seed is not None:
+            generic = self.field._gen
+            for provider_name in dir(generic):
+                self.track(getattr(generic, provider_name))
+
+        return self.field(name, key=key, **kwargs)
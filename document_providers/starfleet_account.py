@@ -1,6 +1,7 @@
 # from mimesis.providers.date import Datetime
 
 from mimesis.schema import Field
+from document_providers.columnar import ColumnarBackend
 from document_providers.document_provider import DocumentProvider
 
 
@@ -29,3 +30,50 @@ class StarfleetAccount(DocumentProvider):
 
         # Return Mimesis schema description of the document
         return starfleet_account_schema
+
+    def arrow_schema(self):
+
+        # Imported here rather than at the top, as pyarrow is optional and only needed for columnar output
+        from output_sinks.arrow import import_pyarrow
+        pa = import_pyarrow()
+
+        # logins are always empty, so can't be inferred as anything but a list of nulls
+        return pa.schema([
+            ("id", pa.string()),
+            ("stardate_of_birth", pa.string()),
+            ("subspace_address", pa.string()),
+            ("communicator", pa.string()),
+            ("surname", pa.string()),
+            ("forename", pa.string()),
+            ("title", pa.string()),
+            ("auth", pa.struct([("logins", pa.list_(pa.string()))])),
+            ("federation_citizen_id", pa.string()),
+        ])
+
+    def create_batch(self, columns: ColumnarBackend, size: int) -> list:
+
+        _ = self.plan
+
+        # Generate a column of values for each field, vectorised where the field is a random choice, number or mask
+        ids = columns.uuids(size)
+        stardates_of_birth = columns.dates(2000, current_year - 18, size)
+        communicators = columns.masked("07#########", size)
+        federation_citizen_ids = columns.masked("@@###@@@#@###@", size)
+
+        # Assemble the columns into documents
+        return [
+            {
+                "id": ids[row],
+                "stardate_of_birth": stardates_of_birth[row],
+                "subspace_address": _("person.email"),
+                "communicator": communicators[row],
+                "surname": _("person.last_name"),
+                "forename": _("person.first_name"),
+                "title": _("person.title"),
+                "auth": {
+                    "logins": []
+                },
+                "federation_citizen_id": federation_citizen_ids[row]
+            }
+            for row in range(size)
+        ]
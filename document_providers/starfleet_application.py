@@ -1,7 +1,8 @@
-import random
+from itertools import islice
 
 # from mimesis import Datetime
 from mimesis.schema import Field
+from document_providers.columnar import ColumnarBackend
 from document_providers.document_provider import DocumentProvider
 
 
@@ -61,7 +62,7 @@ class StarfleetApplication(DocumentProvider):
                 "surname": _("person.last_name"),
                 "forename": _("person.first_name"),
                 "title": _("person.title"),
-                "faction": random.choice(factions),
+                "faction": self.random.choice(factions),
                 "communicator": _("person.telephone"),
                 "space_address": {
                     "address_line": [_("address.street_name"), _("address.city")],
@@ -73,12 +74,12 @@ class StarfleetApplication(DocumentProvider):
         }
 
         # Generate random number of entries into record
-        for record_index in range(random.randint(1, 10)):
+        for record_index in range(self.random.randint(1, 10)):
             starfleet_application_schema["record"].append(
                 {
-                    "assignment": random.choice(assignments),
-                    "rank": random.choice(ranks),
-                    "profession": random.choice(professions),
+                    "assignment": self.random.choice(assignments),
+                    "rank": self.random.choice(ranks),
+                    "profession": self.random.choice(professions),
                     "served_from_month": _("numbers.integer_number", start=1, end=12),
                     "served_from_year": str(
                         _(
@@ -92,10 +93,111 @@ class StarfleetApplication(DocumentProvider):
             )
 
             # Generate random number of comments in record entry
-            for comment_index in range(random.randint(1, 10)):
+            for comment_index in range(self.random.randint(1, 10)):
                 starfleet_application_schema["record"][record_index]["comments"].append(
                     _("text.sentence")
                 )
 
         # Return Mimesis schema description of the document
         return starfleet_application_schema
+
+    def arrow_schema(self):
+
+        # Imported here rather than at the top, as pyarrow is optional and only needed for columnar output
+        from output_sinks.arrow import import_pyarrow
+        pa = import_pyarrow()
+
+        return pa.schema([
+            ("id", pa.string()),
+            ("accountId", pa.string()),
+            ("completed", pa.string()),
+            ("details", pa.struct([
+                ("surname", pa.string()),
+                ("forename", pa.string()),
+                ("title", pa.string()),
+                ("faction", pa.string()),
+                ("communicator", pa.string()),
+                ("space_address", pa.struct([
+                    ("address_line", pa.list_(pa.string())),
+                    ("postcode", pa.string()),
+                ])),
+                ("federation_citizen_id", pa.string()),
+            ])),
+            ("record", pa.list_(pa.struct([
+                ("assignment", pa.string()),
+                ("rank", pa.string()),
+                ("profession", pa.string()),
+                ("served_from_month", pa.int64()),
+                ("served_from_year", pa.string()),
+                ("comments", pa.list_(pa.string())),
+            ]))),
+        ])
+
+    def create_batch(self, columns: ColumnarBackend, size: int) -> list:
+
+        _ = self.plan
+
+        # Generate a column of values for each document field, vectorised where the field is a random choice,
+        # number or mask
+        ids = columns.uuids(size)
+        account_ids = columns.uuids(size)
+        completed = columns.dates(current_year - 1, current_year, size)
+        document_factions = columns.choice(factions, size)
+        federation_citizen_ids = columns.masked("@@###@@@#@###@", size)
+
+        # person.telephone, address.street_name, address.city and address.postal_code are random choices and masks
+        # from the locale, so they can be drawn as columns from the same locale data
+        person_data = self.locale_data("person")
+        address_data = self.locale_data("address")
+        communicators = columns.masked_choice(person_data["telephone_fmt"], size)
+        street_names = columns.choice(address_data["street"]["name"], size)
+        cities = columns.choice(address_data["city"], size)
+        postcodes = columns.masked(address_data["postal_code_fmt"], size)
+
+        # ... then for each record entry across the whole batch
+        record_counts = columns.integers(1, 10, size)
+        record_total = sum(record_counts)
+        record_assignments = columns.choice(assignments, record_total)
+        record_ranks = columns.choice(ranks, record_total)
+        record_professions = columns.choice(professions, record_total)
+        record_months = columns.integers(1, 12, record_total)
+        record_years = columns.integers(current_year - 20, current_year, record_total)
+
+        # ... and for each comment across all record entries (text.sentence is also a random choice from the locale)
+        comment_counts = columns.integers(1, 10, record_total)
+        comments = iter(columns.choice(self.locale_data("text")["text"], sum(comment_counts)))
+
+        # Assemble the columns into record entries, then the record entries and columns into documents
+        records = iter([
+            {
+                "assignment": record_assignments[record_index],
+                "rank": record_ranks[record_index],
+                "profession": record_professions[record_index],
+                "served_from_month": record_months[record_index],
+                "served_from_year": str(record_years[record_index]),
+                "comments": list(islice(comments, comment_counts[record_index]))
+            }
+            for record_index in range(record_total)
+        ])
+
+        return [
+            {
+                "id": ids[row],
+                "accountId": account_ids[row],
+                "completed": completed[row],
+                "details": {
+                    "surname": _("person.last_name"),
+                    "forename": _("person.first_name"),
+                    "title": _("person.title"),
+                    "faction": document_factions[row],
+                    "communicator": communicators[row],
+                    "space_address": {
+                        "address_line": [street_names[row], cities[row]],
+                        "postcode": postcodes[row],
+                    },
+                    "federation_citizen_id": federation_citizen_ids[row]
+                },
+                "record": list(islice(records, record_counts[row]))
+            }
+            for row in range(size)
+        ]
@@ -0,0 +1,125 @@
+import random
+from io import UnsupportedOperation
+
+from generate_seeds import derive_seed
+
+
+# Number of values pre-generated for each pooled provider path (and set of arguments it's called with)
+POOL_SIZE = 10000
+
+# Fraction of draws from a pool that generate a fresh value in place of a random pooled one
+POOL_REFRESH = 0.01
+
+
+class ValuePool:
+    """
+    Stands in for a provider method (i.e. text.sentence), drawing values at random from a pool of size values
+    pre-generated by it, rather than going through Mimesis for every value
+
+    Each set of arguments the method is called with gets its own pool, filled the first time it's used. To keep
+    the values diverse, a fraction refresh of the draws generate a fresh value that evicts a random one from the
+    pool. With a seed, each pool is filled from a seed derived from it and the path, and never refreshed, so the
+    values drawn depend only on the seed the pool is reseeded with (see reseed)
+
+    Pooled values are shared between documents, so only pool paths whose values are immutable (i.e. strings,
+    numbers and dates), and never ones that must be unique (i.e. ids)
+    """
+
+    def __init__(self, name: str, method, size: int = POOL_SIZE, refresh: float = POOL_REFRESH, seed=None):
+        self.name = name
+        self.method = method
+        self.provider = method.__self__
+        self.size = size
+        self.seed = seed
+
+        # Values are drawn by picking an index in [0, span): indices beyond the pool (a refresh of the draws)
+        # generate a fresh value in place of a random pooled one, so the pool's values turn over
+        self.span = size / (1 - refresh) if refresh and seed is None else size
+
+        # Pools by the arguments the method is called with (the pool without any is kept apart, as it's the most
+        # used), and the fast generator values are drawn with
+        self.pools = {}
+        self.default_pool = None
+        self.random = random.Random(seed)
+        self.random_draw = self.random.random
+
+    def fill(self, arguments: tuple) -> list:
+        if self.seed is not None:
+            self.provider.reseed(derive_seed(self.seed, self.name, repr(arguments)))
+
+        kwargs = dict(arguments)
+        return [self.method(**kwargs) for _ in range(self.size)]
+
+    def pool_for(self, kwargs: dict) -> list:
+        """
+        Returns the pool for the arguments, or None if they can't be pooled (i.e. lists, which can't be hashed)
+        """
+        arguments = tuple(sorted(kwargs.items()))
+        try:
+            pool = self.pools.get(arguments)
+        except TypeError:
+            return None
+
+        if pool is None:
+            pool = self.pools[arguments] = self.fill(arguments)
+
+        return pool
+
+    def draw(self, **kwargs):
+        """
+        Stands in for the provider method, drawing a value from the pool for the arguments it's called with
+        """
+        if kwargs:
+            pool = self.pool_for(kwargs)
+            if pool is None:
+                return self.method(**kwargs)
+        else:
+            pool = self.default_pool
+            if pool is None:
+                pool = self.default_pool = self.fill(())
+
+        index = int(self.random_draw() * self.span)
+        if index < self.size:
+            return pool[index]
+
+        value = pool[int(self.random_draw() * self.size)] = self.method(**kwargs)
+        return value
+
+    def reseed(self, seed: int):
+        """
+        Reseeds the generator values are drawn with (and, unless the pool is seeded, the provider filling it)
+        """
+        self.random.seed(seed)
+        if self.seed is None:
+            self.provider.reseed(derive_seed(seed, "fill"))
+
+
+def create_value_pools(
+    paths, localisation: str, size: int = POOL_SIZE, refresh: float = POOL_REFRESH, seed=None
+) -> dict:
+    """
+    Returns a ValuePool for each "provider.method" path, filled by providers of their own (so filling a pool
+    never disturbs the random state of the providers generating documents)
+    """
+    if not paths:
+        return {}
+
+    # Imported here rather than at the top, so the pool defaults can be imported (i.e. by the CLI) without Mimesis
+    from mimesis.schema import Field
+
+    field = Field(localisation, seed=derive_seed(seed, "pools") if seed is not None else None)
+
+    pools = {}
+    for name in paths:
+        provider_name, _, method_name = name.partition(".")
+        try:
+            method = getattr(getattr(field._gen, provider_name), method_name)
+        except AttributeError:
+            method = None
+
+        if not callable(method) or not hasattr(method, "__self__"):
+            raise UnsupportedOperation(f"Unsupported provider path to pool: {name}")
+
+        pools[name] = ValuePool(name, method, size, refresh, seed)
+
+    return pools
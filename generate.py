@@ -1,16 +1,166 @@
-import json
+import cProfile
+import glob
 import os
+import sys
+from contextlib import contextmanager, redirect_stdout
+
+from io import UnsupportedOperation
+
 import click
 from dotenv import load_dotenv
 
 from document_providers import select_document_provider, document_provider_mapping
-from journey_providers import select_journey_provider, journey_provider_mapping
-from generate_errors import DataOutputError, DataGenerationError
+from document_providers.value_pool import POOL_REFRESH, POOL_SIZE
+from journey_providers import journey_provider_mapping
+from journey_providers.journey_publisher import zip_compression_levels, zip_compression_mapping
+from generate_errors import DataGenerationError
+from generate_manifest import SHARD_MANIFEST_PATTERN, RunManifest, manifest_file_name
+from generate_pipeline import PIPELINE_QUEUE_SIZE, merge_stats
+from generate_progress import ProgressReporter
+from generate_rate import generate_at_rate, parse_rate
+from generate_workers import (
+    DOCUMENTS_PER_CHECKPOINT,
+    JOURNEYS_PER_CHECKPOINT,
+    chunk_alignment,
+    clean_journey_staging,
+    generate_documents_in_parallel,
+    generate_journey_chunk,
+    generate_journeys_in_parallel,
+    journey_staging_root,
+    load_zstd_dictionary,
+    open_output_sink,
+    parse_shard,
+    plan_chunks,
+    roll_back_published_chunks,
+    shard_range,
+    write_documents,
+)
+from generate_serializer import dumps
+from output_sinks import output_sink_mapping
+from output_sinks.arrow import RECORD_BATCH_SIZE
+from output_sinks.compression import compression_mapping
+from replay_sinks import replay_sink_mapping, select_replay_sink
 
 
 load_dotenv()
 
 
+def print_stage_stats(stats: dict, unit: str):
+    """
+    Outputs the throughput of each stage of the runs' pipelines to the console
+    """
+    if stats:
+        summary = ", ".join(
+            f"{name} {counters['per_second'] or 0:,.0f}/sec" for name, counters in stats.items()
+        )
+        print(f"Pipeline throughput ({unit}): {summary}")
+
+
+def print_field_profile(fields: dict):
+    """
+    Outputs the calls and cumulative time of each provider path profiled, most expensive first, to the console
+    """
+    total_seconds = sum(counters["seconds"] for counters in fields.values())
+    if not total_seconds:
+        print("No fields were profiled (the columnar backend doesn't generate documents field by field)")
+        return
+
+    print("Field profile (cumulative time per provider path):")
+    width = max(len(name) for name in fields)
+    for name, counters in fields.items():
+        print(
+            f"  {name:<{width}}  {counters['calls']:>10,} calls  {counters['seconds']:>9.3f}s  "
+            f"{counters['seconds'] / total_seconds:>6.1%}  {counters['per_call'] * 1e6:>8.1f}us/call"
+        )
+
+
+def print_pacing(pacing: dict):
+    """
+    Outputs the rate a paced run achieved, against its target rate, to the console
+    """
+    achieved = pacing["achieved_per_second"] or 0
+    summary = f"Achieved {achieved:,.0f} documents/sec"
+
+    target = pacing["target_per_second"]
+    if target:
+        summary += f" against a target of {target:,.0f}/sec ({achieved / target:.1%})"
+    if pacing["interrupted"]:
+        summary += ", until interrupted"
+
+    print(summary)
+
+
+@contextmanager
+def cprofile(profile_output: str):
+    """
+    Profiles the code run within it with cProfile (if profile_output is given), dumping the stats to profile_output
+    """
+    if not profile_output:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_output)
+        print(f"Profile written to {profile_output} (view it with: python -m pstats {profile_output})")
+
+
+def write_metrics(
+    metrics_file: str,
+    command: str,
+    provider: str,
+    workers: int,
+    progress: ProgressReporter,
+    stats: dict,
+    fields=None,
+    pacing=None,
+):
+    """
+    Writes a run's totals and the counters of each stage of its pipelines (and of each field, when profiled, and
+    the achieved rate, when paced) to metrics_file as JSON
+    """
+    metrics = {"command": command, "provider": provider, "quantity": progress.total, "workers": workers}
+    metrics.update(progress.metrics())
+    metrics["stages"] = stats
+    if fields is not None:
+        metrics["fields"] = fields
+    if pacing is not None:
+        metrics["pacing"] = pacing
+
+    with open(metrics_file, "wb") as fp:
+        fp.write(dumps(metrics))
+
+
+def parse_rate_option(ctx, param, value: str):
+    """
+    Parses the --rate option into documents per second
+    """
+    if value is None:
+        return None
+
+    try:
+        return parse_rate(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def parse_shard_option(ctx, param, value: str):
+    """
+    Parses the --shard option into (K, N)
+    """
+    if value is None:
+        return None
+
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @click.group()
 def cli():
     pass
@@ -32,9 +182,181 @@ def cli():
     help="document provider to use",
 )
 @click.option(
-    "-q", "--quantity", type=click.INT, default=1, help="Number of files to create"
+    "-q",
+    "--quantity",
+    type=click.INT,
+    default=None,
+    help="Number of files to create (defaults to 1, or no limit with --rate or --duration)",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes to generate documents with",
+)
+@click.option(
+    "--shard",
+    default=None,
+    callback=parse_shard_option,
+    help="Only generate shard K/N (from 0/N to N-1/N) of the documents, i.e. one node's slice of a run across N nodes",
+)
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(output_sink_mapping.keys()),
+    default="json-files",
+    help="Format to write the generated documents in",
+)
+@click.option(
+    "--shard-size",
+    type=click.IntRange(min=1),
+    default=100000,
+    help="Maximum number of documents per file for sharded formats (e.g. jsonl)",
 )
-def generate_document(output_path, provider, quantity):
+@click.option(
+    "--record-batch-size",
+    type=click.IntRange(min=1),
+    default=RECORD_BATCH_SIZE,
+    help="Number of documents buffered into each record batch (Parquet row group) for columnar formats",
+)
+@click.option(
+    "--compress",
+    type=click.Choice(compression_mapping.keys()),
+    default=None,
+    help="Compress the output files (each jsonl shard as a stream, each json file on its own, or the columns of columnar formats)",
+)
+@click.option(
+    "--compress-level",
+    type=click.INT,
+    default=None,
+    help="Compression level, 0-9 for gzip (defaults to 6) or 1-22 for zstd (defaults to 3)",
+)
+@click.option(
+    "--zstd-dictionary",
+    is_flag=True,
+    default=False,
+    help="Compress with a zstd dictionary trained on a sample of the provider's documents",
+)
+@click.option(
+    "-b",
+    "--backend",
+    type=click.Choice(["mimesis", "columnar"]),
+    default="mimesis",
+    help="Generate documents field by field with mimesis, or in batches of columns with numpy",
+)
+@click.option(
+    "--pool",
+    "pooled_paths",
+    multiple=True,
+    help="Provider path (i.e. text.sentence) to draw values for from a pool of pre-generated values (repeatable)",
+)
+@click.option(
+    "--pool-size",
+    type=click.IntRange(min=1),
+    default=POOL_SIZE,
+    help="Number of values pre-generated for each pooled provider path",
+)
+@click.option(
+    "--pool-refresh",
+    type=click.FloatRange(min=0, max=0.99),
+    default=POOL_REFRESH,
+    help="Fraction of pooled values drawn that are generated afresh, evicting a pooled value (not for seeded runs)",
+)
+@click.option(
+    "-s",
+    "--seed",
+    type=click.INT,
+    default=None,
+    help="Seed to generate reproducible documents from",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted run with the same options, skipping the chunks it completed",
+)
+@click.option(
+    "--upload-url",
+    default=None,
+    help="URL (i.e. a blob container URL with a SAS token) to upload documents to with the http format",
+)
+@click.option(
+    "--upload-concurrency",
+    type=click.IntRange(min=1),
+    default=32,
+    help="Maximum number of uploads in flight at once (per worker)",
+)
+@click.option(
+    "--target",
+    default=None,
+    help="Named pipe path (pipe format), or host:port or unix:path to connect to (socket format)",
+)
+@click.option(
+    "--rate",
+    default=None,
+    callback=parse_rate_option,
+    help="Generate documents continuously at a target rate, i.e. 500/s (also per m or h)",
+)
+@click.option(
+    "--duration",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Seconds to generate documents continuously for (at --rate, or as fast as possible)",
+)
+@click.option(
+    "--pipeline-depth",
+    type=click.IntRange(min=0),
+    default=PIPELINE_QUEUE_SIZE,
+    help="Batches of documents queued between the generate, serialize and write stages (0 runs them in one thread)",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write the run's throughput and per-stage timings to as JSON",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Report the calls and cumulative time of each field (provider path) the schema generates",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to dump cProfile stats for the whole run to (readable with pstats)",
+)
+def generate_document(
+    output_path,
+    provider,
+    quantity,
+    workers,
+    shard,
+    output_format,
+    shard_size,
+    record_batch_size,
+    compress,
+    compress_level,
+    zstd_dictionary,
+    backend,
+    pooled_paths,
+    pool_size,
+    pool_refresh,
+    seed,
+    resume,
+    upload_url,
+    upload_concurrency,
+    target,
+    rate,
+    duration,
+    pipeline_depth,
+    metrics_file,
+    profile,
+    profile_output,
+):
     """Generates data based upon a specified document provider schema
 
     Generated data files are saved to the path specified in --output_path
@@ -44,42 +366,244 @@ def generate_document(output_path, provider, quantity):
 
     The --quantity option specifies how many of the document files are to be generated
 
+    The --workers option splits the quantity across a pool of processes, each with its own provider and seed
+
+    The --format option selects how documents are written: one JSON file per document (json-files), or
+    streamed into JSON lines shards of up to --shard-size documents each (jsonl), or uploaded to --upload-url
+    as they are generated, with up to --upload-concurrency uploads in flight (http), or into Parquet (parquet)
+    or Arrow IPC (arrow) shards, buffering --record-batch-size documents into each record batch (row group)
+
+    The --compress option compresses the output files with gzip or zstd at --compress-level: jsonl shards are
+    stream-compressed, json files are compressed one by one, and the columns of Parquet (gzip or zstd) and Arrow
+    (zstd) shards are compressed in the file. With --zstd-dictionary, zstd compresses with a
+    dictionary trained on a sample of the provider's documents (saved alongside the output, to decompress it with)
+
+    The --backend option set to columnar generates documents in batches, drawing whole columns of values at once
+    with numpy (which must be installed) for providers that support it
+
+    The --pool option draws the values of a provider path (i.e. text.sentence) at random from a pool of
+    --pool-size values pre-generated by it, rather than generating every value with Mimesis; --pool-refresh of the
+    draws generate a fresh value in place of a pooled one, so the pool's values turn over
+
+    The --seed option makes the run reproducible: each document is generated from a seed derived from the run's
+    seed and its index, so document i is the same whatever the --workers count
+
+    Progress is checkpointed to a run manifest as each chunk of documents completes; if the run is interrupted,
+    the --resume option picks it up from the manifest, only generating the chunks that hadn't completed
+
+    The --shard K/N option generates only the Kth of N contiguous slices of the run's --quantity documents (counting
+    from 0/N), so N nodes given the same options (and --seed) can each generate their own slice without
+    coordinating. Documents keep their index (and seed) in the whole run, so every node's files are named apart,
+    and each shard keeps its manifest once it completes, to combine with the merge-manifest command
+
+    The --rate option generates documents continuously, paced to a target rate (i.e. 500/s) by a token bucket,
+    for --duration seconds, up to --quantity documents, or until interrupted; with --duration alone, documents are
+    generated as fast as possible. The rate achieved is reported against the target. Paced runs are made to feed
+    load tests, so run in a single process and aren't checkpointed
+
+    Documents can also be streamed as JSON lines to stdout, into the named pipe at --target (pipe), or over a TCP
+    or Unix domain socket connected to --target (socket), in a single process
+
+    Documents pass through a pipeline: they are serialized and written on their own threads while the next ones
+    are generated, with at most --pipeline-depth batches queued between stages. The throughput of each stage is
+    reported once the run completes, and written with the run's totals to --metrics-file as JSON
+
+    Progress (documents/sec, bytes written and the estimated time remaining) is shown a few times a second when
+    the output is a terminal
+
+    The --profile option times every field the provider's schema generates, reporting the calls and cumulative
+    time per provider path (i.e. text.sentence) once the run completes, and --profile-output dumps cProfile stats
+    for the whole run. Profiling runs in a single process
+
     For example:
 
     python generate.py document --output_path ./output/documents --provider starfleet_application
      --quantity 10
     """
+    if (profile or profile_output) and workers > 1:
+        raise click.BadParameter("profiling runs in a single process, so needs --workers 1", param_hint="--workers")
+
+    # Paced runs generate continuously (up to an optional quantity), and streams have a single writer, so both are
+    # generated in a single process into one sink, rather than in checkpointed chunks
+    paced = rate is not None or duration is not None
+    streaming = output_sink_mapping[output_format].streaming
+    if (paced or streaming) and workers > 1:
+        raise click.BadParameter(
+            "paced runs and streamed output run in a single process, so need --workers 1", param_hint="--workers"
+        )
+    if (paced or streaming) and resume:
+        raise click.BadParameter(
+            "paced runs and streamed output aren't checkpointed, so can't be resumed", param_hint="--resume"
+        )
+    if (paced or streaming) and shard is not None:
+        raise click.BadParameter(
+            "paced runs and streamed output aren't planned in chunks, so can't be sharded", param_hint="--shard"
+        )
+    if streaming and output_sink_mapping[output_format].needs_target and not target:
+        raise click.BadParameter(f"{output_format} output needs a pipe path or socket address to stream documents to", param_hint="--target")
+    if output_sink_mapping[output_format].remote and not upload_url:
+        raise click.BadParameter(f"{output_format} output needs a URL to upload documents to", param_hint="--upload-url")
+    if quantity is None and not paced:
+        quantity = 1
+
+    # Keep the console output apart from documents streamed to stdout
+    console = sys.stderr if output_format == "stdout" else sys.stdout
+
     # Get provider type from document_provider type map
-    document_provider = select_document_provider(provider)
+    provider_options = {"seed": seed, "columnar": backend == "columnar"}
+    if pooled_paths:
+        provider_options.update(pooled_paths=pooled_paths, pool_size=pool_size, pool_refresh=pool_refresh)
+
+    try:
+        document_provider = select_document_provider(provider, **provider_options)
+    except UnsupportedOperation as e:
+        raise click.BadParameter(str(e), param_hint="--pool")
+    field_profiler = document_provider.profile_fields() if profile else None
 
     # Export output to a provider folder within the specified output path
     provider_output_path = os.path.join(output_path, document_provider.name)
-    # Create the folder if it doesn't already exist
-    if not os.path.exists(provider_output_path):
-        os.makedirs(provider_output_path)
+    sink_options = {"shard_size": shard_size}
+    if output_format == "http":
+        sink_options.update(upload_url=upload_url, upload_concurrency=upload_concurrency)
+    if streaming:
+        sink_options["target"] = target
+
+    # Columnar formats convert documents into record batches of the provider's schema (or one inferred from them)
+    columnar = output_sink_mapping[output_format].columnar
+    if columnar:
+        sink_options.update(batch_size=record_batch_size, schema=document_provider.arrow_schema())
+
+    if compress is None:
+        if compress_level is not None:
+            raise click.BadParameter("a compression level needs a --compress codec", param_hint="--compress-level")
+        if zstd_dictionary:
+            raise click.BadParameter("dictionaries need --compress zstd", param_hint="--zstd-dictionary")
+    else:
+        levels = compression_mapping[compress].levels
+        if compress_level is not None and compress_level not in levels:
+            raise click.BadParameter(
+                f"{compress} takes a compression level from {levels[0]} to {levels[-1]}", param_hint="--compress-level"
+            )
+        if output_sink_mapping[output_format].remote or streaming:
+            raise click.BadParameter(f"{output_format} output can't be compressed", param_hint="--compress")
+        if columnar and compress not in output_sink_mapping[output_format].compressions:
+            raise click.BadParameter(f"{output_format} output can't be compressed with {compress}", param_hint="--compress")
+        if columnar and zstd_dictionary:
+            raise click.BadParameter(f"{output_format} output can't be compressed with a dictionary", param_hint="--zstd-dictionary")
+
+        sink_options.update(compression=compress, compression_level=compress_level)
+        if zstd_dictionary:
+            if compress != "zstd":
+                raise click.BadParameter("dictionaries are only supported by zstd", param_hint="--zstd-dictionary")
+            if shard is not None and seed is None:
+                raise click.BadParameter(
+                    "every shard must train the same dictionary, so sharded runs need a --seed",
+                    param_hint="--zstd-dictionary",
+                )
+
+            sink_options["compression_dictionary"] = load_zstd_dictionary(
+                provider, provider_options, provider_output_path, resume
+            )
+
+    pacing = None
+    if paced or streaming:
+        # Generate continuously (at the target rate) into a single sink, rather than planning a run in chunks
+        with cprofile(profile_output):
+            with open_output_sink(
+                output_format, provider_output_path, document_provider.name, sink_options
+            ) as output_sink:
+                # Only start the clock once the sink is open (i.e. a named pipe's reader has connected)
+                progress = ProgressReporter(quantity, f"{document_provider.name} documents", stream=console)
+                stats, pacing = generate_at_rate(
+                    document_provider, output_sink, rate, duration, quantity, progress, pipeline_depth
+                )
 
-    # Generate documents up to desired quantity
-    for i in range(quantity):
-        document = document_provider.generate()
+    else:
+        # Plan the run in chunks, or pick up the chunks of the interrupted run being resumed
+        from generate_http import redact_url
 
-        try:
-            # Save the generated document as JSON in the specified output folder
-            file_name = f"{document_provider.name}_{i}.json"
-            file_path = os.path.join(provider_output_path, file_name)
-            with open(file_path, "w") as fp:
-                json.dump(document, fp)
+        alignment = chunk_alignment(provider, provider_options, output_format, sink_options)
+        parameters = {
+            "provider": provider,
+            "quantity": quantity,
+            "format": output_format,
+            "shard_size": shard_size,
+            "compress": compress,
+            "compress_level": compress_level,
+            "zstd_dictionary": zstd_dictionary,
+            "backend": backend,
+            "seed": seed,
+            "upload_url": redact_url(upload_url),
+        }
+        if pooled_paths:
+            # Only recorded for pooled runs, so manifests of runs without pools can still be resumed
+            parameters.update(pooled_paths=list(pooled_paths), pool_size=pool_size, pool_refresh=pool_refresh)
 
-            if i != 0:
-                # Clear previous line
-                print("\033[A\033[A")
+        # A shard only generates its slice of the run's indices (named and seeded by their index in the whole run)
+        start, stop = 0, quantity
+        if shard is not None:
+            start, stop = shard_range(quantity, shard, alignment)
+            parameters["shard"] = list(shard)
 
-            # Output status to the console
-            print(f"Generated {i + 1} {document_provider.name} documents...")
+        manifest = RunManifest.open(
+            os.path.join(provider_output_path, manifest_file_name(document_provider.name, shard)),
+            parameters,
+            plan_chunks(stop - start, workers, DOCUMENTS_PER_CHECKPOINT, alignment, start),
+            resume,
+        )
+        progress = ProgressReporter(
+            stop - start, f"{document_provider.name} documents", manifest.completed_quantity, stream=console
+        )
+        stats = {}
 
-        except Exception as e:
-            raise DataOutputError(
-                "Unable to output the generated documents to destination path"
-            ) from e
+        if workers > 1:
+            # Split the chunks across worker processes, checkpointing and reporting as each one completes
+            completed = generate_documents_in_parallel(
+                provider,
+                provider_options,
+                provider_output_path,
+                output_format,
+                sink_options,
+                manifest.pending,
+                workers,
+                pipeline_depth,
+            )
+            for (start, stop), chunk_stats in completed:
+                manifest.complete((start, stop))
+                stats = merge_stats(stats, chunk_stats)
+                progress.advance(stop - start, chunk_stats["write"]["bytes"])
+
+        else:
+            # Generate documents up to desired quantity, a chunk at a time, saving them in the specified output folder
+            with cprofile(profile_output):
+                for start, stop in manifest.pending:
+                    with open_output_sink(
+                        output_format, provider_output_path, document_provider.name, sink_options
+                    ) as output_sink:
+                        chunk_stats = write_documents(document_provider, output_sink, start, stop, progress, pipeline_depth)
+                        stats = merge_stats(stats, chunk_stats)
+
+                    # Checkpoint the chunk once its output has been closed
+                    manifest.complete((start, stop))
+
+        # A shard's manifest is kept, to merge with the other shards' (see merge-manifest)
+        if shard is None:
+            manifest.remove()
+
+    # Output a summary to the console
+    fields = field_profiler.report() if field_profiler is not None else None
+    with redirect_stdout(console):
+        progress.finish()
+        if paced:
+            print_pacing(pacing)
+        print_stage_stats(stats, "documents")
+
+        if fields is not None:
+            print_field_profile(fields)
+    console.flush()
+
+    if metrics_file:
+        write_metrics(metrics_file, "document", provider, workers, progress, stats, fields, pacing)
 
 
 @cli.command(name="journey")
@@ -100,7 +624,118 @@ def generate_document(output_path, provider, quantity):
 @click.option(
     "-q", "--quantity", type=click.INT, default=1, help="Number of journeys to create"
 )
-def generate_journey(output_path, provider, quantity):
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes to generate journeys with",
+)
+@click.option(
+    "--shard",
+    default=None,
+    callback=parse_shard_option,
+    help="Only generate shard K/N (from 0/N to N-1/N) of the journeys, i.e. one node's slice of a run across N nodes",
+)
+@click.option(
+    "--staging",
+    type=click.Choice(["disk", "memory"]),
+    default="disk",
+    help="Where to assemble each journey's step documents before they are zipped",
+)
+@click.option(
+    "--zip-compression",
+    type=click.Choice(zip_compression_mapping.keys()),
+    default="stored",
+    help="Compression method for the journey zips",
+)
+@click.option(
+    "--zip-level",
+    type=click.INT,
+    default=None,
+    help="Compression level for the journey zips (0-9 for deflated, 1-9 for bzip2)",
+)
+@click.option(
+    "--bundle-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Pack this many journeys (with their metadata) into each zip, rather than one zip per journey",
+)
+@click.option(
+    "--zip-threads",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Number of threads (per worker) to write zips on, overlapping compression with generation",
+)
+@click.option(
+    "-s",
+    "--seed",
+    type=click.INT,
+    default=None,
+    help="Seed to generate reproducible journeys from",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted run with the same options, skipping the chunks it completed",
+)
+@click.option(
+    "--upload-url",
+    default=None,
+    help="URL (i.e. a blob container URL with a SAS token) to upload published journeys to, instead of the output path",
+)
+@click.option(
+    "--upload-concurrency",
+    type=click.IntRange(min=1),
+    default=32,
+    help="Maximum number of uploads in flight at once (per worker)",
+)
+@click.option(
+    "--index",
+    "index_journeys",
+    is_flag=True,
+    default=False,
+    help="Catalogue the published journeys in an SQLite index in the output path, to query with: journeys query",
+)
+@click.option(
+    "--delta-steps",
+    is_flag=True,
+    default=False,
+    help="Store steps that modify an earlier step's document as a JSON Patch against it",
+)
+@click.option(
+    "--pipeline-depth",
+    type=click.IntRange(min=0),
+    default=PIPELINE_QUEUE_SIZE,
+    help="Journeys queued between the create and publish stages (0 runs them in one thread)",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write the run's throughput and per-stage timings to as JSON",
+)
+def generate_journey(
+    output_path,
+    provider,
+    quantity,
+    workers,
+    shard,
+    staging,
+    zip_compression,
+    zip_level,
+    bundle_size,
+    zip_threads,
+    seed,
+    resume,
+    upload_url,
+    upload_concurrency,
+    index_journeys,
+    delta_steps,
+    pipeline_depth,
+    metrics_file,
+):
     """Generates documents in a pattern to simulate a user journey
 
     Generated data files are saved to the path specified in --output_path (if unspecified this defaults to ./output/journeys)
@@ -108,37 +743,414 @@ def generate_journey(output_path, provider, quantity):
     The --provider option is used to specify the name of the user journey template to use
     that describes the pattern of documents to generate
 
+    The --workers option splits the quantity across a pool of processes, each staging its step documents
+    in its own scratch directory within the output path
+
+    The --staging option set to memory keeps each journey's step documents in memory and writes them straight
+    into its zip, rather than writing them to a staging directory first
+
+    The --zip-compression and --zip-level options compress the journey zips (which are stored uncompressed by
+    default), and the --zip-threads option writes them on a pool of threads so compression overlaps with generating
+    the next journeys. The --bundle-size option packs that many journeys, with their metadata files, into each zip
+
+    The --seed option makes the run reproducible: each journey (including its user id) is generated from a seed
+    derived from the run's seed and its index, so journey i is the same whatever the --workers count
+
+    Journeys are published a chunk at a time and progress is checkpointed to a run manifest as each chunk
+    completes; if the run is interrupted, the --resume option picks it up from the manifest, only generating the
+    chunks that hadn't completed (removing any of their journeys it had already published). The staging directory
+    left behind by an interrupted run of the same provider (and shard) is removed on startup
+
+    The --shard K/N option publishes only the Kth of N contiguous slices of the run's --quantity journeys (counting
+    from 0/N, aligned to bundles), so N nodes given the same options (and --seed) can each publish their own slice
+    without coordinating, and each shard keeps its manifest once it completes, to combine with merge-manifest
+
+    The --upload-url option uploads each published zip over HTTP as soon as it's written, rather than moving it
+    into the output path, and each chunk's metadata files once all of its zips have been uploaded
+
+    The --index option adds every journey (its user id, name, archive, step count and duration) and its steps
+    (file names, document types and delays) to an SQLite index, journeys.sqlite in the output path, a chunk at a
+    time, so subsets of the journeys can be selected with the journeys query command
+
+    The --delta-steps option stores each step that modifies an earlier step's document (i.e. an account a login
+    was added to) as a JSON Patch against that step, recorded as its baseStep in the metadata, rather than the
+    whole document again. Replaying the journeys rebuilds the full documents
+
+    Journeys are published on their own thread while the next ones are created, with at most --pipeline-depth
+    journeys queued in between. The throughput of each stage is reported once the run completes, and written with
+    the run's totals to --metrics-file as JSON
+
     For example:
 
     python generate.py journey --output_path ./output/journeys --provider starfleet
     """
-    # Generate documents up to desired quantity
-    for i in range(quantity):
+    if zip_level is not None:
+        levels = zip_compression_levels[zip_compression]
+        if levels is None:
+            raise click.BadParameter(f"{zip_compression} zips don't take a compression level", param_hint="--zip-level")
+        if zip_level not in levels:
+            raise click.BadParameter(
+                f"{zip_compression} zips take a compression level from {levels[0]} to {levels[-1]}", param_hint="--zip-level"
+            )
+
+    journey_options = {
+        "provider_name": provider,
+        "output_path": output_path,
+        "in_memory": staging == "memory",
+        "seed": seed,
+        "zip_compression": zip_compression,
+        "zip_level": zip_level,
+        "bundle_size": bundle_size,
+        "zip_threads": zip_threads,
+        "upload_url": upload_url,
+        "upload_concurrency": upload_concurrency,
+        "pipeline_depth": pipeline_depth,
+        "delta_steps": delta_steps,
+        # Chunks are staged in a directory of the run's own, so runs sharing the output path (i.e. other shards)
+        # never touch each other's staging
+        "staging_root": journey_staging_root(output_path, provider, shard),
+    }
+
+    # Plan the run in chunks, or pick up the chunks of the interrupted run being resumed
+    from generate_http import redact_url
+
+    parameters = {
+        "provider": provider,
+        "quantity": quantity,
+        "seed": seed,
+        "zip_compression": zip_compression,
+        "zip_level": zip_level,
+        "bundle_size": bundle_size,
+        "upload_url": redact_url(upload_url),
+    }
+    if delta_steps:
+        # Only recorded for delta encoded runs, so manifests of runs without them can still be resumed
+        parameters["delta_steps"] = delta_steps
+
+    # A shard only generates its slice of the run's indices, aligned to bundles like the chunks
+    start, stop = 0, quantity
+    if shard is not None:
+        start, stop = shard_range(quantity, shard, bundle_size or 1)
+        parameters["shard"] = list(shard)
+
+    manifest = RunManifest.open(
+        os.path.join(output_path, manifest_file_name(provider, shard)),
+        parameters,
+        # Chunks are aligned to bundles, so no two workers ever write to the same bundle
+        plan_chunks(stop - start, workers, JOURNEYS_PER_CHECKPOINT, bundle_size or 1, start),
+        resume,
+    )
+
+    # Remove the journeys an interrupted run published for chunks it didn't checkpoint, which are generated again,
+    # then the half-written journeys of any interrupted run of the same provider (and shard)
+    if resume:
+        roll_back_published_chunks(journey_options["staging_root"], output_path, manifest.pending)
+    clean_journey_staging(journey_options["staging_root"])
+
+    progress = ProgressReporter(stop - start, f"{provider} journeys", manifest.completed_quantity)
+    stats = {}
+
+    journey_index = None
+    if index_journeys:
+        from journey_providers.journey_index import JOURNEY_INDEX_FILE_NAME, JourneyIndex
+
+        journey_index = JourneyIndex(os.path.join(output_path, JOURNEY_INDEX_FILE_NAME))
+
+    if workers > 1:
+        # Split the chunks across worker processes, counting each chunk's journeys as it completes
+        completed = generate_journeys_in_parallel(journey_options, manifest.pending, workers)
+    else:
+        # Count each journey as it's created
+        completed = (
+            generate_journey_chunk((start, stop, journey_options), progress) for start, stop in manifest.pending
+        )
+
+    # Index and checkpoint each chunk as it's published
+    for (start, stop), chunk_stats, published in completed:
+        if journey_index is not None:
+            journey_index.add_journeys(published)
+
+        manifest.complete((start, stop))
+        stats = merge_stats(stats, chunk_stats)
+
+        if workers > 1:
+            progress.advance(stop - start, chunk_stats["zip"]["bytes"])
+        else:
+            progress.add_bytes(chunk_stats["zip"]["bytes"])
+
+    # A shard's manifest is kept, to merge with the other shards' (see merge-manifest)
+    if shard is None:
+        manifest.remove()
+    clean_journey_staging(journey_options["staging_root"])
+    if journey_index is not None:
+        journey_index.close()
+
+    # Output a summary to the console
+    progress.finish()
+    print_stage_stats(stats, "journeys")
+
+    if metrics_file:
+        write_metrics(metrics_file, "journey", provider, workers, progress, stats)
+
+
+@cli.group(name="journeys")
+def journeys():
+    """Works with published journeys"""
+    pass
+
+
+@journeys.command(name="query")
+@click.option(
+    "-i",
+    "--index",
+    "index_path",
+    default="./output/journeys/journeys.sqlite",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Journey index to query (written by the journey command with --index)",
+)
+@click.option("-p", "--provider", default=None, help="Only journeys of this journey provider")
+@click.option("-u", "--user-id", default=None, help="Only the journey of this user id")
+@click.option("--min-steps", type=click.IntRange(min=0), default=None, help="Only journeys with at least this many steps")
+@click.option("--max-steps", type=click.IntRange(min=0), default=None, help="Only journeys with at most this many steps")
+@click.option(
+    "--min-duration", type=click.IntRange(min=0), default=None, help="Only journeys whose last step is at least this many seconds in"
+)
+@click.option(
+    "--max-duration", type=click.IntRange(min=0), default=None, help="Only journeys whose last step is at most this many seconds in"
+)
+@click.option("-d", "--document-type", default=None, help="Only journeys with a step of this document type")
+@click.option(
+    "--min-delay", type=click.IntRange(min=0), default=None, help="Only journeys with a step (of --document-type) at least this many seconds in"
+)
+@click.option(
+    "--max-delay", type=click.IntRange(min=0), default=None, help="Only journeys with a step (of --document-type) at most this many seconds in"
+)
+@click.option("-l", "--limit", type=click.IntRange(min=1), default=None, help="Maximum number of journeys to output")
+@click.option("-c", "--count", is_flag=True, default=False, help="Output the number of matching journeys, rather than the journeys")
+def query_journeys(
+    index_path,
+    provider,
+    user_id,
+    min_steps,
+    max_steps,
+    min_duration,
+    max_duration,
+    document_type,
+    min_delay,
+    max_delay,
+    limit,
+    count,
+):
+    """Selects journeys from a journey index
+
+    Outputs each journey matching every filter given as a line of JSON, with its user id, journey name, the
+    archive (zip or bundle) and metadata file it was published to, its number of steps and its duration (the
+    delay of its last step, in seconds), in order of user id
+
+    For example, journeys with at least 8 steps and a starfleet_application step due within a day:
+
+    python generate.py journeys query --min-steps 8 --document-type starfleet_application --max-delay 86400
+    """
+    from journey_providers.journey_index import JourneyIndex
+
+    with JourneyIndex(index_path) as journey_index:
+        results = journey_index.query(
+            journey_name=provider,
+            user_id=user_id,
+            min_steps=min_steps,
+            max_steps=max_steps,
+            min_duration=min_duration,
+            max_duration=max_duration,
+            document_type=document_type,
+            min_delay=min_delay,
+            max_delay=max_delay,
+            limit=limit,
+            count=count,
+        )
+
+    if count:
+        click.echo(results)
+        return
+
+    stdout = click.get_binary_stream("stdout")
+    for journey in results:
+        stdout.write(dumps(journey) + b"\n")
+
+
+@cli.command(name="merge-manifest")
+@click.argument("manifest_paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-o",
+    "--output",
+    "output_file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to save the merged run manifest to (defaults to the run's manifest alongside the shards')",
+)
+def merge_manifest(manifest_paths, output_file):
+    """Combines the shard manifests of a sharded run into one run manifest
+
+    Each shard of a run generated with --shard K/N keeps its manifest once it completes. Given the manifests of
+    every shard (or the directories they were collected into), this checks they are the shards of one run and
+    saves a single manifest for it, with the chunks every shard completed, alongside them (or to --output)
+
+    Running the document or journey command again with the same options, without --shard but with --resume,
+    then only generates the chunks none of the shards completed (i.e. those of a node that failed)
+
+    For example:
+
+    python generate.py merge-manifest ./output/documents/starfleet_application
+    """
+    # Load the manifests, finding those of every shard in the directories given
+    paths = []
+    for path in manifest_paths:
+        if os.path.isdir(path):
+            paths.extend(sorted(glob.glob(os.path.join(path, SHARD_MANIFEST_PATTERN))))
+        else:
+            paths.append(path)
+    manifests = [RunManifest.load(path) for path in paths]
+
+    if output_file is None and manifests:
+        provider = manifests[0].parameters["provider"]
+        output_file = os.path.join(os.path.dirname(manifests[0].path), manifest_file_name(provider))
+
+    try:
+        merged = RunManifest.merge(output_file, manifests)
+    except DataGenerationError as e:
+        raise click.ClickException(str(e))
+
+    # Output a summary to the console
+    pending = merged.pending
+    print(
+        f"Merged {len(manifests)} shard manifests into {output_file}: {merged.completed_quantity:,} of "
+        f"{merged.quantity:,} completed, {len(pending)} chunks pending"
+    )
+
+
+@cli.command(name="replay")
+@click.option(
+    "-i",
+    "--input_path",
+    default="./output/journeys/",
+    type=click.Path(exists=True, file_okay=False),
+    help="Path the journeys to replay were published to",
+)
+@click.option(
+    "-s",
+    "--sink",
+    type=click.Choice(replay_sink_mapping.keys()),
+    default="directory",
+    help="Where to publish the replayed step documents",
+)
+@click.option(
+    "-t",
+    "--target",
+    default="./output/replay",
+    help="Directory (for the directory sink) or base URL (for the http sink) to publish step documents to",
+)
+@click.option(
+    "--speedup",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    help="Factor to speed up the journeys' delays by (0 replays as fast as possible)",
+)
+@click.option(
+    "--ramp-up",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="Seconds over which to spread the start of the journeys",
+)
+@click.option(
+    "-c",
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=100,
+    help="Maximum number of step documents to publish at once",
+)
+def replay(input_path, sink, target, speedup, ramp_up, concurrency):
+    """Replays published journeys, publishing their step documents when they're due
+
+    Reads the metadata and zip of every journey in --input_path and merges all of their steps into one timeline,
+    publishing each step document to the --sink at its delay after its journey started
+
+    The --speedup option divides every delay by a factor (i.e. --speedup 60 replays an hour of journeys in a
+    minute), and the --ramp-up option spreads the start of the journeys over a number of seconds rather than
+    starting them all at once
+
+    For example:
+
+    python generate.py replay --input_path ./output/journeys --sink http --target http://localhost:8080/documents
+    """
+    from generate_replay import replay_journeys
+
+    replay_sink = select_replay_sink(sink, target, concurrency=concurrency)
+    stats = replay_journeys(input_path, replay_sink, speedup, ramp_up)
+
+    # Output a summary to the console
+    print(
+        f"Replayed {stats['steps']} steps from {stats['journeys']} journeys in {stats['seconds']:.1f} seconds "
+        f"(at most {stats['max_lag']:.3f} seconds behind schedule)"
+    )
+
+
+@cli.command(name="bench")
+@click.option(
+    "-q", "--quantity", type=click.IntRange(min=1), default=2000, help="Number of documents to time per provider"
+)
+@click.option(
+    "-j", "--journeys", type=click.IntRange(min=1), default=200, help="Number of journeys to time per provider"
+)
+@click.option(
+    "-r",
+    "--results_file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write the benchmark results to as JSON",
+)
+def benchmark(quantity, journeys, results_file):
+    """Benchmarks generation and output throughput
+
+    Measures CLI startup time (against a target), documents/sec for each document provider (with each available
+    backend), journeys/sec for each journey provider (staged on disk and in memory) and write throughput for each
+    output format (and compression ratio for each compression)
+
+    The --results_file option writes the results as JSON, so they can be compared between versions
+
+    For example:
+
+    python generate.py bench --quantity 5000 --results_file ./output/bench.json
+    """
+    from benchmarks.suite import run_benchmarks
+
+    results = run_benchmarks(quantity, journeys, quantity)
 
-        # Get provider type from journey_provider type map
-        journey_provider = select_journey_provider(provider, output_path)
+    # Output a summary to the console
+    startup = results["startup"]
+    print(
+        f"CLI startup: {startup['seconds'] * 1000:,.0f} ms (target {startup['target_seconds'] * 1000:,.0f} ms, "
+        f"interpreter alone {startup['interpreter_seconds'] * 1000:,.0f} ms)"
+    )
 
-        # Construct the journey & output document files
-        try:
-            journey_provider.create_journey()
-        except Exception as e:
-            raise DataGenerationError("Unable to create user journey") from e
+    for provider_name, backends in results["document_providers"].items():
+        for backend, timing in backends.items():
+            print(f"{provider_name} documents ({backend}): {timing['per_second']:,.0f}/sec")
 
-        # Finalise and export metadata for the journey
-        try:
-            journey_provider.publish_journey(output_path)
+    for provider_name, staging_modes in results["journey_providers"].items():
+        for staging, timing in staging_modes.items():
+            print(f"{provider_name} journeys ({staging} staging): {timing['per_second']:,.0f}/sec")
 
-            if i != 0:
-                # Clear previous line
-                print("\033[A\033[A")
+    for format_name, timing in results["output_formats"].items():
+        print(f"{format_name} output: {timing['per_second']:,.0f} documents/sec, {timing['megabytes_per_second']} MB/sec")
 
-            # Output status to the console
-            print(f"Generated {i + 1} {journey_provider.name} journeys...")
+    for compression_name, timing in results["compression"].items():
+        print(
+            f"jsonl output ({compression_name}): {timing['per_second']:,.0f} documents/sec, "
+            f"{timing['megabytes_per_second']} MB/sec, {timing['ratio']}x smaller"
+        )
 
-        except Exception as e:
-            raise DataOutputError(
-                "Unable to output the generated documents to destination path"
-            ) from e
+    if results_file:
+        with open(results_file, "wb") as fp:
+            fp.write(dumps(results))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+import asyncio
+import concurrent.futures
+import random
+import threading
+from urllib.parse import quote, urlsplit, urlunsplit
+
+from generate_errors import DataOutputError
+
+
+def redact_url(url):
+    """
+    Returns url without its query, so that secrets in it (i.e. SAS tokens) aren't recorded
+    """
+    return urlsplit(url)._replace(query="").geturl() if url else url
+
+
+class HttpResponse:
+    """
+    The status, headers (with lower case names) and body of a response
+    """
+
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class AsyncHttpClient:
+    """
+    A minimal HTTP/1.1 client built on asyncio streams, so one event loop can keep many requests in flight
+
+    Connections are kept alive and pooled per host, with at most max_connections open (and so at most that many
+    requests in flight) at once; further requests wait for a connection to be released
+    """
+
+    def __init__(self, max_connections: int = 100, timeout: float = 30):
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        # Idle keep-alive connections by (scheme, host, port)
+        self.idle_connections = {}
+        self.connection_slots = None
+
+    async def request(self, method: str, url: str, body: bytes = b"", headers: dict = None) -> HttpResponse:
+        """
+        Sends a request, returning its response once the whole body has been read
+        """
+        if self.connection_slots is None:
+            # Created on first use, so it belongs to the running event loop
+            self.connection_slots = asyncio.Semaphore(self.max_connections)
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise DataOutputError(f"Unsupported URL scheme for HTTP output: {url}")
+
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        request_headers = {
+            "Host": parts.netloc,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive",
+        }
+        request_headers.update(headers or {})
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in request_headers.items())
+        message = head.encode("latin-1") + b"\r\n" + body
+
+        async with self.connection_slots:
+            idle = self.idle_connections.setdefault(key, [])
+
+            # A pooled connection may have been closed by the server while idle, in which case the request is
+            # sent again on a new connection
+            while idle:
+                reader, writer = idle.pop()
+                try:
+                    return await asyncio.wait_for(self.exchange(key, reader, writer, message), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                except BaseException:
+                    writer.close()
+                    raise
+
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(key[1], key[2], ssl=key[0] == "https"), self.timeout
+            )
+            try:
+                return await asyncio.wait_for(self.exchange(key, reader, writer, message), self.timeout)
+            except BaseException:
+                writer.close()
+                raise
+
+    async def exchange(self, key: tuple, reader, writer, message: bytes) -> HttpResponse:
+        """
+        Writes a request message to a connection and reads its response, returning the connection to the pool
+        if it can be reused
+        """
+        writer.write(message)
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    # Skip any trailers, up to the blank line ending the response
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append((await reader.readexactly(size + 2))[:-2])
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self.idle_connections[key].append((reader, writer))
+
+        return HttpResponse(status, headers, body)
+
+    async def close(self):
+        """
+        Closes every pooled connection
+        """
+        for connections in self.idle_connections.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle_connections = {}
+
+
+class HttpUploader:
+    """
+    Uploads blobs with PUT requests from synchronous code, while it carries on generating
+
+    Requests are sent by an AsyncHttpClient on an event loop in a background thread. At most max_in_flight uploads
+    are in flight at once; upload blocks once there are, so generation can't run ahead of the uploads. Requests that
+    fail with a connection error, timeout, 408, 429 or 5xx status are retried up to retries times, with exponential
+    backoff (and jitter, so workers don't retry in lockstep)
+    """
+
+    # Statuses worth retrying, as the server may accept the request later
+    retry_statuses = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: str, max_in_flight: int = 32, retries: int = 5, backoff: float = 0.5):
+        self.base_url = urlsplit(base_url)
+        self.retries = retries
+        self.backoff = backoff
+        self.random = random.Random()
+
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.pending = set()
+        self.error = None
+
+        # Counts of successful uploads and retried requests, for reporting
+        self.uploaded = 0
+        self.retried = 0
+
+        self.client = AsyncHttpClient(max_in_flight)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, name: str) -> str:
+        """
+        Returns the URL of the blob name within the base URL, keeping the base URL's query (i.e. a SAS token)
+        """
+        path = self.base_url.path.rstrip("/") + "/" + quote(name)
+        return urlunsplit((self.base_url.scheme, self.base_url.netloc, path, self.base_url.query, ""))
+
+    def upload(self, name: str, data: bytes, content_type: str = "application/octet-stream"):
+        """
+        Starts uploading data as the blob name, blocking while the maximum number of uploads are in flight
+        """
+        self.raise_error()
+        self.in_flight.acquire()
+
+        future = asyncio.run_coroutine_threadsafe(self.put(name, data, content_type), self.loop)
+        self.pending.add(future)
+        future.add_done_callback(self.finished)
+
+    def finished(self, future):
+        self.pending.discard(future)
+        self.in_flight.release()
+
+        if future.exception() is not None and self.error is None:
+            self.error = future.exception()
+
+    async def put(self, name: str, data: bytes, content_type: str):
+        url = self.url(name)
+        headers = {"Content-Type": content_type, "x-ms-blob-type": "BlockBlob"}
+
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt * self.random.uniform(0.5, 1.5)
+
+            try:
+                response = await self.client.request("PUT", url, data, headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                error = DataOutputError(f"Uploading {name} failed: {e!r}")
+            else:
+                if response.ok:
+                    self.uploaded += 1
+                    return
+
+                error = DataOutputError(f"Uploading {name} failed with HTTP status {response.status}")
+                if response.status not in self.retry_statuses:
+                    raise error
+
+                # Wait at least as long as the server asks to
+                retry_after = response.headers.get("retry-after", "")
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+
+            if attempt == self.retries:
+                raise error
+
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    def raise_error(self):
+        if self.error is not None:
+            raise DataOutputError("Unable to upload the generated data") from self.error
+
+    def flush(self):
+        """
+        Waits for every upload in flight to complete, raising an error if any of them failed
+        """
+        concurrent.futures.wait(list(self.pending))
+        self.raise_error()
+
+    def close(self):
+        """
+        Waits for the uploads in flight, then closes the client's connections and stops the event loop
+        """
+        try:
+            self.flush()
+        finally:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,167 @@
+import json
+import os
+
+from generate_errors import DataGenerationError, DataOutputError
+from generate_serializer import dumps
+
+
+# Pattern the file names of shards' manifests match
+SHARD_MANIFEST_PATTERN = ".*.shard-*-of-*.manifest.json"
+
+
+def manifest_file_name(provider: str, shard: tuple = None) -> str:
+    """
+    Returns the file name of the manifest of a run of the provider, or of shard (K, N) of it
+    """
+    if shard is None:
+        return f".{provider}.manifest.json"
+
+    return f".{provider}.shard-{shard[0]}-of-{shard[1]}.manifest.json"
+
+
+class RunManifest:
+    """
+    Checkpoints the progress of a bulk generation run, so an interrupted run can be resumed rather than restarted
+
+    The run is planned as a list of (start, stop) chunks of indices. Once every document or journey in a chunk has
+    been written, the chunk is recorded as completed and the manifest is saved, so resuming only regenerates the
+    chunks that hadn't completed. The manifest is removed once the whole run has completed
+    """
+
+    def __init__(self, path: str, parameters: dict, chunks: list, completed=()):
+        self.path = path
+        self.parameters = parameters
+        self.chunks = [tuple(chunk) for chunk in chunks]
+        self.completed = set(completed)
+
+    @classmethod
+    def open(cls, path: str, parameters: dict, chunks: list, resume=False):
+        """
+        Returns the manifest for a run, planned as chunks
+
+        With resume, an existing manifest at path is loaded instead (keeping its chunks and those already
+        completed), as long as it was created by a run with the same parameters
+        """
+        if resume and os.path.exists(path):
+            saved = cls.load(path)
+            if saved.parameters != parameters:
+                raise DataGenerationError(
+                    f"Unable to resume the run: the run manifest at {path} was created with different options"
+                )
+
+            return saved
+
+        manifest = cls(path, parameters, chunks)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, path: str) -> "RunManifest":
+        """
+        Returns the manifest saved at path
+        """
+        try:
+            with open(path, "rb") as fp:
+                saved = json.load(fp)
+        except Exception as e:
+            raise DataGenerationError(f"Unable to read the run manifest at {path}") from e
+
+        return cls(path, saved["parameters"], saved["chunks"], saved["completed"])
+
+    @classmethod
+    def merge(cls, path: str, manifests: list) -> "RunManifest":
+        """
+        Combines the manifests of every shard of a sharded run into the manifest of the whole run, saved at path
+
+        The merged manifest has the parameters of the run without the shard, so running it again without --shard
+        but with --resume (i.e. after a node failed) only generates the chunks none of the shards completed
+        """
+        if not manifests:
+            raise DataGenerationError("Unable to merge the run manifests: there are none to merge")
+
+        shards = {}
+        for manifest in manifests:
+            if "shard" not in manifest.parameters:
+                raise DataGenerationError(f"Unable to merge the run manifests: {manifest.path} isn't a shard's manifest")
+
+            index, count = manifest.parameters["shard"]
+            if index in shards:
+                raise DataGenerationError(
+                    f"Unable to merge the run manifests: {shards[index].path} and {manifest.path} are both shard {index}"
+                )
+            shards[index] = manifest
+
+        parameters = dict(manifests[0].parameters)
+        count = parameters.pop("shard")[1]
+        for manifest in manifests:
+            shard_parameters = dict(manifest.parameters)
+            if shard_parameters.pop("shard")[1] != count or shard_parameters != parameters:
+                raise DataGenerationError(
+                    f"Unable to merge the run manifests: {manifest.path} was created with different options"
+                )
+
+        missing = [str(index) for index in range(count) if index not in shards]
+        if missing:
+            raise DataGenerationError(
+                f"Unable to merge the run manifests: missing the manifests of shards {', '.join(missing)} (of {count})"
+            )
+
+        # Chunks are numbered across the shards in order, as the shards' ranges are
+        chunks = []
+        completed = []
+        for index in range(count):
+            manifest = shards[index]
+            completed.extend(len(chunks) + chunk_index for chunk_index in manifest.completed)
+            chunks.extend(manifest.chunks)
+
+        merged = cls(path, parameters, chunks, completed)
+        merged.save()
+        return merged
+
+    @property
+    def quantity(self) -> int:
+        return sum(stop - start for start, stop in self.chunks)
+
+    @property
+    def pending(self) -> list:
+        """
+        The chunks that haven't completed yet, in order
+        """
+        return [chunk for index, chunk in enumerate(self.chunks) if index not in self.completed]
+
+    @property
+    def completed_quantity(self) -> int:
+        return sum(stop - start for index, (start, stop) in enumerate(self.chunks) if index in self.completed)
+
+    def complete(self, chunk: tuple):
+        """
+        Records that every index in chunk has been written
+        """
+        self.completed.add(self.chunks.index(tuple(chunk)))
+        self.save()
+
+    def save(self):
+        """
+        Writes the manifest to a temporary file and then moves it into place, so it's never left half-written
+        """
+        manifest = {
+            "parameters": self.parameters,
+            "chunks": self.chunks,
+            "completed": sorted(self.completed),
+        }
+        temporary_path = self.path + ".tmp"
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temporary_path, "wb") as fp:
+                fp.write(dumps(manifest))
+            os.replace(temporary_path, self.path)
+        except Exception as e:
+            raise DataOutputError(f"Unable to save the run manifest to {self.path}") from e
+
+    def remove(self):
+        """
+        Removes the manifest, once the run has completed
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
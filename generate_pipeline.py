@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+
+
+# Number of batches each queue between stages holds before the stage feeding it blocks, bounding memory use
+PIPELINE_QUEUE_SIZE = 8
+
+# Number of items passed between stages at once, so queue overhead is paid per batch rather than per item
+PIPELINE_BATCH_SIZE = 100
+
+
+class PipelineStage(threading.Thread):
+    """
+    A stage of a pipeline, running in its own thread: takes batches of items from its input queue, processes each
+    item and puts the batch of results on its output queue (if it has one)
+
+    Once a stage fails, it keeps draining its input (discarding it) so the stages feeding it never block forever
+    """
+
+    def __init__(self, name: str, process, input_queue: queue.Queue, output_queue: queue.Queue = None):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.stage_name = name
+        self.process = process
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.error = None
+
+        # Throughput counters: items processed, and the time spent processing them and blocked on the next stage
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def process_batch(self, batch: list) -> list:
+        """
+        Processes a batch of items, returning the batch of results
+        """
+        started = time.perf_counter()
+        process = self.process
+        results = [process(item) for item in batch]
+
+        self.busy_seconds += time.perf_counter() - started
+        self.items += len(batch)
+        return results
+
+    def run(self):
+        while True:
+            batch = self.input_queue.get()
+            if batch is None:
+                break
+            if self.error is not None:
+                continue
+
+            try:
+                results = self.process_batch(batch)
+            except Exception as e:
+                self.error = e
+                continue
+
+            if self.output_queue is not None:
+                blocked = time.perf_counter()
+                self.output_queue.put(results)
+                self.blocked_seconds += time.perf_counter() - blocked
+
+        # Pass the end of the items on to the next stage
+        if self.output_queue is not None:
+            self.output_queue.put(None)
+
+    def stats(self) -> dict:
+        return stage_stats(self.items, self.busy_seconds, self.blocked_seconds)
+
+
+def stage_stats(items: int, busy_seconds: float, blocked_seconds: float) -> dict:
+    return {
+        "items": items,
+        "busy_seconds": round(busy_seconds, 6),
+        "blocked_seconds": round(blocked_seconds, 6),
+        "per_second": round(items / busy_seconds, 2) if busy_seconds else None,
+    }
+
+
+class Pipeline:
+    """
+    Overlaps producing items (i.e. generating documents) with the stages that consume them (i.e. serializing and
+    writing them), by running each stage in its own thread connected by bounded queues
+
+    The producer puts items into the pipeline from the calling thread; each stage is a function of an item, whose
+    result is passed on to the next stage. Once a queue is full, the stage feeding it blocks until the next stage
+    catches up, so memory use stays bounded however far the producer could run ahead. Stage errors are raised from
+    put or close
+
+    With a queue_size of 0, the stages run inline in the producer's thread instead, a batch at a time; on a single
+    CPU there is nothing for the threads to overlap with but I/O, so this avoids them contending for the GIL
+    """
+
+    def __init__(
+        self,
+        stages: list,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        producer_name: str = "generate",
+    ):
+        self.producer_name = producer_name
+        self.batch_size = batch_size
+        self.batch = []
+
+        self.threaded = queue_size > 0
+
+        # Connect each (name, process) stage to the next with a queue
+        queues = [queue.Queue(queue_size) for _ in stages]
+        self.input_queue = queues[0]
+        self.stages = [
+            PipelineStage(name, process, queues[index], queues[index + 1] if index + 1 < len(stages) else None)
+            for index, (name, process) in enumerate(stages)
+        ]
+        if self.threaded:
+            for stage in self.stages:
+                stage.start()
+
+        # Throughput counters for the producer
+        self.produced = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self.blocked_seconds = 0.0
+
+    def put(self, item):
+        """
+        Passes an item into the pipeline, blocking while its first queue is full
+        """
+        self.batch.append(item)
+        if len(self.batch) >= self.batch_size:
+            self.put_batch()
+
+    def put_batch(self):
+        self.raise_error()
+
+        if not self.threaded:
+            batch = self.batch
+            for stage in self.stages:
+                batch = stage.process_batch(batch)
+
+            self.produced += len(self.batch)
+            self.batch = []
+            return
+
+        blocked = time.perf_counter()
+        self.input_queue.put(self.batch)
+        self.blocked_seconds += time.perf_counter() - blocked
+
+        self.produced += len(self.batch)
+        self.batch = []
+
+    def flush(self):
+        """
+        Passes the items put so far on to the stages without waiting for a full batch (i.e. so paced items aren't
+        held back)
+        """
+        if self.batch:
+            self.put_batch()
+
+    def raise_error(self):
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def close(self):
+        """
+        Waits for every item put into the pipeline to pass through all of its stages
+        """
+        if self.finished is not None:
+            return
+        self.finished = time.perf_counter()
+
+        try:
+            if self.batch:
+                self.put_batch()
+        finally:
+            # Stop the stages once they've processed everything before the end of the items
+            if self.threaded:
+                self.input_queue.put(None)
+                for stage in self.stages:
+                    stage.join()
+
+        self.raise_error()
+
+    def stats(self) -> dict:
+        """
+        Returns the throughput counters of the producer and each stage
+        """
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        producer_seconds = finished - self.started - self.blocked_seconds
+        if not self.threaded:
+            # The stages' time was spent in the producer's thread
+            producer_seconds -= sum(stage.busy_seconds for stage in self.stages)
+
+        stats = {self.producer_name: stage_stats(self.produced, producer_seconds, self.blocked_seconds)}
+        for stage in self.stages:
+            stats[stage.stage_name] = stage.stats()
+
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+            return
+
+        # Don't let a stage error hide the producer's
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def merge_stats(stats: dict, more_stats: dict) -> dict:
+    """
+    Adds up the throughput counters of pipelines (i.e. one per chunk of a run)
+    """
+    merged = dict(stats)
+    for name, counters in more_stats.items():
+        totals = merged.get(name, {})
+        merged[name] = {
+            counter: round(totals.get(counter, 0) + value, 6) for counter, value in counters.items() if counter != "per_second"
+        }
+        busy_seconds = merged[name]["busy_seconds"]
+        merged[name]["per_second"] = round(merged[name]["items"] / busy_seconds, 2) if busy_seconds else None
+
+    return merged
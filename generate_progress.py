@@ -0,0 +1,120 @@
+import sys
+import time
+
+
+def format_bytes(size: float) -> str:
+    """
+    Returns a size in bytes in human readable units (i.e. 12.3 MB)
+    """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1000:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} {unit}"
+        size /= 1000
+
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Returns a duration in seconds as hours, minutes and seconds (i.e. 1h 02m 03s)
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """
+    Reports the progress of a run of total items: items/sec, bytes written and the estimated time remaining
+
+    The progress line is redrawn in place at most updates_per_second times a second, however many items are
+    generated, and only when stream is a terminal (so logs don't fill up with progress lines); a summary line is
+    written once the run finishes either way. Items already generated (i.e. by the interrupted run being resumed)
+    count towards the total but not the rate. Open ended runs (i.e. paced to a rate until interrupted) have a total
+    of None, and no ETA
+    """
+
+    def __init__(self, total: int, unit: str, completed: int = 0, stream=None, updates_per_second: float = 4):
+        self.total = total
+        self.unit = unit
+        self.completed = completed
+        self.stream = stream if stream is not None else sys.stdout
+        self.interactive = self.stream.isatty()
+        self.interval = 1 / updates_per_second
+
+        # Counts for this run; bytes may be added from another thread (i.e. a pipeline's writer)
+        self.items = 0
+        self.bytes = 0
+
+        self.started = time.perf_counter()
+        self.next_update = self.started
+        self.finished = None
+
+    @property
+    def seconds(self) -> float:
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        return finished - self.started
+
+    @property
+    def per_second(self) -> float:
+        seconds = self.seconds
+        return self.items / seconds if seconds else 0.0
+
+    def advance(self, items: int = 1, written_bytes: int = 0):
+        """
+        Counts items as generated (and bytes as written), redrawing the progress line if it's due
+        """
+        self.items += items
+        self.bytes += written_bytes
+
+        if self.interactive:
+            now = time.perf_counter()
+            if now >= self.next_update:
+                self.next_update = now + self.interval
+                self.render()
+
+    def add_bytes(self, written_bytes: int):
+        self.bytes += written_bytes
+
+    def render(self):
+        generated = self.completed + self.items
+        per_second = self.per_second
+        of_total = f"/{self.total:,}" if self.total is not None else ""
+        line = f"Generated {generated:,}{of_total} {self.unit}, {per_second:,.0f}/sec, {format_bytes(self.bytes)}"
+
+        if per_second and self.total is not None:
+            line += f", ETA {format_duration((self.total - generated) / per_second)}"
+
+        self.stream.write(f"\r{line}\033[K")
+        self.stream.flush()
+
+    def finish(self):
+        """
+        Stops the clock and writes a summary of the run
+        """
+        self.finished = time.perf_counter()
+        if self.interactive:
+            # Move on from the progress line
+            self.stream.write("\r\033[K")
+
+        self.stream.write(
+            f"Generated {self.items:,} {self.unit} ({format_bytes(self.bytes)}) in {self.seconds:.1f} seconds, "
+            f"{self.per_second:,.0f}/sec\n"
+        )
+        self.stream.flush()
+
+    def metrics(self) -> dict:
+        """
+        Returns the run's totals, for the metrics file
+        """
+        return {
+            "items": self.items,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 6),
+            "per_second": round(self.per_second, 2),
+        }
@@ -0,0 +1,181 @@
+import sys
+import time
+from itertools import islice
+
+from generate_errors import DataOutputError
+from generate_pipeline import PIPELINE_QUEUE_SIZE, Pipeline, stage_stats
+from generate_workers import document_stages
+
+
+# Seconds' worth of documents generated at once when pacing, so generation is batched at high rates while the
+# output stays smooth (documents are emitted at least this often)
+PACING_INTERVAL = 0.01
+
+# Seconds' worth of documents the token bucket holds, so a pause (i.e. garbage collection) is caught up on
+# rather than lost, without bursting far ahead of the rate
+PACING_BURST = 0.05
+
+# Units rates may be given per, in seconds
+RATE_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_rate(rate: str) -> float:
+    """
+    Parses a rate given as N/s (or N/m, N/h, or just N per second) into items per second
+    """
+    count, _, unit = rate.strip().partition("/")
+    try:
+        per_second = float(count) / RATE_UNITS[unit.strip().lower() or "s"]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate {rate!r}, expected a number per second (i.e. 500/s) or per m or h")
+
+    if per_second <= 0:
+        raise ValueError(f"Invalid rate {rate!r}, it must be more than 0")
+
+    return per_second
+
+
+class TokenBucket:
+    """
+    Paces items to rate per second: tokens accrue at rate, up to capacity, and each item taken spends one,
+    waiting until enough have accrued
+
+    The bucket starts empty, so items are never sent ahead of the rate. Once generation falls behind, the bucket
+    fills up to capacity and the excess is lost, so the achieved rate falls short of the rate rather than
+    bursting to catch up later
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate * PACING_BURST)
+        self.tokens = 0.0
+        self.updated = time.perf_counter()
+
+        # Total seconds spent waiting for tokens
+        self.waited_seconds = 0.0
+
+    def take(self, count: int = 1, deadline: float = None) -> bool:
+        """
+        Waits until count tokens have accrued and spends them, returning False (without spending any) if they
+        wouldn't accrue before the deadline (a time.perf_counter() time)
+        """
+        count = min(count, self.capacity)
+        while True:
+            now = time.perf_counter()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= count:
+                self.tokens -= count
+                return True
+
+            wait = (count - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+
+            time.sleep(wait)
+            self.waited_seconds += time.perf_counter() - now
+
+
+def generate_at_rate(
+    document_provider,
+    output_sink,
+    rate: float = None,
+    duration: float = None,
+    quantity: int = None,
+    progress=None,
+    pipeline_depth: int = PIPELINE_QUEUE_SIZE,
+) -> tuple:
+    """
+    Generates documents continuously into the output sink, paced to rate documents per second by a token bucket
+    (or as fast as possible without a rate), until duration seconds have passed or quantity documents have been
+    generated (or until interrupted, with neither)
+
+    At high rates documents are generated PACING_INTERVAL seconds' worth at a time, and serialized and written
+    through a pipeline with queues of pipeline_depth batches, as write_documents does
+
+    Returns the pipeline's per-stage throughput counters, and the documents generated with the target and
+    achieved rates
+    """
+    written_bytes = 0
+
+    def add_written_bytes(size: int):
+        nonlocal written_bytes
+        written_bytes += size
+        if progress is not None:
+            progress.add_bytes(size)
+
+    def write_item(item: tuple):
+        try:
+            add_written_bytes(output_sink.write_item(*item))
+        except Exception as e:
+            raise DataOutputError("Unable to output the generated documents to the stream") from e
+
+    bucket = TokenBucket(rate) if rate else None
+    batch_size = max(1, int(rate * PACING_INTERVAL)) if rate else 100
+
+    # One iterator for the whole run, which each batch takes its documents from, so seeded columnar batches are
+    # generated once rather than for every (smaller) pacing batch that falls within them
+    documents = document_provider.iter_generate_run(quantity if quantity is not None else sys.maxsize)
+
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    generated = 0
+    interrupted = False
+
+    with Pipeline(document_stages(output_sink, write_item), pipeline_depth, batch_size) as pipeline:
+        try:
+            while quantity is None or generated < quantity:
+                count = batch_size if quantity is None else min(batch_size, quantity - generated)
+
+                # Wait for the batch to be due, stopping once the duration is up (checked on every batch, as the
+                # bucket never waits once generation falls behind the rate)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if bucket is not None and not bucket.take(count, deadline):
+                    break
+
+                # Count each document as it's put, so an interrupted (or exhausted) batch is counted as far as it got
+                batch_stop = generated + count
+                for document in islice(documents, count):
+                    pipeline.put((generated, document))
+                    generated += 1
+
+                    if progress is not None:
+                        progress.advance()
+
+                pipeline.flush()
+                if generated < batch_stop:
+                    break
+
+        except KeyboardInterrupt:
+            # Stopping a continuous run is expected, so finish writing what was generated and report on it
+            interrupted = True
+
+    # Write out whatever the sink buffers (i.e. a partial record batch)
+    try:
+        add_written_bytes(output_sink.flush())
+    except Exception as e:
+        raise DataOutputError("Unable to output the generated documents to the stream") from e
+
+    seconds = time.perf_counter() - started
+
+    stats = pipeline.stats()
+    stats["write"]["bytes"] = written_bytes
+    waited_seconds = bucket.waited_seconds if bucket is not None else 0.0
+
+    # Time spent waiting on the token bucket wasn't spent generating
+    generate = stats["generate"]
+    stats["generate"] = stage_stats(
+        generate["items"], generate["busy_seconds"] - waited_seconds, generate["blocked_seconds"]
+    )
+
+    pacing = {
+        "documents": generated,
+        "seconds": round(seconds, 6),
+        "target_per_second": rate,
+        "achieved_per_second": round(generated / seconds, 2) if seconds else None,
+        "waited_seconds": round(waited_seconds, 6),
+        "interrupted": interrupted,
+    }
+    return stats, pacing
@@ -0,0 +1,72 @@
+import importlib
+from collections.abc import Mapping
+
+
+class ProviderRegistry(Mapping):
+    """
+    A mapping of names to provider classes, which only imports a provider's module when it's first looked up
+
+    Built in providers are registered by name with the "module:attribute" they're defined in, so listing the
+    names (i.e. for --help) imports nothing. Other packages can register providers under the entry point group,
+    which is only scanned once a name isn't built in, or every name is listed
+    """
+
+    def __init__(self, entry_point_group: str, providers: dict):
+        self.entry_point_group = entry_point_group
+        self.providers = dict(providers)
+        self.loaded = {}
+        self.entry_points_loaded = False
+
+    def load_entry_points(self):
+        if self.entry_points_loaded:
+            return
+        self.entry_points_loaded = True
+
+        # importlib.metadata is only imported when needed, as it's slow to import
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=self.entry_point_group):
+            # Built in providers can't be replaced
+            self.providers.setdefault(entry_point.name, entry_point.value)
+
+    def __getitem__(self, name: str):
+        try:
+            return self.loaded[name]
+        except KeyError:
+            pass
+
+        if name not in self.providers:
+            self.load_entry_points()
+
+        module_name, _, attribute = self.providers[name].partition(":")
+        provider = getattr(importlib.import_module(module_name), attribute)
+        self.loaded[name] = provider
+
+        return provider
+
+    def __contains__(self, name) -> bool:
+        if name not in self.providers:
+            self.load_entry_points()
+
+        return name in self.providers
+
+    def __iter__(self):
+        self.load_entry_points()
+        return iter(self.providers)
+
+    def __len__(self) -> int:
+        self.load_entry_points()
+        return len(self.providers)
+
+
+def lazy_attribute(module_name: str, attributes: dict, name: str):
+    """
+    Imports an attribute of a package from the module it's defined in (attributes maps names to modules) on first
+    use, for packages' module level __getattr__ (PEP 562)
+    """
+    try:
+        defining_module = attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(defining_module), name)
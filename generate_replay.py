@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import json
+import os
+from collections import OrderedDict
+from zipfile import ZipFile
+
+from generate_errors import DataGenerationError, DataOutputError
+from journey_providers.step_delta import StepMaterializer
+
+
+# Number of journey zips (or bundles) kept open while replaying, so a bundle's central directory is only parsed
+# once rather than for every step read from it
+OPEN_ZIP_LIMIT = 64
+
+
+def journey_steps(metadata: dict) -> list:
+    """
+    Returns a journey's (delay, file name) steps in order of delay
+    """
+    return sorted((step["delay"], step["fileName"]) for step in metadata["steps"])
+
+
+def load_journeys(input_path: str, materializer: StepMaterializer = None) -> list:
+    """
+    Reads the metadata of every journey published to input_path, returning a (zip path, steps) pair for each
+    journey, where steps are its (delay, file name) pairs in order of delay
+
+    Journeys are read from their own zip and metadata file, or from bundles (zips holding the step documents and
+    metadata files of many journeys). Each journey is registered with the materializer, if given, so its
+    delta-encoded steps can be rebuilt
+    """
+    journeys = []
+
+    try:
+        file_names = sorted(os.listdir(input_path))
+        journey_zips = set()
+
+        for file_name in file_names:
+            if not file_name.endswith(".metadata.json"):
+                continue
+
+            with open(os.path.join(input_path, file_name), "rb") as fp:
+                metadata = json.load(fp)
+
+            zip_name = f"{metadata['journeyName']}.{metadata['userId']}.zip"
+            journeys.append((os.path.join(input_path, zip_name), journey_steps(metadata)))
+            journey_zips.add(zip_name)
+            if materializer is not None:
+                materializer.add_journey(journeys[-1][0], metadata)
+
+        # Any other zips are bundles
+        for file_name in file_names:
+            if not file_name.endswith(".zip") or file_name in journey_zips:
+                continue
+
+            bundle_path = os.path.join(input_path, file_name)
+            with ZipFile(bundle_path) as bundle:
+                for entry_name in bundle.namelist():
+                    if entry_name.endswith(".metadata.json"):
+                        metadata = json.loads(bundle.read(entry_name))
+                        journeys.append((bundle_path, journey_steps(metadata)))
+                        if materializer is not None:
+                            materializer.add_journey(bundle_path, metadata)
+
+    except Exception as e:
+        raise DataGenerationError("Unable to read the published journeys to replay") from e
+
+    return journeys
+
+
+class ZipCache:
+    """
+    Keeps up to limit zips open for reading, closing the least recently used one once another is opened
+    """
+
+    def __init__(self, limit: int = OPEN_ZIP_LIMIT):
+        self.limit = limit
+        self.zips = OrderedDict()
+
+    def open(self, zip_path: str) -> ZipFile:
+        zip = self.zips.get(zip_path)
+        if zip is not None:
+            self.zips.move_to_end(zip_path)
+            return zip
+
+        zip = self.zips[zip_path] = ZipFile(zip_path)
+        if len(self.zips) > self.limit:
+            self.zips.popitem(last=False)[1].close()
+
+        return zip
+
+    def close(self):
+        for zip in self.zips.values():
+            zip.close()
+        self.zips.clear()
+
+
+def merge_timeline(journeys: list, ramp_up: float = 0):
+    """
+    Merges the steps of every journey into one timeline, yielding (due, file name, zip path) for each step in order
+    of when it's due (in seconds since the replay began)
+
+    The journeys start spread evenly over the first ramp_up seconds, and each step is due its delay after its
+    journey started. Only the next step of each journey is held in a heap, so steps are merged lazily with
+    memory that grows with the number of journeys rather than steps
+    """
+    heap = []
+    for journey_index, (_, steps) in enumerate(journeys):
+        if steps:
+            start = journey_index * ramp_up / len(journeys)
+            heap.append((start + steps[0][0], journey_index, 0, start))
+    heapq.heapify(heap)
+
+    while heap:
+        due, journey_index, step_index, start = heap[0]
+        zip_path, steps = journeys[journey_index]
+        yield due, steps[step_index][1], zip_path
+
+        # Replace the journey's step with its next one, or drop the journey once all of its steps are done
+        if step_index + 1 < len(steps):
+            heapq.heapreplace(heap, (start + steps[step_index + 1][0], journey_index, step_index + 1, start))
+        else:
+            heapq.heappop(heap)
+
+
+async def replay_timeline(timeline, replay_sink, speedup: float = 1, materializer: StepMaterializer = None) -> dict:
+    """
+    Publishes each step in the timeline to the replay sink when it's due, with delays divided by speedup (or as
+    fast as possible when speedup is 0), reading step documents through the materializer, if given, so
+    delta-encoded steps are published as full documents
+
+    A single coroutine sleeps until each step is due and hands it to a task publishing it, with at most the sink's
+    concurrency in flight at once, so replaying many concurrent users needs neither a thread nor a coroutine per
+    journey. Zips are kept open between steps (see ZipCache), as bundles hold the steps of many journeys.
+
+    Returns the number of steps published, how long it took and the furthest behind schedule a step was
+    """
+    loop = asyncio.get_running_loop()
+    time_scale = 1 / speedup if speedup else 0
+    publishing_slots = asyncio.Semaphore(replay_sink.concurrency)
+    publishing = set()
+    errors = []
+    stats = {"steps": 0, "max_lag": 0.0}
+    zips = ZipCache()
+
+    async def publish(file_name: str, zip_path: str):
+        try:
+            zip = zips.open(zip_path)
+            data = materializer.read(zip, file_name) if materializer is not None else zip.read(file_name)
+            await replay_sink.emit(file_name, data)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            publishing_slots.release()
+
+    started = loop.time()
+
+    try:
+        for due, file_name, zip_path in timeline:
+            scheduled = started + due * time_scale
+            if scheduled > loop.time():
+                await asyncio.sleep(scheduled - loop.time())
+
+            await publishing_slots.acquire()
+            if errors:
+                break
+
+            stats["max_lag"] = max(stats["max_lag"], loop.time() - scheduled)
+            stats["steps"] += 1
+
+            task = loop.create_task(publish(file_name, zip_path))
+            publishing.add(task)
+            task.add_done_callback(publishing.discard)
+
+        # Wait for the steps still being published
+        await asyncio.gather(*publishing)
+
+    finally:
+        zips.close()
+        await replay_sink.close()
+
+    if errors:
+        raise DataOutputError("Unable to publish the replayed journey steps") from errors[0]
+
+    stats["seconds"] = loop.time() - started
+    return stats
+
+
+def replay_journeys(input_path: str, replay_sink, speedup: float = 1, ramp_up: float = 0) -> dict:
+    """
+    Replays every journey published to input_path into the replay sink, returning stats on the replay
+    """
+    materializer = StepMaterializer()
+    journeys = load_journeys(input_path, materializer)
+    stats = asyncio.run(replay_timeline(merge_timeline(journeys, ramp_up), replay_sink, speedup, materializer))
+    stats["journeys"] = len(journeys)
+
+    return stats
@@ -0,0 +1,12 @@
+from hashlib import blake2b
+
+
+def derive_seed(seed: int, *keys) -> int:
+    """
+    Derives a 64-bit seed from a run's seed and keys identifying what it's for (i.e. the index of a document)
+
+    Derived seeds depend only on the run seed and the keys, so document i always gets the same seed however
+    the run is split into chunks or across workers, and neighbouring indices get unrelated seeds
+    """
+    digest = blake2b(repr((seed,) + keys).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
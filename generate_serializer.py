@@ -0,0 +1,38 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+
+# A single encoder with compact separators, built once rather than by every call to json.dumps
+json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def dumps_json(document) -> bytes:
+    """
+    Serializes a document to JSON bytes with the standard library json module (escaping non-ASCII characters,
+    as json.dump always has)
+    """
+    return json_encoder.encode(document).encode("ascii")
+
+
+def dumps_orjson(document) -> bytes:
+    """
+    Serializes a document to UTF-8 JSON bytes with orjson
+    """
+    return orjson.dumps(document)
+
+
+# Serializers by name, with the fastest available used by default
+serializer_mapping = {"json": dumps_json}
+if orjson is not None:
+    serializer_mapping["orjson"] = dumps_orjson
+
+default_serializer = "orjson" if orjson is not None else "json"
+
+dumps = serializer_mapping[default_serializer]
+
+# Parses JSON bytes (i.e. to read serialized documents back), with orjson when it's installed
+loads = orjson.loads if orjson is not None else json.loads
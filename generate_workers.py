@@ -0,0 +1,558 @@
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+from typing import TYPE_CHECKING
+
+from document_providers import document_provider_mapping, select_document_provider
+from journey_providers import select_journey_provider
+from journey_providers.journey_publisher import JourneyPublisher
+from generate_errors import DataGenerationError, DataOutputError
+from generate_pipeline import PIPELINE_QUEUE_SIZE, Pipeline
+from generate_seeds import derive_seed
+from generate_serializer import dumps
+from output_sinks import output_sink_mapping, select_output_sink
+from output_sinks.compression import train_zstd_dictionary
+
+if TYPE_CHECKING:
+    from generate_http import HttpUploader
+    from journey_providers.journey_provider import JourneyProvider
+
+
+# Number of chunks handed to each worker, so faster workers can pick up the slack of slower ones
+CHUNKS_PER_WORKER = 4
+
+# Maximum number of documents (or journeys) per chunk, as progress is checkpointed each time a chunk completes
+DOCUMENTS_PER_CHECKPOINT = 10000
+JOURNEYS_PER_CHECKPOINT = 1000
+
+# Number of documents to train zstd dictionaries on
+DICTIONARY_SAMPLE_SIZE = 1000
+
+# Per-process state, populated by the pool initialiser in each worker
+worker_state = {}
+
+
+def split_quantity(quantity: int, chunk_count: int, alignment: int = 1) -> list:
+    """
+    Splits the index range [0, quantity) into contiguous (start, stop) chunks of near-equal size
+
+    Every chunk except the last starts and stops on a multiple of alignment
+    """
+    block_count = -(-quantity // alignment)
+    chunk_count = max(1, min(chunk_count, block_count))
+    blocks_per_chunk, remainder = divmod(block_count, chunk_count)
+
+    chunks = []
+    start = 0
+    for chunk_index in range(chunk_count):
+        stop = start + (blocks_per_chunk + (1 if chunk_index < remainder else 0)) * alignment
+        chunks.append((start, min(stop, quantity)))
+        start = stop
+
+    return chunks
+
+
+def plan_chunks(quantity: int, workers: int, per_checkpoint: int, alignment: int = 1, start: int = 0) -> list:
+    """
+    Plans the (start, stop) chunks for a run of quantity indices from start: at least CHUNKS_PER_WORKER per worker,
+    and small enough that no more than about per_checkpoint indices are lost if the run is interrupted
+    """
+    chunk_count = max(workers * CHUNKS_PER_WORKER, -(-quantity // per_checkpoint))
+    return [(start + chunk_start, start + chunk_stop) for chunk_start, chunk_stop in split_quantity(quantity, chunk_count, alignment)]
+
+
+def parse_shard(shard: str) -> tuple:
+    """
+    Parses a shard of a run given as K/N (the Kth of N shards, counting from 0) into (K, N)
+    """
+    index, _, count = shard.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard: {shard} (expected K/N, i.e. 0/4)")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard: {shard} (K must be from 0 to N - 1)")
+
+    return index, count
+
+
+def shard_range(quantity: int, shard: tuple, alignment: int = 1) -> tuple:
+    """
+    Returns the (start, stop) range of indices of [0, quantity) that shard (K, N) of a run generates
+
+    Ranges depend only on the quantity, shard and alignment, so N nodes each given the same options and their own
+    shard generate disjoint, contiguous slices of the run without coordinating, and since every slice starts on a
+    multiple of alignment, no two nodes ever write to the same file
+    """
+    index, count = shard
+    ranges = split_quantity(quantity, count, alignment)
+
+    # With fewer blocks of indices than shards, the last shards have nothing to generate
+    if index >= len(ranges):
+        return quantity, quantity
+
+    return ranges[index]
+
+
+def new_worker_seed() -> int:
+    """
+    Returns a fresh seed from the OS entropy pool
+
+    Forked workers inherit the parent's random state, so each one must be reseeded or they would
+    all generate the same documents
+    """
+    return int.from_bytes(os.urandom(8), "big")
+
+
+def chunk_alignment(provider_name: str, provider_options: dict, output_format: str, sink_options: dict) -> int:
+    """
+    Returns the multiple of document indices that parallel chunks must be aligned to, so that no two workers
+    ever write to the same shard, or generate the same seeded columnar batch
+    """
+    alignment = 1
+    if output_sink_mapping[output_format].sharded:
+        alignment = sink_options["shard_size"]
+
+    if provider_options.get("columnar") and provider_options.get("seed") is not None:
+        alignment = math.lcm(alignment, document_provider_mapping[provider_name].batch_size)
+
+    return alignment
+
+
+def load_zstd_dictionary(provider_name: str, provider_options: dict, provider_output_path: str, resume=False) -> bytes:
+    """
+    Trains a zstd dictionary on a sample of the provider's documents, saving it as {name}.zstd-dict alongside the
+    output, as it's needed to decompress it
+
+    When resuming, the dictionary saved by the interrupted run is loaded instead, so all of the run's output is
+    compressed with the same dictionary
+    """
+    dictionary_path = os.path.join(provider_output_path, f"{provider_name}.zstd-dict")
+    if resume and os.path.exists(dictionary_path):
+        with open(dictionary_path, "rb") as fp:
+            return fp.read()
+
+    # Sample documents from their own provider, so the run's documents are the same with or without a dictionary
+    seed = provider_options.get("seed")
+    sample_seed = derive_seed(seed, "dictionary") if seed is not None else None
+    sample_provider = select_document_provider(provider_name, seed=sample_seed)
+    samples = [dumps(document) for document in sample_provider.iter_generate(DICTIONARY_SAMPLE_SIZE)]
+    dictionary = train_zstd_dictionary(samples)
+
+    try:
+        os.makedirs(provider_output_path, exist_ok=True)
+        with open(dictionary_path, "wb") as fp:
+            fp.write(dictionary)
+    except Exception as e:
+        raise DataOutputError(
+            "Unable to output the generated documents to destination path"
+        ) from e
+
+    return dictionary
+
+
+@contextmanager
+def open_output_sink(output_format: str, provider_output_path: str, document_name: str, sink_options: dict):
+    """
+    Opens the output sink for the format, making sure it is flushed and closed once writing is done
+    """
+    output_sink = select_output_sink(output_format, provider_output_path, document_name, **sink_options)
+
+    try:
+        yield output_sink
+    finally:
+        try:
+            output_sink.close()
+        except Exception as e:
+            raise DataOutputError(
+                "Unable to output the generated documents to destination path"
+            ) from e
+
+
+def serialize_document(item: tuple) -> tuple:
+    index, document = item
+    return index, dumps(document)
+
+
+def document_stages(output_sink, write) -> list:
+    """
+    Returns the pipeline stages documents pass through into the output sink: serialized then written, or for
+    columnar sinks (which convert documents into columns themselves), written as they are
+    """
+    if output_sink.columnar:
+        return [("write", write)]
+
+    return [("serialize", serialize_document), ("write", write)]
+
+
+def write_documents(
+    document_provider, output_sink, start: int, stop: int, progress=None, pipeline_depth: int = PIPELINE_QUEUE_SIZE
+) -> dict:
+    """
+    Generates the documents for indices [start, stop) and saves them to the output sink through a pipeline with
+    queues of pipeline_depth batches, so serializing and writing them overlaps with generating the next ones;
+    each document (and the bytes written) is counted on the progress reporter, if given
+
+    Returns the pipeline's per-stage throughput counters, including the bytes written
+    """
+    written_bytes = 0
+
+    def add_written_bytes(size: int):
+        nonlocal written_bytes
+        written_bytes += size
+        if progress is not None:
+            progress.add_bytes(size)
+
+    def write_item(item: tuple):
+        try:
+            add_written_bytes(output_sink.write_item(*item))
+        except Exception as e:
+            raise DataOutputError(
+                "Unable to output the generated documents to destination path"
+            ) from e
+
+    with Pipeline(document_stages(output_sink, write_item), pipeline_depth) as pipeline:
+        for i, document in enumerate(document_provider.iter_generate_run(stop - start, start), start):
+            pipeline.put((i, document))
+
+            if progress is not None:
+                progress.advance()
+
+    # Write out whatever the sink buffers (i.e. a partial record batch), so it's counted with the chunk
+    try:
+        add_written_bytes(output_sink.flush())
+    except Exception as e:
+        raise DataOutputError(
+            "Unable to output the generated documents to destination path"
+        ) from e
+
+    stats = pipeline.stats()
+    stats["write"]["bytes"] = written_bytes
+    return stats
+
+
+def create_journey(
+    provider_name: str, staging_path: str, in_memory=False, seed=None, delta_steps=False
+) -> "JourneyProvider":
+    """
+    Creates a journey, staging its step documents in staging_path (or in memory)
+    """
+    # Get provider type from journey_provider type map
+    journey_provider = select_journey_provider(
+        provider_name, staging_path, in_memory=in_memory, seed=seed, delta_steps=delta_steps
+    )
+
+    # Construct the journey & output document files
+    try:
+        journey_provider.create_journey()
+    except Exception as e:
+        raise DataGenerationError("Unable to create user journey") from e
+
+    return journey_provider
+
+
+def publish_journeys(
+    provider_name: str,
+    staging_path: str,
+    publisher: JourneyPublisher,
+    start: int,
+    stop: int,
+    in_memory=False,
+    seed=None,
+    pipeline_depth: int = PIPELINE_QUEUE_SIZE,
+    progress=None,
+    delta_steps=False,
+) -> dict:
+    """
+    Creates the journeys for indices [start, stop) and publishes them with the publisher through a pipeline with a
+    queue of pipeline_depth journeys, so zipping each journey overlaps with creating the next ones; each journey
+    is counted on the progress reporter, if given. With delta_steps, steps based on an earlier one are stored as a
+    JSON Patch against it
+
+    Returns the pipeline's per-stage throughput counters
+    """
+    def publish(item: tuple):
+        # Finalise and export metadata for the journey
+        try:
+            publisher.publish(*item)
+        except Exception as e:
+            raise DataOutputError(
+                "Unable to output the generated documents to destination path"
+            ) from e
+
+    # Journeys are passed on one at a time, as each may hold all of its step documents in memory
+    with Pipeline([("zip", publish)], pipeline_depth, batch_size=1) as pipeline:
+        for i in range(start, stop):
+            journey = create_journey(provider_name, staging_path, in_memory, journey_seed(seed, i), delta_steps)
+            pipeline.put((i, journey))
+
+            if progress is not None:
+                progress.advance()
+
+    return pipeline.stats()
+
+
+def init_document_worker(
+    provider_name: str,
+    provider_options: dict,
+    provider_output_path: str,
+    output_format: str,
+    sink_options: dict,
+    pipeline_depth: int,
+):
+    """
+    Pool initialiser giving each worker process its own DocumentProvider (and so its own Field)
+
+    Unless the run is seeded, each worker's provider is reseeded from fresh entropy
+    """
+    document_provider = select_document_provider(provider_name, **provider_options)
+    if document_provider.seed is None:
+        document_provider.reseed(new_worker_seed())
+
+    worker_state["document_provider"] = document_provider
+    worker_state["output"] = (output_format, provider_output_path, sink_options)
+    worker_state["pipeline_depth"] = pipeline_depth
+
+
+def generate_document_chunk(chunk: tuple) -> tuple:
+    """
+    Generates and saves the documents for one (start, stop) chunk within a worker, returning the chunk and its
+    pipeline's throughput counters once its output has been closed
+    """
+    start, stop = chunk
+    document_provider = worker_state["document_provider"]
+    output_format, provider_output_path, sink_options = worker_state["output"]
+
+    with open_output_sink(output_format, provider_output_path, document_provider.name, sink_options) as output_sink:
+        stats = write_documents(document_provider, output_sink, start, stop, None, worker_state["pipeline_depth"])
+
+    return chunk, stats
+
+
+def generate_documents_in_parallel(
+    provider_name: str,
+    provider_options: dict,
+    provider_output_path: str,
+    output_format: str,
+    sink_options: dict,
+    chunks: list,
+    workers: int,
+    pipeline_depth: int = PIPELINE_QUEUE_SIZE,
+):
+    """
+    Splits the (start, stop) chunks of documents to generate across a pool of worker processes
+
+    Each worker writes its documents directly, using the global index of the document in the run so file
+    and shard names stay unique and contiguous. Yields each chunk, with its throughput counters, as it completes
+    """
+    initargs = (provider_name, provider_options, provider_output_path, output_format, sink_options, pipeline_depth)
+
+    # Imported here, as multiprocessing is only loaded by runs with several workers
+    from multiprocessing import Pool
+
+    with Pool(workers, initializer=init_document_worker, initargs=initargs) as pool:
+        yield from pool.imap_unordered(generate_document_chunk, chunks)
+
+
+def init_journey_worker():
+    """
+    Pool initialiser reseeding the random generators shared by journey providers within each worker process
+    """
+    # Imported here, as Mimesis is only loaded once a provider is selected
+    import mimesis.random
+    from journey_providers.journey_provider import JourneyProvider
+
+    seed = new_worker_seed()
+    random.seed(seed)
+    mimesis.random.random.seed(seed)
+
+    # Document providers shared by journeys may have been created (and seeded) before the fork
+    JourneyProvider.document_providers.clear()
+
+
+def journey_seed(seed, index: int):
+    """
+    Returns the seed for the journey at index in a seeded run, or None if the run isn't seeded
+    """
+    return derive_seed(seed, index) if seed is not None else None
+
+
+def journey_staging_root(output_path: str, provider_name: str, shard: tuple = None) -> str:
+    """
+    Returns the directory within output_path that a journey run (or shard (K, N) of it) stages its chunks in, so
+    runs sharing an output path (i.e. the shards of a run on several nodes) never touch each other's staging
+    """
+    name = provider_name if shard is None else f"{provider_name}.shard-{shard[0]}-of-{shard[1]}"
+    return os.path.join(output_path, f".staging-{name}")
+
+
+def clean_journey_staging(staging_root: str) -> int:
+    """
+    Removes a journey run's staging directory, along with the scratch directories of any chunks left in it by an
+    interrupted run
+
+    Returns the number of chunk scratch directories removed
+    """
+    if not os.path.isdir(staging_root):
+        return 0
+
+    removed = sum(1 for entry in os.scandir(staging_root) if entry.is_dir())
+    shutil.rmtree(staging_root, ignore_errors=True)
+
+    return removed
+
+
+def published_chunk_journal(staging_root: str, start: int, stop: int) -> str:
+    """
+    Returns the path of the journal listing the files a chunk of journeys is moving into the output path
+    """
+    return os.path.join(staging_root, f"chunk-{start}-{stop}.published.json")
+
+
+def roll_back_published_chunks(staging_root: str, output_path: str, chunks: list) -> int:
+    """
+    Removes the files an interrupted run had moved into output_path for any of the (start, stop) chunks, which the
+    run's manifest doesn't record as completed, so resuming the run doesn't publish their journeys twice
+
+    Returns the number of files removed
+    """
+    removed = 0
+    for start, stop in chunks:
+        journal_path = published_chunk_journal(staging_root, start, stop)
+        if not os.path.exists(journal_path):
+            continue
+
+        with open(journal_path, "rb") as fp:
+            file_names = json.load(fp)
+
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(output_path, file_name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+    return removed
+
+
+def upload_published_file(uploader: "HttpUploader", staging_path: str, file_name: str):
+    """
+    Starts uploading a published journey zip (or bundle) or metadata file from the staging path
+    """
+    content_type = "application/json" if file_name.endswith(".metadata.json") else "application/zip"
+    with open(os.path.join(staging_path, file_name), "rb") as fp:
+        uploader.upload(file_name, fp.read(), content_type)
+
+
+def generate_journey_chunk(chunk: tuple, progress=None) -> tuple:
+    """
+    Generates and publishes the journeys for one (start, stop, journey_options) chunk, returning (start, stop), its
+    pipeline's throughput counters (including the bytes published) and the (archive, metadata) of each journey
+    (for the journey index) once they have all been published
+
+    Journeys are staged and published within a scratch directory private to this chunk (in the run's staging
+    directory, see journey_staging_root), so workers never share one, and only moved into the output path once the
+    whole chunk is complete; an interrupted chunk leaves nothing but its scratch directory behind, and the files
+    it's moving are journaled first, so they can be removed if the run is interrupted before it's checkpointed
+
+    With upload_url, each zip (or bundle) is uploaded as soon as it's written, overlapping with creating the next
+    journeys, and the chunk's metadata files once every zip has been uploaded
+    """
+    start, stop, journey_options = chunk
+    provider_name = journey_options["provider_name"]
+    output_path = journey_options["output_path"]
+    in_memory = journey_options["in_memory"]
+    seed = journey_options["seed"]
+    upload_url = journey_options["upload_url"]
+
+    os.makedirs(journey_options["staging_root"], exist_ok=True)
+    staging_path = tempfile.mkdtemp(prefix="chunk-", dir=journey_options["staging_root"])
+
+    uploader = None
+    on_written = None
+    if upload_url:
+        # Imported here, as asyncio is only loaded when uploading
+        from generate_http import HttpUploader
+
+        uploader = HttpUploader(upload_url, journey_options["upload_concurrency"])
+        on_written = partial(upload_published_file, uploader, staging_path)
+
+    publisher = JourneyPublisher(
+        staging_path,
+        journey_options["zip_compression"],
+        journey_options["zip_level"],
+        journey_options["bundle_size"],
+        journey_options["zip_threads"],
+        on_written,
+    )
+
+    try:
+        try:
+            stats = publish_journeys(
+                provider_name,
+                staging_path,
+                publisher,
+                start,
+                stop,
+                in_memory,
+                seed,
+                journey_options["pipeline_depth"],
+                progress,
+                journey_options["delta_steps"],
+            )
+        finally:
+            publisher.close()
+
+        published = [entry for entry in os.scandir(staging_path) if entry.is_file()]
+        stats["zip"]["bytes"] = sum(entry.stat().st_size for entry in published)
+
+        if uploader is not None:
+            # Wait for the zips, so a journey's metadata never appears before its zip
+            uploader.flush()
+            for entry in published:
+                if entry.name.endswith(".metadata.json"):
+                    upload_published_file(uploader, staging_path, entry.name)
+            uploader.flush()
+        else:
+            # Zips go before the metadata files, so a journey's metadata never appears before its zip
+            file_names = sorted((entry.name for entry in published), key=lambda name: name.endswith(".metadata.json"))
+            try:
+                # Journal the files before moving any, so if the run is interrupted before the chunk is checkpointed,
+                # resuming it can remove them (see roll_back_published_chunks)
+                journal_path = published_chunk_journal(journey_options["staging_root"], start, stop)
+                with open(journal_path + ".tmp", "wb") as fp:
+                    fp.write(dumps(file_names))
+                os.replace(journal_path + ".tmp", journal_path)
+
+                for file_name in file_names:
+                    os.replace(os.path.join(staging_path, file_name), os.path.join(output_path, file_name))
+            except Exception as e:
+                raise DataOutputError(
+                    "Unable to output the generated documents to destination path"
+                ) from e
+    finally:
+        if uploader is not None:
+            uploader.close()
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+    return (start, stop), stats, publisher.published
+
+
+def generate_journeys_in_parallel(journey_options: dict, chunks: list, workers: int):
+    """
+    Splits the (start, stop) chunks of journeys to generate across a pool of worker processes
+
+    Yields each chunk, with its throughput counters and published journeys, as it completes
+    """
+    journey_chunks = [(start, stop, journey_options) for start, stop in chunks]
+
+    from multiprocessing import Pool
+
+    with Pool(workers, initializer=init_journey_worker) as pool:
+        yield from pool.imap_unordered(generate_journey_chunk, journey_chunks)
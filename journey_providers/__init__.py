@@ -1,18 +1,38 @@
 from io import UnsupportedOperation
+from typing import TYPE_CHECKING
 
-from journey_providers.journey_provider import JourneyProvider
-from .starfleet import StarfleetJourney
+from generate_registry import ProviderRegistry, lazy_attribute
 
+if TYPE_CHECKING:
+    from .journey_provider import JourneyProvider
 
-journey_provider_mapping = {"starfleet": StarfleetJourney}
 
+# Journey providers by name, each imported (along with Mimesis) only once it's selected; other packages can add
+# providers through the data_generator.journey_providers entry point group
+journey_provider_mapping = ProviderRegistry(
+    "data_generator.journey_providers",
+    {"starfleet": "journey_providers.starfleet:StarfleetJourney"},
+)
 
-def select_journey_provider(provider_name: str, output_path: str) -> JourneyProvider:
+# Classes importable from the package, loaded from their modules on first use
+lazy_attributes = {
+    "JourneyProvider": "journey_providers.journey_provider",
+    "StarfleetJourney": "journey_providers.starfleet",
+}
+
+
+def __getattr__(name: str):
+    return lazy_attribute(__name__, lazy_attributes, name)
+
+
+def select_journey_provider(
+    provider_name: str, output_path: str, in_memory=False, seed=None, delta_steps=False
+) -> "JourneyProvider":
     """ Returns an instance of a user journey provider, given the provider_name """
 
     try:
         journey_type = journey_provider_mapping[provider_name.casefold()]
-        return journey_type(output_path)
+        return journey_type(output_path, in_memory=in_memory, seed=seed, delta_steps=delta_steps)
     except KeyError:
         raise UnsupportedOperation(
             f"Unsupported generator_type specified: {provider_name}"
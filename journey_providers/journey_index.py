@@ -0,0 +1,174 @@
+import sqlite3
+
+from generate_errors import DataGenerationError, DataOutputError
+
+
+# File name of the index within the journeys' output path
+JOURNEY_INDEX_FILE_NAME = "journeys.sqlite"
+
+JOURNEY_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journeys (
+    user_id TEXT PRIMARY KEY,
+    journey_name TEXT NOT NULL,
+    archive TEXT NOT NULL,
+    metadata_file TEXT NOT NULL,
+    step_count INTEGER NOT NULL,
+    duration INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    user_id TEXT NOT NULL,
+    step_index INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    delay INTEGER NOT NULL,
+    base_step INTEGER,
+    PRIMARY KEY (user_id, step_index)
+);
+CREATE INDEX IF NOT EXISTS journeys_by_name ON journeys (journey_name);
+CREATE INDEX IF NOT EXISTS journeys_by_step_count ON journeys (step_count);
+CREATE INDEX IF NOT EXISTS journeys_by_duration ON journeys (duration);
+CREATE INDEX IF NOT EXISTS steps_by_delay ON steps (delay);
+CREATE INDEX IF NOT EXISTS steps_by_document_type ON steps (document_type, delay);
+"""
+
+# The columns of the journeys table returned by queries, by the key they're returned under
+JOURNEY_COLUMNS = {
+    "userId": "user_id",
+    "journeyName": "journey_name",
+    "archive": "archive",
+    "metadataFile": "metadata_file",
+    "steps": "step_count",
+    "duration": "duration",
+}
+
+
+class JourneyIndex:
+    """
+    A catalogue of published journeys in an SQLite database: a row per journey (its user id, name, the archive and
+    metadata file it was published to, step count and duration) and a row per step (its file name, document type,
+    delay and base step), indexed so subsets of millions of journeys can be selected without opening their
+    metadata files
+
+    Journeys are added a batch at a time (i.e. a chunk of a run), each batch in one transaction
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+            self.connection.executescript(JOURNEY_INDEX_SCHEMA)
+        except sqlite3.Error as e:
+            raise DataOutputError(f"Unable to open the journey index {path}") from e
+
+    def add_journeys(self, published: list):
+        """
+        Adds (archive, metadata) pairs of published journeys to the index in one transaction, replacing any
+        journeys already indexed with the same user id (i.e. regenerated by a resumed run), along with all of their steps
+        """
+        journeys = []
+        steps = []
+        for archive, metadata in published:
+            user_id = metadata["userId"]
+            journey_steps = metadata["steps"]
+            journeys.append(
+                (
+                    user_id,
+                    metadata["journeyName"],
+                    archive,
+                    f"{metadata['journeyName']}.{user_id}.metadata.json",
+                    len(journey_steps),
+                    max((step["delay"] for step in journey_steps), default=0),
+                )
+            )
+
+            # Step file names are {delay}.{document type}.{step index}.{user id}.json
+            for step_index, step in enumerate(journey_steps):
+                document_type = step["fileName"].split(".")[1]
+                steps.append((user_id, step_index, step["fileName"], document_type, step["delay"], step.get("baseStep")))
+
+        try:
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO journeys VALUES (?, ?, ?, ?, ?, ?)", journeys)
+                # A journey indexed again may have fewer steps than before, so its old steps are removed first
+                self.connection.executemany("DELETE FROM steps WHERE user_id = ?", ((journey[0],) for journey in journeys))
+                self.connection.executemany("INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?)", steps)
+        except sqlite3.Error as e:
+            raise DataOutputError(f"Unable to add journeys to the journey index {self.path}") from e
+
+    def query(
+        self,
+        journey_name=None,
+        user_id=None,
+        min_steps=None,
+        max_steps=None,
+        min_duration=None,
+        max_duration=None,
+        document_type=None,
+        min_delay=None,
+        max_delay=None,
+        limit=None,
+        count=False,
+    ):
+        """
+        Returns the journeys matching every filter given, as dicts in order of user id (or just how many there are,
+        with count): by name or user id, step count and duration (in seconds) ranges, and having a step of
+        document_type and/or with a delay in the [min_delay, max_delay] range
+        """
+        conditions = []
+        parameters = []
+        for condition, value in (
+            ("journey_name = ?", journey_name),
+            ("user_id = ?", user_id),
+            ("step_count >= ?", min_steps),
+            ("step_count <= ?", max_steps),
+            ("duration >= ?", min_duration),
+            ("duration <= ?", max_duration),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        step_conditions = []
+        for condition, value in (
+            ("document_type = ?", document_type),
+            ("delay >= ?", min_delay),
+            ("delay <= ?", max_delay),
+        ):
+            if value is not None:
+                step_conditions.append(condition)
+                parameters.append(value)
+
+        if step_conditions:
+            conditions.append(
+                "user_id IN (SELECT user_id FROM steps WHERE " + " AND ".join(step_conditions) + ")"
+            )
+
+        where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+        if count:
+            sql = f"SELECT COUNT(*) FROM journeys{where}"
+        else:
+            sql = f"SELECT {', '.join(JOURNEY_COLUMNS.values())} FROM journeys{where} ORDER BY user_id"
+            if limit is not None:
+                sql += " LIMIT ?"
+                parameters.append(limit)
+
+        try:
+            rows = self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            raise DataGenerationError(f"Unable to query the journey index {self.path}") from e
+
+        if count:
+            return rows[0][0]
+
+        return [dict(zip(JOURNEY_COLUMNS, row)) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,11 +1,15 @@
-import json
 import os
 import random
 import uuid
-from zipfile import ZipFile
+from zipfile import ZIP_STORED, ZipFile
 import shutil
 
+from mimesis.schema import Field
+
 from document_providers.document_provider import DocumentProvider
+from document_providers.schema_plan import SchemaPlan
+from generate_serializer import dumps, loads
+from journey_providers.step_delta import diff_documents
 
 
 class JourneyProvider:
@@ -15,9 +19,20 @@ class JourneyProvider:
 
     name = None
 
-    def __init__(self, output_path):
+    # DocumentProvider instances shared by every journey in the process, as creating one loads its locale data
+    document_providers = {}
+
+    # Mimesis field shared by every journey in the process for generating individual values, see generate_value
+    value_plan = None
+
+    def __init__(self, output_path, in_memory=False, seed=None, delta_steps=False):
+        # Random generator for the journey's own choices; with a seed, the whole journey (including the documents
+        # generated for it) depends only on the seed
+        self.seed = seed
+        self.random = random.Random(seed)
+
         # Generate a unique user_id for the journey
-        self.user_id = uuid.uuid4()
+        self.user_id = uuid.UUID(int=self.random.getrandbits(128), version=4)
 
         # Instantiate a step index to keep filenames unique
         self.step_index = 0
@@ -31,21 +46,57 @@ class JourneyProvider:
 
         # Create a local output path for the documents if it doesn't already exist
         self.output_path = output_path + f"/{self.user_id}"
-        if not os.path.exists(self.output_path):
+        if not in_memory and not os.path.exists(self.output_path):
             os.makedirs(self.output_path)
 
+        # When assembling in memory, steps are kept as serialized (file name, bytes) pairs instead of files
+        self.in_memory = in_memory
+        self.step_files = []
+
+        # With delta steps, steps added with a base step are stored as a JSON Patch against it, so each step's
+        # document is kept as it was when added, to diff later steps against
+        self.delta_steps = delta_steps
+        self.step_documents = []
+
     def create_journey(self) -> dict:
         raise NotImplementedError()
 
+    def generate_document(self, document_type) -> dict:
+        """
+        Generates a document with the given DocumentProvider type, reusing one instance of it across journeys
+        """
+        if document_type not in self.document_providers:
+            self.document_providers[document_type] = document_type()
+
+        document_provider = self.document_providers[document_type]
+        if self.seed is not None:
+            document_provider.reseed(self.random.getrandbits(64))
+
+        return document_provider.generate()
+
+    def generate_value(self, name: str, **kwargs):
+        """
+        Generates a single fake value by its Mimesis provider path (i.e. "datetime.date"), as a schema would
+        """
+        if JourneyProvider.value_plan is None:
+            JourneyProvider.value_plan = SchemaPlan(Field("en-GB"), {})
+
+        if self.seed is not None:
+            JourneyProvider.value_plan.reseed(self.random.getrandbits(64))
+
+        return JourneyProvider.value_plan(name, **kwargs)
+
     def add_step(
         self,
         document_type: DocumentProvider,
         document: dict,
         delay=[0, 0],
         delay_from_step_index=None,
+        base_step_index=None,
     ):
         """
-        Save a document file to the output folder and add file path and delay info to journey metadata
+        Save a document file to the output folder (or hold it in memory when in_memory is set) and add file path
+        and delay info to journey metadata
 
         document_type : DocumentProvider
             The DocumentProvider which was used to generate the document you're passing in
@@ -57,9 +108,13 @@ class JourneyProvider:
         delay_from_step: int
             (Optional) Adds the delay of a previous step (specified as the index number of the step within the journey
             metadata's steps array) to this step's delay value
+        base_step_index: int
+            (Optional) The index of a previous step whose document this one is a modified version of. With delta
+            steps, the step is stored as a JSON Patch against that step's document (when the patch is smaller), and
+            the base step is recorded in the metadata as baseStep
         """
         # Randomly generate a delay within the range specified (in seconds)
-        document_delay = random.randint(delay[0], delay[1])
+        document_delay = self.random.randint(delay[0], delay[1])
 
         # If delay_from_step specifies a step index, add the delay from that step to this step's delay
         if delay_from_step_index:
@@ -69,13 +124,27 @@ class JourneyProvider:
         file_name = (
             f"{document_delay}.{document_type.name}.{self.step_index}.{self.user_id}.json"
         )
-        with open(self.output_path + "/" + file_name, "w") as fp:
-            json.dump(document, fp)
+        data = dumps(document)
+        step = {"fileName": file_name, "delay": document_delay}
+
+        if self.delta_steps:
+            # Keep the document as it is now, as the caller may go on modifying it
+            self.step_documents.append(loads(data))
+
+            if base_step_index is not None:
+                patch = dumps(diff_documents(self.step_documents[base_step_index], document))
+                if len(patch) < len(data):
+                    data = patch
+                    step["baseStep"] = base_step_index
+
+        if self.in_memory:
+            self.step_files.append((file_name, data))
+        else:
+            with open(self.output_path + "/" + file_name, "wb") as fp:
+                fp.write(data)
 
         # Update journey metadata with saved document and any additional replay details
-        self.journey_metadata["steps"].append(
-            {"fileName": file_name, "delay": document_delay}
-        )
+        self.journey_metadata["steps"].append(step)
 
         # Increment the step index for unique filenames and delay reference
         self.step_index += 1
@@ -93,20 +162,41 @@ class JourneyProvider:
         steps = self.journey_metadata["steps"]
         return max(range(len(steps)), key=lambda index: steps[index]["delay"])
 
-    def publish_journey(self, publish_path: str):
+    @property
+    def zip_file_name(self) -> str:
+        return f"{self.name}.{self.user_id}.zip"
+
+    @property
+    def metadata_file_name(self) -> str:
+        return f"{self.name}.{self.user_id}.metadata.json"
+
+    def write_steps(self, zip: ZipFile):
         """
-        Exports the finalised metadata file for the user journey and zips files for publishing
+        Writes the journey's step documents into an open zip, in step order, then discards the staged steps
+        """
+        if self.in_memory:
+            # Write the serialized steps straight into the zip
+            for filename, data in self.step_files:
+                zip.writestr(filename, data)
+            self.step_files = []
+        else:
+            # Add the step files in step order, as they are when assembled in memory
+            for step in self.journey_metadata["steps"]:
+                filename = step["fileName"]
+                zip.write(os.path.join(self.output_path, filename), arcname=filename)
+
+            # Delete the unzipped directory
+            shutil.rmtree(self.output_path)
+
+    def publish_journey(self, publish_path: str, compression=ZIP_STORED, compresslevel=None):
+        """
+        Exports the finalised metadata file for the user journey and zips files for publishing, with the given
+        zipfile compression method and level
         """
         # Zip the document files
-        with ZipFile(f"{publish_path}/{self.name}.{self.user_id}.zip", "w") as zip:
-            for dirname, subdirs, files in os.walk(self.output_path):
-                for filename in files:
-                    zip.write(os.path.join(dirname, filename), arcname=filename)
-
-        # Delete the unzipped directory
-        shutil.rmtree(self.output_path)
+        with ZipFile(os.path.join(publish_path, self.zip_file_name), "w", compression, compresslevel=compresslevel) as zip:
+            self.write_steps(zip)
 
         # Output the metadata dict as JSON within journey zip
-        file_name = f"{self.name}.{self.user_id}.metadata.json"
-        with open(publish_path + "/" + file_name, "w") as fp:
-            json.dump(self.journey_metadata, fp)
+        with open(os.path.join(publish_path, self.metadata_file_name), "wb") as fp:
+            fp.write(dumps(self.journey_metadata))
@@ -0,0 +1,137 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from zipfile import ZIP_BZIP2, ZIP_DEFLATED, ZIP_LZMA, ZIP_STORED, ZipFile
+
+from generate_errors import DataOutputError
+from generate_serializer import dumps
+
+if TYPE_CHECKING:
+    from journey_providers.journey_provider import JourneyProvider
+
+
+zip_compression_mapping = {
+    "stored": ZIP_STORED,
+    "deflated": ZIP_DEFLATED,
+    "bzip2": ZIP_BZIP2,
+    "lzma": ZIP_LZMA,
+}
+
+# Compression levels each zip compression method takes, or None for those that don't take a level
+zip_compression_levels = {
+    "stored": None,
+    "deflated": range(0, 10),
+    "bzip2": range(1, 10),
+    "lzma": None,
+}
+
+
+class JourneyPublisher:
+    """
+    Publishes created journeys to publish_path, each as its own zip and metadata file or, with a bundle_size,
+    bundle_size journeys at a time into {name}_{bundle}.zip bundles holding their step documents and metadata files
+
+    Journey i always lands in bundle i // bundle_size, so bundle names are the same however the run is split
+    between workers. With zip_threads, zips are written on a thread pool so compressing them overlaps with
+    generating the next journeys (zlib, bz2 and lzma release the GIL while compressing)
+
+    The (archive, metadata) of every journey published is recorded in published, i.e. to add them to a
+    JourneyIndex once they're all written. With on_written, it's called with the file name of each zip (or bundle)
+    as soon as it has been written (on the thread that wrote it), i.e. to start uploading it
+    """
+
+    def __init__(
+        self,
+        publish_path: str,
+        compression="stored",
+        compression_level=None,
+        bundle_size=None,
+        zip_threads=0,
+        on_written=None,
+    ):
+        self.publish_path = publish_path
+        self.on_written = on_written
+        self.compression = zip_compression_mapping[compression]
+        self.compression_level = compression_level
+        self.bundle_size = bundle_size
+
+        # Journeys waiting to be written into the current bundle
+        self.bundle_index = None
+        self.bundle = []
+
+        self.executor = ThreadPoolExecutor(zip_threads) if zip_threads else None
+        self.max_pending = 2 * zip_threads
+        self.pending = []
+
+        self.published = []
+
+    def publish(self, index: int, journey_provider: "JourneyProvider"):
+        """
+        Publishes the journey at the given index of the run (or adds it to its bundle)
+        """
+        if self.bundle_size is None:
+            self.submit(self.write_journey, journey_provider)
+            self.published.append((journey_provider.zip_file_name, journey_provider.journey_metadata))
+            return
+
+        # Write out the current bundle once the index moves past it
+        bundle_index = index // self.bundle_size
+        if bundle_index != self.bundle_index:
+            self.flush_bundle()
+            self.bundle_index = bundle_index
+
+        self.bundle.append(journey_provider)
+        self.published.append((self.bundle_file_name(journey_provider.name, bundle_index), journey_provider.journey_metadata))
+
+    def bundle_file_name(self, name: str, bundle_index: int) -> str:
+        return f"{name}_{bundle_index}.zip"
+
+    def flush_bundle(self):
+        if self.bundle:
+            self.submit(self.write_bundle, self.bundle_index, self.bundle)
+            self.bundle = []
+
+    def write_journey(self, journey_provider: "JourneyProvider"):
+        journey_provider.publish_journey(self.publish_path, self.compression, self.compression_level)
+
+        if self.on_written is not None:
+            self.on_written(journey_provider.zip_file_name)
+
+    def write_bundle(self, bundle_index: int, journey_providers: list):
+        name = journey_providers[0].name
+        bundle_file_name = self.bundle_file_name(name, bundle_index)
+
+        with ZipFile(os.path.join(self.publish_path, bundle_file_name), "w", self.compression, compresslevel=self.compression_level) as zip:
+            for journey_provider in journey_providers:
+                journey_provider.write_steps(zip)
+                zip.writestr(journey_provider.metadata_file_name, dumps(journey_provider.journey_metadata))
+
+        if self.on_written is not None:
+            self.on_written(bundle_file_name)
+
+    def submit(self, write, *args):
+        if self.executor is None:
+            write(*args)
+            return
+
+        # Bound the zips waiting on the pool, so staged journeys can't pile up faster than they are zipped
+        if len(self.pending) >= self.max_pending:
+            self.pending.pop(0).result()
+
+        self.pending.append(self.executor.submit(write, *args))
+
+    def close(self):
+        """
+        Writes out the last bundle and waits for every zip to be written
+        """
+        try:
+            self.flush_bundle()
+            for future in self.pending:
+                future.result()
+        except Exception as e:
+            raise DataOutputError(
+                "Unable to output the generated documents to destination path"
+            ) from e
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
@@ -1,16 +1,11 @@
 from journey_providers.helper_functions import days, minutes
-import random
 from mimesis.providers.date import Datetime
-from mimesis.providers.generic import Generic
 
 from document_providers.starfleet_account import StarfleetAccount
 from document_providers.starfleet_application import StarfleetApplication
 from journey_providers.journey_provider import JourneyProvider
 
 
-fake = Generic("en-GB")
-
-
 class StarfleetJourney(JourneyProvider):
 
     name = "starfleet"
@@ -19,7 +14,7 @@ class StarfleetJourney(JourneyProvider):
 
         # 1. User creates an account
         # Generate a random account document
-        account_document = StarfleetAccount().generate()
+        account_document = self.generate_document(StarfleetAccount)
 
         # Set the users account id as the user_id uuid we generated so we correlate the documents
         account_document["id"] = str(self.user_id)
@@ -33,11 +28,12 @@ class StarfleetJourney(JourneyProvider):
         updated_account_step = 0
 
         # Random number of attempts between 1 and 10
-        for i in range(random.randint(1, 10)):
+        for i in range(self.random.randint(1, 10)):
             updated_account_document["auth"]["logins"].append(
                 {
                     "timestamp": str(
-                            fake.datetime.date(
+                            self.generate_value(
+                                "datetime.date",
                                 start=Datetime.CURRENT_YEAR - 1,
                                 end=Datetime.CURRENT_YEAR,
                             )
@@ -45,17 +41,19 @@ class StarfleetJourney(JourneyProvider):
                 }
             )
 
-            # Add the step with a delay + the delay from account step (as log-ins happen after that)
+            # Add the step with a delay + the delay from account step (as log-ins happen after that), based on the
+            # previous account step, as only the logins have changed
             updated_account_step = self.add_step(
                 StarfleetAccount,
                 updated_account_document,
                 delay=[minutes(1), days(1)],
                 delay_from_step_index=updated_account_step,
+                base_step_index=updated_account_step,
             )
 
         # ==========================================================================
         # 3. User then submits the completed claim which generates a starfleet_application document
-        application_document = StarfleetApplication().generate()
+        application_document = self.generate_document(StarfleetApplication)
 
         # Replace sumbission claimant details with generated ones
         application_document["accountId"] = str(self.user_id)
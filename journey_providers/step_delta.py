@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from zipfile import ZipFile
+
+from generate_errors import DataGenerationError
+from generate_serializer import dumps, loads
+
+
+# Number of materialized delta steps kept, so a chain of deltas is patched forward from the last step rather than
+# from the full document every time
+MATERIALIZED_CACHE_SIZE = 1024
+
+
+def escape_pointer(key: str) -> str:
+    """
+    Escapes an object key for use in a JSON Pointer (RFC 6901)
+    """
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff_documents(base, document, path: str = "") -> list:
+    """
+    Returns the JSON Patch (RFC 6902) operations turning base into document
+
+    Objects are compared key by key and lists item by item (items appended to a list are added to its end, so a
+    list that only grew is patched with just the new items); anything else that changed is replaced
+    """
+    if isinstance(base, dict) and isinstance(document, dict):
+        patch = []
+        for key, value in base.items():
+            pointer = f"{path}/{escape_pointer(key)}"
+            if key in document:
+                patch.extend(diff_documents(value, document[key], pointer))
+            else:
+                patch.append({"op": "remove", "path": pointer})
+
+        for key, value in document.items():
+            if key not in base:
+                patch.append({"op": "add", "path": f"{path}/{escape_pointer(key)}", "value": value})
+
+        return patch
+
+    if isinstance(base, list) and isinstance(document, list):
+        patch = []
+        for index in range(min(len(base), len(document))):
+            patch.extend(diff_documents(base[index], document[index], f"{path}/{index}"))
+
+        # Remove items from the end first, so the indices of the ones before stay the same
+        for index in range(len(base) - 1, len(document) - 1, -1):
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+        for value in document[len(base):]:
+            patch.append({"op": "add", "path": f"{path}/-", "value": value})
+
+        return patch
+
+    # Compare types too, as True == 1 == 1.0
+    if type(base) is type(document) and base == document:
+        return []
+
+    return [{"op": "replace", "path": path, "value": document}]
+
+
+def apply_patch(document, patch: list):
+    """
+    Applies the add, remove and replace operations of a JSON Patch (RFC 6902) to document in place, returning the
+    patched document (which is a new one if the whole document was replaced)
+    """
+    for operation in patch:
+        op = operation["op"]
+        path = operation["path"]
+
+        if not path:
+            if op not in ("add", "replace"):
+                raise DataGenerationError(f"Unable to apply {op} to the whole document")
+            document = operation["value"]
+            continue
+
+        # Walk down to the object or list holding the target
+        parent_path, _, token = path.rpartition("/")
+        parent = document
+        for parent_token in parent_path.split("/")[1:]:
+            parent = parent[int(parent_token)] if isinstance(parent, list) else parent[unescape_pointer(parent_token)]
+
+        if isinstance(parent, list):
+            if op == "add":
+                if token == "-":
+                    parent.append(operation["value"])
+                else:
+                    parent.insert(int(token), operation["value"])
+            elif op == "replace":
+                parent[int(token)] = operation["value"]
+            elif op == "remove":
+                del parent[int(token)]
+            else:
+                raise DataGenerationError(f"Unsupported JSON Patch operation: {op}")
+        else:
+            key = unescape_pointer(token)
+            if op in ("add", "replace"):
+                parent[key] = operation["value"]
+            elif op == "remove":
+                del parent[key]
+            else:
+                raise DataGenerationError(f"Unsupported JSON Patch operation: {op}")
+
+    return document
+
+
+class StepMaterializer:
+    """
+    Reads the full step documents of published journeys, rebuilding delta-encoded steps (stored as a JSON Patch
+    against their journey's baseStep) by patching forward from the nearest full or already materialized step
+
+    Journeys with delta-encoded steps are registered by their metadata (see add_journey); steps of any other
+    journey are read as they are
+    """
+
+    def __init__(self, cache_size: int = MATERIALIZED_CACHE_SIZE):
+        # The base step file name of each delta-encoded step, by (zip path, file name)
+        self.bases = {}
+
+        # Materialized delta steps by (zip path, file name), least recently used first
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def add_journey(self, zip_path: str, metadata: dict):
+        """
+        Registers the delta-encoded steps of a journey published to zip_path (its own zip, or a bundle)
+        """
+        steps = metadata["steps"]
+        for step in steps:
+            if "baseStep" in step:
+                self.bases[(zip_path, step["fileName"])] = steps[step["baseStep"]]["fileName"]
+
+    def read(self, zip: ZipFile, file_name: str) -> bytes:
+        """
+        Returns the full (serialized) document of a step in an open journey zip
+        """
+        key = (zip.filename, file_name)
+        if key not in self.bases:
+            return zip.read(file_name)
+
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache.move_to_end(key)
+            return data
+
+        try:
+            # Walk back to the nearest full (or materialized) step, then patch forward from it
+            patches = []
+            name = file_name
+            while True:
+                base_key = (zip.filename, name)
+                if base_key in self.cache:
+                    document = loads(self.cache[base_key])
+                    break
+                if base_key not in self.bases:
+                    document = loads(zip.read(name))
+                    break
+
+                patches.append(name)
+                name = self.bases[base_key]
+
+            for name in reversed(patches):
+                document = apply_patch(document, loads(zip.read(name)))
+        except Exception as e:
+            raise DataGenerationError(f"Unable to materialize journey step {file_name}") from e
+
+        data = dumps(document)
+        self.cache[key] = data
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return data
+
+
+def materialize_journey(zip: ZipFile, metadata: dict):
+    """
+    Yields the (file name, full serialized document) of each of a journey's steps, in step order, from its open
+    zip (or bundle)
+    """
+    materializer = StepMaterializer()
+    materializer.add_journey(zip.filename, metadata)
+
+    for step in metadata["steps"]:
+        yield step["fileName"], materializer.read(zip, step["fileName"])
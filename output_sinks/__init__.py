@@ -0,0 +1,56 @@
+from io import UnsupportedOperation
+from typing import TYPE_CHECKING
+
+from generate_registry import ProviderRegistry, lazy_attribute
+
+if TYPE_CHECKING:
+    from .output_sink import OutputSink
+
+
+# Output sinks by format name, each imported only once it's selected; other packages can add sinks through the
+# data_generator.output_sinks entry point group
+output_sink_mapping = ProviderRegistry(
+    "data_generator.output_sinks",
+    {
+        "json-files": "output_sinks.json_files:JsonFilesSink",
+        "jsonl": "output_sinks.jsonl:JsonlSink",
+        "http": "output_sinks.http_upload:HttpUploadSink",
+        "stdout": "output_sinks.stream:StdoutSink",
+        "pipe": "output_sinks.stream:NamedPipeSink",
+        "socket": "output_sinks.stream:SocketSink",
+        "parquet": "output_sinks.arrow:ParquetSink",
+        "arrow": "output_sinks.arrow:ArrowSink",
+    },
+)
+
+# Classes importable from the package, loaded from their modules on first use
+lazy_attributes = {
+    "OutputSink": "output_sinks.output_sink",
+    "JsonFilesSink": "output_sinks.json_files",
+    "JsonlSink": "output_sinks.jsonl",
+    "HttpUploadSink": "output_sinks.http_upload",
+    "StreamSink": "output_sinks.stream",
+    "StdoutSink": "output_sinks.stream",
+    "NamedPipeSink": "output_sinks.stream",
+    "SocketSink": "output_sinks.stream",
+    "ColumnarSink": "output_sinks.arrow",
+    "ParquetSink": "output_sinks.arrow",
+    "ArrowSink": "output_sinks.arrow",
+}
+
+
+def __getattr__(name: str):
+    return lazy_attribute(__name__, lazy_attributes, name)
+
+
+def select_output_sink(format_name: str, output_path: str, document_name: str, **options) -> "OutputSink":
+    """ Returns an instance of an output sink writing documents to output_path, given the format_name """
+
+    try:
+        output_sink = output_sink_mapping[format_name.casefold()]
+    except KeyError:
+        raise UnsupportedOperation(
+            f"Unsupported output format specified: {format_name}"
+        )
+
+    return output_sink(output_path, document_name, **options)
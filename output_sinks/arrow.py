@@ -0,0 +1,222 @@
+import os
+from importlib.util import find_spec
+
+from generate_errors import DataOutputError
+from generate_serializer import loads
+from output_sinks.output_sink import OutputSink
+
+
+# pyarrow is an optional dependency and slow to import, so it's only imported once a columnar sink is created (or a
+# provider's schema is declared), see import_pyarrow
+pa = None
+
+# Number of documents buffered into each record batch (written as a row group of a Parquet file)
+RECORD_BATCH_SIZE = 10000
+
+
+def pyarrow_available() -> bool:
+    """
+    Returns whether pyarrow is installed, without importing it
+    """
+    return find_spec("pyarrow") is not None
+
+
+def import_pyarrow():
+    """
+    Imports pyarrow for the columnar sinks, the first time it's used, returning the module
+    """
+    global pa
+    if pa is not None:
+        return pa
+
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+        raise DataOutputError(
+            "Parquet and Arrow output require pyarrow, install it with: pip install pyarrow"
+        )
+
+    pa = pyarrow
+    return pa
+
+
+class ColumnarSink(OutputSink):
+    """
+    Base class for sinks that buffer documents into Arrow record batches of batch_size documents, writing each
+    batch to {name}_{shard}.{extension} files of up to shard_size documents as soon as it's full, so only one
+    batch is ever held in memory
+
+    The shard a document lands in is derived from its index in the run (index // shard_size), as for jsonl
+
+    Batches are converted with the schema given (see DocumentProvider.arrow_schema), or without one, with the
+    schema inferred from the first batch written to each shard
+    """
+
+    sharded = True
+    columnar = True
+    extension = None
+
+    # Codecs the format can compress its columns with
+    compressions = ()
+
+    def __init__(
+        self,
+        output_path: str,
+        document_name: str,
+        shard_size: int = 100000,
+        batch_size: int = RECORD_BATCH_SIZE,
+        schema=None,
+        compression: str = None,
+        compression_level: int = None,
+        compression_dictionary: bytes = None,
+    ):
+        # Columnar formats compress their own columns, so the compression isn't applied to the files as a whole
+        super().__init__(output_path, document_name, shard_size)
+        if compression is not None and compression not in self.compressions:
+            raise DataOutputError(f"{self.name} output can't be compressed with {compression}")
+        if compression_dictionary is not None:
+            raise DataOutputError(f"{self.name} output can't be compressed with a dictionary")
+
+        import_pyarrow()
+        self.batch_size = batch_size
+        self.schema = schema
+        self.compression = compression
+        self.compression_level = compression_level
+
+        self.rows = []
+        self.shard_index = None
+        self.shard_schema = None
+        self.shard_file = None
+        self.writer = None
+
+        # Bytes written across every shard, and the end of what's been counted of the shard being written
+        self.written_bytes = 0
+        self.shard_position = 0
+
+    def shard_path(self, shard_index: int) -> str:
+        return os.path.join(self.output_path, f"{self.document_name}_{shard_index}.{self.extension}")
+
+    def open_writer(self, shard_file, schema):
+        """
+        Returns a writer of record batches with the schema to the shard file
+        """
+        raise NotImplementedError()
+
+    def write_batch(self, batch):
+        """
+        Writes a record batch to the shard's writer
+        """
+        self.writer.write_batch(batch)
+
+    def write(self, index: int, document: dict):
+        # Rotate to the next shard file once the index moves past the current one
+        shard_index = index // self.shard_size
+        if shard_index != self.shard_index:
+            self.close()
+            self.shard_index = shard_index
+
+        self.rows.append(document)
+        if len(self.rows) >= self.batch_size:
+            self.flush_batch()
+
+    def write_serialized(self, index: int, data: bytes):
+        self.write(index, loads(data))
+
+    def write_item(self, index: int, item) -> int:
+        written_bytes = self.written_bytes
+        self.write(index, item)
+        return self.written_bytes - written_bytes
+
+    def flush(self) -> int:
+        written_bytes = self.written_bytes
+        self.flush_batch()
+        return self.written_bytes - written_bytes
+
+    def flush_batch(self):
+        """
+        Converts the buffered documents into a record batch and writes it, opening the shard's file first if needed
+        """
+        if not self.rows:
+            return
+
+        try:
+            batch = pa.RecordBatch.from_pylist(self.rows, schema=self.shard_schema or self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise DataOutputError(
+                f"Unable to convert the documents into columns of the {self.shard_schema or 'declared'} schema "
+                "(documents that vary in shape need their provider to declare an arrow_schema)"
+            ) from e
+
+        if self.writer is None:
+            self.shard_schema = batch.schema
+            self.shard_file = pa.OSFile(self.shard_path(self.shard_index), "wb")
+            self.shard_position = 0
+            self.writer = self.open_writer(self.shard_file, batch.schema)
+
+        self.write_batch(batch)
+        self.rows = []
+        self.count_written_bytes()
+
+    def count_written_bytes(self):
+        position = self.shard_file.tell()
+        self.written_bytes += position - self.shard_position
+        self.shard_position = position
+
+    def close(self):
+        self.flush_batch()
+
+        if self.writer is not None:
+            # Closing the writer writes the file's footer
+            self.writer.close()
+            self.count_written_bytes()
+            self.shard_file.close()
+            self.writer = None
+            self.shard_file = None
+
+        self.shard_index = None
+        self.shard_schema = None
+
+
+class ParquetSink(ColumnarSink):
+    """
+    Writes documents into {name}_{shard}.parquet files, each record batch as a row group
+
+    Columns are compressed with snappy by default, or with gzip or zstd at the compression level given
+    """
+
+    name = "parquet"
+    extension = "parquet"
+    compressions = ("gzip", "zstd")
+
+    def open_writer(self, shard_file, schema):
+        return pa.parquet.ParquetWriter(
+            shard_file,
+            schema,
+            compression=self.compression or "snappy",
+            compression_level=self.compression_level,
+        )
+
+    def write_batch(self, batch):
+        self.writer.write_batch(batch, row_group_size=len(batch))
+
+
+class ArrowSink(ColumnarSink):
+    """
+    Writes documents into {name}_{shard}.arrow files in the Arrow IPC file format (also known as Feather V2),
+    which can be memory mapped rather than read
+
+    Record batches are uncompressed by default, or compressed with zstd
+    """
+
+    name = "arrow"
+    extension = "arrow"
+    compressions = ("zstd",)
+
+    def open_writer(self, shard_file, schema):
+        compression = None
+        if self.compression is not None:
+            compression = pa.Codec("zstd", self.compression_level)
+
+        return pa.ipc.new_file(shard_file, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
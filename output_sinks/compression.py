@@ -0,0 +1,141 @@
+import gzip
+import io
+from importlib.util import find_spec
+from io import UnsupportedOperation
+
+from generate_errors import DataOutputError
+
+
+# zstandard is an optional dependency, so it's only imported once zstd compression is used (see import_zstandard),
+# keeping it out of the CLI's startup
+zstandard = None
+
+
+# Write buffer for compressed files, so data is compressed in large blocks rather than document by document
+COMPRESSION_BUFFER_SIZE = 1024 * 1024
+
+
+def zstandard_available() -> bool:
+    """
+    Returns whether zstandard is installed, without importing it
+    """
+    return find_spec("zstandard") is not None
+
+
+def import_zstandard():
+    """
+    Imports zstandard for zstd compression, the first time it's used, returning the module
+    """
+    global zstandard
+    if zstandard is not None:
+        return zstandard
+
+    try:
+        import zstandard as module
+    except ImportError:  # pragma: no cover - zstandard is an optional dependency
+        raise DataOutputError(
+            "zstd compression requires zstandard, install it with: pip install zstandard"
+        )
+
+    zstandard = module
+    return zstandard
+
+
+class Compression:
+    """
+    Base class for compressing output, either streamed into a file or one document at a time
+    """
+
+    name = None
+    extension = None
+    default_level = None
+
+    # Compression levels the codec takes
+    levels = None
+
+    def __init__(self, level: int = None, dictionary: bytes = None):
+        self.level = self.default_level if level is None else level
+        self.dictionary = dictionary
+
+    def open(self, path: str):
+        """
+        Opens path for writing, stream-compressing everything written to it
+        """
+        raise NotImplementedError()
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses a whole document on its own
+        """
+        raise NotImplementedError()
+
+
+class GzipCompression(Compression):
+    name = "gzip"
+    extension = "gz"
+    default_level = 6
+    levels = range(0, 10)
+
+    def __init__(self, level: int = None, dictionary: bytes = None):
+        if dictionary is not None:
+            raise DataOutputError("Compression dictionaries are only supported by zstd")
+
+        super().__init__(level, dictionary)
+
+    def open(self, path: str):
+        # mtime is fixed so the same documents always compress to the same bytes
+        return io.BufferedWriter(gzip.GzipFile(path, "wb", self.level, mtime=0), COMPRESSION_BUFFER_SIZE)
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, self.level, mtime=0)
+
+
+class ZstdCompression(Compression):
+    """
+    Zstandard compression, optionally with a dictionary trained on documents like those being compressed (see
+    train_zstd_dictionary), which mostly pays off when compressing documents one at a time
+    """
+
+    name = "zstd"
+    extension = "zst"
+    default_level = 3
+    levels = range(1, 23)
+
+    def __init__(self, level: int = None, dictionary: bytes = None):
+        import_zstandard()
+        super().__init__(level, dictionary)
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+        self.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+
+    def open(self, path: str):
+        return io.BufferedWriter(self.compressor.stream_writer(open(path, "wb")), COMPRESSION_BUFFER_SIZE)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+
+compression_mapping = {
+    GzipCompression.name: GzipCompression,
+    ZstdCompression.name: ZstdCompression
+}
+
+
+def select_compression(compression_name: str, level: int = None, dictionary: bytes = None) -> Compression:
+    """ Returns an instance of a compression, given the compression_name """
+
+    try:
+        compression = compression_mapping[compression_name.casefold()]
+    except KeyError:
+        raise UnsupportedOperation(
+            f"Unsupported compression specified: {compression_name}"
+        )
+
+    return compression(level, dictionary)
+
+
+def train_zstd_dictionary(samples: list, size: int = 32 * 1024) -> bytes:
+    """
+    Trains a zstd dictionary of up to size bytes on samples of serialized documents
+    """
+    import_zstandard()
+    return zstandard.train_dictionary(size, samples).as_bytes()
@@ -0,0 +1,34 @@
+from generate_errors import DataOutputError
+from generate_http import HttpUploader
+from output_sinks.output_sink import OutputSink
+
+
+class HttpUploadSink(OutputSink):
+    """
+    Uploads each document as a {name}/{name}_{index}.json blob under upload_url while generation carries on,
+    rather than writing it to local disk
+
+    Uploads are PUT (blob storage style, so upload_url can be a container URL with a SAS token) with at most
+    upload_concurrency in flight, and retried with backoff; closing the sink waits for every upload to complete
+    """
+
+    name = "http"
+    remote = True
+
+    def __init__(
+        self, output_path: str, document_name: str, shard_size: int = 100000, upload_url=None, upload_concurrency=32
+    ):
+        super().__init__(output_path, document_name, shard_size)
+
+        if not upload_url:
+            raise DataOutputError("An upload URL is required to output documents over HTTP")
+
+        self.uploader = HttpUploader(upload_url, upload_concurrency)
+
+    def write_serialized(self, index: int, data: bytes):
+        self.uploader.upload(f"{self.document_name}/{self.document_name}_{index}.json", data, "application/json")
+
+    def close(self):
+        if self.uploader is not None:
+            self.uploader.close()
+            self.uploader = None
@@ -0,0 +1,23 @@
+import os
+
+from output_sinks.output_sink import OutputSink
+
+
+class JsonFilesSink(OutputSink):
+    """
+    Writes each document to its own {name}_{index}.json file
+
+    When compressed, each document is compressed on its own into a {name}_{index}.json.{extension} file, which is
+    where a zstd dictionary makes the most difference
+    """
+
+    name = "json-files"
+
+    def write_serialized(self, index: int, data: bytes):
+        file_name = f"{self.document_name}_{index}.json"
+        if self.compression is not None:
+            file_name += f".{self.compression.extension}"
+            data = self.compression.compress(data)
+
+        with open(os.path.join(self.output_path, file_name), "wb") as fp:
+            fp.write(data)
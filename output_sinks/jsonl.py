@@ -0,0 +1,56 @@
+import os
+
+from output_sinks.output_sink import OutputSink
+
+
+# Write buffer for shard files, so documents are flushed to disk in large blocks rather than one by one
+SHARD_BUFFER_SIZE = 1024 * 1024
+
+
+class JsonlSink(OutputSink):
+    """
+    Streams documents as JSON lines into {name}_{shard}.jsonl files of up to shard_size documents each
+
+    The shard a document lands in is derived from its index in the run (index // shard_size), so shard
+    names are the same however the run is split between workers
+
+    When compressed, each shard is stream-compressed into a {name}_{shard}.jsonl.{extension} file
+    """
+
+    name = "jsonl"
+    sharded = True
+    extension = "jsonl"
+
+    def __init__(self, output_path: str, document_name: str, shard_size: int = 100000, **compression_options):
+        super().__init__(output_path, document_name, shard_size, **compression_options)
+        if self.compression is not None:
+            self.extension = f"{self.extension}.{self.compression.extension}"
+
+        self.shard_index = None
+        self.shard_file = None
+
+    def shard_path(self, shard_index: int) -> str:
+        return os.path.join(self.output_path, f"{self.document_name}_{shard_index}.{self.extension}")
+
+    def open_shard(self, shard_index: int):
+        if self.compression is not None:
+            return self.compression.open(self.shard_path(shard_index))
+
+        return open(self.shard_path(shard_index), "wb", buffering=SHARD_BUFFER_SIZE)
+
+    def write_serialized(self, index: int, data: bytes):
+        # Rotate to the next shard file once the index moves past the current one
+        shard_index = index // self.shard_size
+        if shard_index != self.shard_index:
+            self.close()
+            self.shard_file = self.open_shard(shard_index)
+            self.shard_index = shard_index
+
+        self.shard_file.write(data)
+        self.shard_file.write(b"\n")
+
+    def close(self):
+        if self.shard_file is not None:
+            self.shard_file.close()
+            self.shard_file = None
+            self.shard_index = None
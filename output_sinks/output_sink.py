@@ -0,0 +1,87 @@
+import os
+
+from generate_serializer import dumps
+from output_sinks.compression import select_compression
+
+
+class OutputSink:
+    """
+    Base class for writing generated documents to an output destination
+    """
+
+    name = None
+
+    # Sinks that group documents into shards need every worker's chunk of indices to start on a shard boundary
+    # so that no two workers ever write to the same file
+    sharded = False
+
+    # Sinks that upload documents rather than writing them to output_path need an upload_url
+    remote = False
+
+    # Sinks that stream documents in the order they're written to a single target (i.e. stdout or a socket),
+    # rather than to files under output_path, need a target, and can only be written to by a single process
+    streaming = False
+
+    # Columnar sinks (i.e. Parquet) convert the documents themselves into batches of columns, so the pipeline
+    # passes documents to them as they are, rather than serializing them first
+    columnar = False
+
+    def __init__(
+        self,
+        output_path: str,
+        document_name: str,
+        shard_size: int = 100000,
+        compression: str = None,
+        compression_level: int = None,
+        compression_dictionary: bytes = None,
+    ):
+        self.output_path = output_path
+        self.document_name = document_name
+        self.shard_size = shard_size
+
+        # Optionally compress the output, adding the compression's extension to file names
+        self.compression = None
+        if compression is not None:
+            self.compression = select_compression(compression, compression_level, compression_dictionary)
+
+        # Create the folder if it doesn't already exist (parallel workers may race to create it)
+        if not self.streaming:
+            os.makedirs(self.output_path, exist_ok=True)
+
+    def write(self, index: int, document: dict):
+        """
+        Serializes and writes the document at the given index of the run
+        """
+        self.write_serialized(index, dumps(document))
+
+    def write_serialized(self, index: int, data: bytes):
+        """
+        Writes an already serialized (JSON bytes) document at the given index of the run
+        """
+        raise NotImplementedError()
+
+    def write_item(self, index: int, item) -> int:
+        """
+        Writes an item from the pipeline's write stage (the document serialized, or for columnar sinks the document
+        itself), returning the number of bytes written to the output
+        """
+        self.write_serialized(index, item)
+        return len(item)
+
+    def flush(self) -> int:
+        """
+        Writes out anything the sink buffers, returning the number of bytes written to the output
+        """
+        return 0
+
+    def close(self):
+        """
+        Flushes and releases anything held open by the sink
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
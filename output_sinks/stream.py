@@ -0,0 +1,118 @@
+import os
+import socket
+import stat
+import sys
+
+from generate_errors import DataOutputError
+from output_sinks.output_sink import OutputSink
+
+
+class StreamSink(OutputSink):
+    """
+    Streams documents as JSON lines to a binary stream, in the order they're written
+
+    Each document is flushed as soon as it's written, so a reader (i.e. a load test) receives documents at the
+    rate they're generated rather than in blocks
+    """
+
+    streaming = True
+
+    # Whether the stream is opened to a --target (a pipe path or socket address)
+    needs_target = True
+
+    def __init__(self, output_path: str, document_name: str, shard_size: int = 100000, target=None):
+        super().__init__(output_path, document_name, shard_size)
+        self.target = target
+        self.stream = self.open_stream()
+
+    def open_stream(self):
+        """
+        Opens the binary stream to write documents to
+        """
+        raise NotImplementedError()
+
+    def write_serialized(self, index: int, data: bytes):
+        self.stream.write(data)
+        self.stream.write(b"\n")
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            finally:
+                self.stream = None
+
+
+class StdoutSink(StreamSink):
+    """
+    Streams documents as JSON lines to standard output, i.e. to pipe them into another program
+    """
+
+    name = "stdout"
+    needs_target = False
+
+    def open_stream(self):
+        return sys.stdout.buffer
+
+    def close(self):
+        # Standard output is flushed, but left open
+        if self.stream is not None:
+            self.stream.flush()
+            self.stream = None
+
+
+class NamedPipeSink(StreamSink):
+    """
+    Streams documents as JSON lines into the named pipe (FIFO) at target, creating it if it doesn't exist
+
+    Opening a named pipe blocks until a reader opens the other end of it
+    """
+
+    name = "pipe"
+
+    def open_stream(self):
+        if not self.target:
+            raise DataOutputError("A named pipe path (--target) is required to output documents to a pipe")
+
+        try:
+            if not os.path.exists(self.target):
+                os.mkfifo(self.target)
+            elif not stat.S_ISFIFO(os.stat(self.target).st_mode):
+                raise DataOutputError(f"Unable to output documents to {self.target}, as it isn't a named pipe")
+
+            return open(self.target, "wb")
+        except OSError as e:
+            raise DataOutputError(f"Unable to open the named pipe {self.target}") from e
+
+
+class SocketSink(StreamSink):
+    """
+    Streams documents as JSON lines over a socket connected to target: host:port for TCP, or unix:path for a Unix
+    domain socket
+    """
+
+    name = "socket"
+
+    def open_stream(self):
+        if not self.target:
+            raise DataOutputError("A socket address (--target) is required to output documents to a socket")
+
+        try:
+            if self.target.startswith("unix:"):
+                self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.socket.connect(self.target[len("unix:"):])
+            else:
+                host, _, port = self.target.rpartition(":")
+                self.socket = socket.create_connection((host, int(port)))
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, ValueError) as e:
+            raise DataOutputError(f"Unable to connect to the socket {self.target}") from e
+
+        return self.socket.makefile("wb")
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.socket.close()
@@ -0,0 +1,42 @@
+from io import UnsupportedOperation
+from typing import TYPE_CHECKING
+
+from generate_registry import ProviderRegistry, lazy_attribute
+
+if TYPE_CHECKING:
+    from .replay_sink import ReplaySink
+
+
+# Replay sinks by name, each imported only once it's selected; other packages can add sinks through the
+# data_generator.replay_sinks entry point group
+replay_sink_mapping = ProviderRegistry(
+    "data_generator.replay_sinks",
+    {
+        "directory": "replay_sinks.directory:DirectorySink",
+        "http": "replay_sinks.http:HttpSink",
+    },
+)
+
+# Classes importable from the package, loaded from their modules on first use
+lazy_attributes = {
+    "ReplaySink": "replay_sinks.replay_sink",
+    "DirectorySink": "replay_sinks.directory",
+    "HttpSink": "replay_sinks.http",
+}
+
+
+def __getattr__(name: str):
+    return lazy_attribute(__name__, lazy_attributes, name)
+
+
+def select_replay_sink(sink_name: str, target: str, **options) -> "ReplaySink":
+    """ Returns an instance of a replay sink publishing step documents to target, given the sink_name """
+
+    try:
+        replay_sink = replay_sink_mapping[sink_name.casefold()]
+    except KeyError:
+        raise UnsupportedOperation(
+            f"Unsupported replay sink specified: {sink_name}"
+        )
+
+    return replay_sink(target, **options)
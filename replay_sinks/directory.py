@@ -0,0 +1,20 @@
+import os
+
+from replay_sinks.replay_sink import ReplaySink
+
+
+class DirectorySink(ReplaySink):
+    """
+    Publishes each step document as a file in a local directory, as a stand-in for a watched landing zone
+    """
+
+    name = "directory"
+
+    def __init__(self, target: str, concurrency: int = 100):
+        super().__init__(target, concurrency)
+        os.makedirs(self.target, exist_ok=True)
+
+    async def emit(self, file_name: str, data: bytes):
+        # Small local writes don't block the event loop for long enough to be worth handing to a thread
+        with open(os.path.join(self.target, file_name), "wb") as fp:
+            fp.write(data)
@@ -0,0 +1,27 @@
+from generate_errors import DataOutputError
+from generate_http import AsyncHttpClient
+from replay_sinks.replay_sink import ReplaySink
+
+
+class HttpSink(ReplaySink):
+    """
+    Publishes each step document with a PUT to {target}/{file name}, i.e. to a local stand-in for an ingestion API
+    """
+
+    name = "http"
+
+    def __init__(self, target: str, concurrency: int = 100):
+        super().__init__(target.rstrip("/"), concurrency)
+
+        # One pooled keep-alive connection per step document in flight
+        self.client = AsyncHttpClient(concurrency)
+
+    async def emit(self, file_name: str, data: bytes):
+        response = await self.client.request(
+            "PUT", f"{self.target}/{file_name}", data, {"Content-Type": "application/json"}
+        )
+        if not response.ok:
+            raise DataOutputError(f"Publishing {file_name} failed with HTTP status {response.status}")
+
+    async def close(self):
+        await self.client.close()
@@ -0,0 +1,24 @@
+class ReplaySink:
+    """
+    Base class for destinations that replayed journey step documents are published to
+    """
+
+    name = None
+
+    def __init__(self, target: str, concurrency: int = 100):
+        self.target = target
+
+        # Maximum number of step documents being published at once
+        self.concurrency = concurrency
+
+    async def emit(self, file_name: str, data: bytes):
+        """
+        Publishes a step document (its file name within the journey's zip, and its serialized JSON)
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        """
+        Releases anything held open by the sink, once the replay is done
+        """
+        pass
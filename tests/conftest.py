@@ -0,0 +1,52 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Accepts PUT requests over keep-alive connections, recording each body by its path
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            status = self.server.failures.pop(0) if self.server.failures else 201
+            if status < 300:
+                self.server.received[self.path] = body
+
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_http_server():
+    """
+    Runs a local HTTP server in a thread, standing in for an ingestion API or blob storage
+
+    Statuses added to server.failures are returned (in order) instead of success, to test retries
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.received = {}
+    server.failures = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,55 @@
+import re
+import uuid
+import pytest
+from document_providers import StarfleetApplication, StarfleetAccount
+from document_providers.columnar import ColumnarBackend
+
+
+# The columnar backend is optional, so only test it where numpy is installed
+pytest.importorskip("numpy")
+
+
+def test_columnar_backend_fills_masks():
+
+    values = ColumnarBackend().masked("@@###@@@#@###@", 100)
+
+    assert len(values) == 100
+    assert all(re.fullmatch(r"[A-Z]{2}\d{3}[A-Z]{3}\d[A-Z]\d{3}[A-Z]", value) for value in values)
+
+
+def test_columnar_backend_generates_valid_uuids_and_dates():
+
+    columns = ColumnarBackend()
+
+    assert all(uuid.UUID(value).version == 4 for value in columns.uuids(100))
+    assert all(re.fullmatch(r"229[23]-\d{2}-\d{2}", value) for value in columns.dates(2292, 2293, 100))
+
+
+def test_columnar_backend_is_reproducible_with_a_seed():
+
+    assert ColumnarBackend(seed=42).integers(1, 10, 20) == ColumnarBackend(seed=42).integers(1, 10, 20)
+
+
+def test_columnar_starfleet_application_matches_row_wise_structure():
+
+    row_document = StarfleetApplication().generate()
+    columnar_documents = StarfleetApplication(columnar=True).generate_many(5)
+
+    for document in columnar_documents:
+        assert document.keys() == row_document.keys()
+        assert document["details"].keys() == row_document["details"].keys()
+        assert 1 <= len(document["record"]) <= 10
+        for record in document["record"]:
+            assert record.keys() == row_document["record"][0].keys()
+            assert 1 <= len(record["comments"]) <= 10
+
+
+def test_columnar_starfleet_account_batches_span_quantity():
+
+    provider = StarfleetAccount(columnar=True)
+    provider.batch_size = 4
+
+    documents = provider.generate_many(10)
+
+    # Documents should be generated across batches up to the exact quantity, each with a unique id
+    assert len({document["id"] for document in documents}) == 10
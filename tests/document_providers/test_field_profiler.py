@@ -0,0 +1,25 @@
+from document_providers import StarfleetApplication
+
+
+def test_field_profiler_counts_calls_per_provider_path():
+    provider = StarfleetApplication()
+    profiler = provider.profile_fields()
+
+    provider.generate_many(3)
+    report = profiler.report()
+
+    # Every application has an id and an account id
+    assert report["cryptographic.uuid"]["calls"] == 6
+    assert report["person.telephone"]["calls"] == 3
+    assert all(counters["seconds"] >= 0 for counters in report.values())
+
+    # The most expensive paths should come first
+    seconds = [counters["seconds"] for counters in report.values()]
+    assert seconds == sorted(seconds, reverse=True)
+
+
+def test_profiled_documents_are_the_same_as_unprofiled_ones():
+    profiled = StarfleetApplication(seed=42)
+    profiled.profile_fields()
+
+    assert profiled.generate_many(5) == StarfleetApplication(seed=42).generate_many(5)
@@ -0,0 +1,43 @@
+import pytest
+from mimesis.exceptions import UnsupportedField
+from mimesis.schema import Field
+from document_providers import StarfleetApplication, StarfleetAccount
+from document_providers.schema_plan import SchemaPlan
+
+
+def test_schema_plan_binds_provider_methods():
+
+    plan = SchemaPlan(Field("en-GB"), {})
+
+    assert plan("numbers.integer_number", start=5, end=5) == 5
+    assert plan("numbers.integer_number", key=str, start=5, end=5) == "5"
+
+    # The resolved path should be recorded so other plans can bind it up front
+    assert plan.resolved_paths == {"numbers.integer_number": ("numbers", "integer_number")}
+    assert "numbers.integer_number" in SchemaPlan(Field("en-GB"), plan.resolved_paths).methods
+
+
+def test_schema_plan_leaves_unplannable_names_to_the_field():
+
+    plan = SchemaPlan(Field("en-GB"), {})
+
+    with pytest.raises(UnsupportedField):
+        plan("warp_drive")
+
+
+def test_resolved_paths_are_shared_per_provider_class():
+
+    StarfleetAccount().generate()
+
+    assert StarfleetAccount.resolved_paths is StarfleetAccount().plan.resolved_paths
+    assert "person.last_name" in StarfleetAccount.resolved_paths
+    assert StarfleetApplication.resolved_paths is not StarfleetAccount.resolved_paths
+
+
+def test_planned_documents_vary_in_length():
+
+    provider = StarfleetApplication()
+    record_lengths = {len(provider.generate()["record"]) for _ in range(50)}
+
+    # The record for-loop is re-run for each document, so records should vary in length
+    assert len(record_lengths) > 1
@@ -0,0 +1,34 @@
+import pytest
+from document_providers import StarfleetApplication, StarfleetAccount
+
+
+def test_seeded_documents_are_the_same_however_the_run_is_split():
+
+    whole_run = StarfleetApplication(seed=42).generate_many(20)
+    chunk = StarfleetApplication(seed=42).generate_many(5, start=10)
+
+    # Document i should only depend on the seed and i, not on what was generated before it
+    assert chunk == whole_run[10:15]
+
+
+def test_seeded_documents_differ_between_seeds_and_indices():
+
+    first_run = StarfleetAccount(seed=1).generate_many(2)
+    second_run = StarfleetAccount(seed=2).generate_many(2)
+
+    assert first_run[0] != first_run[1]
+    assert first_run[0] != second_run[0]
+
+
+def test_seeded_columnar_documents_are_the_same_however_the_run_is_split():
+    pytest.importorskip("numpy")
+
+    provider = StarfleetApplication(seed=42, columnar=True)
+    provider.batch_size = 8
+    whole_run = provider.generate_many(20)
+
+    provider = StarfleetApplication(seed=42, columnar=True)
+    provider.batch_size = 8
+
+    # Chunks starting mid-batch should still match the whole run
+    assert provider.generate_many(7, start=5) == whole_run[5:12]
@@ -45,3 +45,46 @@ def test_starfleet_application_document_generates_output():
     # If the document was generated correctly, random valid UUID should have been generated
     # for the "accountId" field
     assert uuid.UUID(generated_document["accountId"]).hex
+
+
+def test_starfleet_application_documents_generate_lazily():
+
+    documents = StarfleetApplication().iter_generate(3)
+
+    # Nothing should be generated until the documents are iterated over
+    assert iter(documents) is documents
+    assert len([uuid.UUID(document["id"]) for document in documents]) == 3
+
+
+def test_starfleet_application_generates_many_documents():
+
+    documents = StarfleetApplication().generate_many(5)
+
+    # Each document should be distinct
+    assert len({document["id"] for document in documents}) == 5
+
+
+class BulkStarfleetApplication(StarfleetApplication):
+    """
+    Overrides iter_generate with the signature documented for custom providers
+    """
+
+    def iter_generate(self, quantity):
+        self.overridden_quantities.append(quantity)
+        return super().iter_generate(quantity)
+
+
+def test_overridden_iter_generate_generates_chunks_of_a_run():
+
+    provider = BulkStarfleetApplication()
+    provider.overridden_quantities = []
+
+    # Unseeded chunks go through the override, whatever their start
+    assert len(provider.generate_many(5, start=10)) == 5
+    assert provider.overridden_quantities == [5]
+
+    # Seeded documents are derived from their index in the run, so a chunk matches the whole run
+    provider = BulkStarfleetApplication(seed=42)
+    provider.overridden_quantities = []
+    whole_run = provider.generate_many(20)
+    assert provider.generate_many(5, start=10) == whole_run[10:15]
@@ -0,0 +1,53 @@
+from io import UnsupportedOperation
+
+import pytest
+from document_providers import StarfleetApplication
+from document_providers.value_pool import create_value_pools
+
+
+def test_value_pool_draws_from_pre_generated_values():
+    pool = create_value_pools(["person.title"], "en-GB", size=5, refresh=0)["person.title"]
+
+    values = {pool.draw() for _ in range(100)}
+
+    # Every value should come from the pool
+    assert values <= set(pool.default_pool)
+    assert len(pool.default_pool) == 5
+
+
+def test_value_pool_keeps_a_pool_per_set_of_arguments():
+    pool = create_value_pools(["numbers.integer_number"], "en-GB", size=10, refresh=0)["numbers.integer_number"]
+
+    assert all(1 <= pool.draw(start=1, end=3) <= 3 for _ in range(50))
+    assert all(10 <= pool.draw(start=10, end=12) <= 12 for _ in range(50))
+    assert len(pool.pools) == 2
+
+
+def test_value_pool_refreshes_values():
+    pool = create_value_pools(["text.sentence"], "en-GB", size=10, refresh=0.5)["text.sentence"]
+    pool.draw()
+    filled = list(pool.default_pool)
+
+    for _ in range(100):
+        pool.draw()
+
+    # About half of the draws should have evicted a pooled value for a fresh one
+    assert pool.default_pool != filled or len(set(filled)) == 1
+
+
+def test_pooled_seeded_documents_are_the_same_however_the_run_is_split():
+    pooled_paths = ("text.sentence", "person.title", "numbers.integer_number")
+
+    whole_run = StarfleetApplication(seed=42, pooled_paths=pooled_paths).generate_many(20)
+    chunk = StarfleetApplication(seed=42, pooled_paths=pooled_paths).generate_many(5, start=10)
+
+    assert chunk == whole_run[10:15]
+    assert whole_run[0] != whole_run[1]
+
+
+def test_unique_and_unknown_paths_cannot_be_pooled():
+    with pytest.raises(UnsupportedOperation):
+        StarfleetApplication(pooled_paths=("cryptographic.uuid",))
+
+    with pytest.raises(UnsupportedOperation):
+        StarfleetApplication(pooled_paths=("person.nonexistent",))
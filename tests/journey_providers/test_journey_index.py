@@ -0,0 +1,54 @@
+from journey_providers.journey_index import JourneyIndex
+
+
+def journey_metadata(user_id: str, delays: list, document_types: list) -> dict:
+    return {
+        "userId": user_id,
+        "journeyName": "starfleet",
+        "steps": [
+            {"fileName": f"{delay}.{document_type}.{index}.{user_id}.json", "delay": delay}
+            for index, (delay, document_type) in enumerate(zip(delays, document_types))
+        ],
+    }
+
+
+def test_journey_index_selects_journeys_by_steps_duration_and_document_type(tmpdir):
+    with JourneyIndex(str(tmpdir.join("journeys.sqlite"))) as journey_index:
+        journey_index.add_journeys(
+            [
+                ("a.zip", journey_metadata("a", [0, 60, 120], ["account", "account", "application"])),
+                ("bundle_0.zip", journey_metadata("b", [0, 30], ["account", "account"])),
+                ("bundle_0.zip", journey_metadata("c", [0, 600], ["account", "application"])),
+            ]
+        )
+
+        # Re-adding a journey replaces it, rather than indexing it twice
+        journey_index.add_journeys([("a.zip", journey_metadata("a", [0, 60, 120], ["account", "account", "application"]))])
+
+        assert journey_index.query(count=True) == 3
+        assert [journey["userId"] for journey in journey_index.query(min_steps=3)] == ["a"]
+        assert [journey["userId"] for journey in journey_index.query(max_duration=100)] == ["b"]
+        assert [journey["userId"] for journey in journey_index.query(document_type="application")] == ["a", "c"]
+        assert [journey["userId"] for journey in journey_index.query(document_type="application", max_delay=300)] == ["a"]
+        assert journey_index.query(user_id="c") == [
+            {
+                "userId": "c",
+                "journeyName": "starfleet",
+                "archive": "bundle_0.zip",
+                "metadataFile": "starfleet.c.metadata.json",
+                "steps": 2,
+                "duration": 600,
+            }
+        ]
+        assert len(journey_index.query(limit=2)) == 2
+
+
+def test_journey_index_replaces_every_step_of_a_journey_indexed_again(tmpdir):
+    with JourneyIndex(str(tmpdir.join("journeys.sqlite"))) as journey_index:
+        journey_index.add_journeys([("a.zip", journey_metadata("a", [0, 60, 600], ["account", "account", "application"]))])
+        journey_index.add_journeys([("a.zip", journey_metadata("a", [0, 60], ["account", "account"]))])
+
+        # The steps the journey no longer has shouldn't match queries
+        assert journey_index.query(document_type="application") == []
+        assert journey_index.query(min_delay=300) == []
+        assert [journey["steps"] for journey in journey_index.query()] == [2]
@@ -1,3 +1,6 @@
+import json
+import os
+from zipfile import ZipFile
 from document_providers.document_provider import DocumentProvider
 from journey_providers import JourneyProvider
 
@@ -39,3 +42,24 @@ def test_journey_provider_final_step(tmpdir):
 
     # Final step should be the one with the highest delay - step index 2 (6000s)
     assert fake_journey.final_step() == 2
+
+
+def test_journey_provider_publishes_in_memory_steps(tmpdir):
+
+    fake_journey = FakeJourneyProvider(str(tmpdir), in_memory=True)
+    fake_journey.add_step(FakeDocumentProvider, fake_document)
+    fake_journey.add_step(FakeDocumentProvider, fake_document, delay=[30, 30])
+    fake_journey.publish_journey(str(tmpdir))
+
+    # No staging directory should be created, only the zip and metadata files
+    assert not os.path.exists(fake_journey.output_path)
+    assert set(os.listdir(tmpdir)) == {
+        f"fake_journey_provider.{fake_journey.user_id}.zip",
+        f"fake_journey_provider.{fake_journey.user_id}.metadata.json",
+    }
+
+    # Zipped steps should be named as in the metadata and contain the documents
+    with ZipFile(tmpdir.join(f"fake_journey_provider.{fake_journey.user_id}.zip")) as zip:
+        file_names = [step["fileName"] for step in fake_journey.journey_metadata["steps"]]
+        assert zip.namelist() == file_names
+        assert json.loads(zip.read(file_names[1])) == fake_document
@@ -0,0 +1,51 @@
+from zipfile import ZIP_DEFLATED, ZipFile
+from journey_providers import StarfleetJourney
+from journey_providers.journey_publisher import JourneyPublisher
+
+
+def test_publisher_compresses_journey_zips_on_a_thread_pool(tmpdir):
+    publisher = JourneyPublisher(str(tmpdir), "deflated", 9, zip_threads=2)
+
+    journeys = []
+    for i in range(3):
+        journey = StarfleetJourney(str(tmpdir), in_memory=True)
+        journey.create_journey()
+        publisher.publish(i, journey)
+        journeys.append(journey)
+    publisher.close()
+
+    # Every journey should have its own compressed zip and metadata file
+    for journey in journeys:
+        assert tmpdir.join(journey.metadata_file_name).exists()
+        with ZipFile(tmpdir.join(journey.zip_file_name)) as zip:
+            assert [info.compress_type for info in zip.infolist()] == [ZIP_DEFLATED] * len(journey.journey_metadata["steps"])
+
+
+def test_publisher_bundles_journeys_by_index(tmpdir):
+    publisher = JourneyPublisher(str(tmpdir), bundle_size=2)
+
+    for i in range(4, 7):
+        journey = StarfleetJourney(str(tmpdir))
+        journey.create_journey()
+        publisher.publish(i, journey)
+    publisher.close()
+
+    # Journeys 4 and 5 share bundle 2, and journey 6 starts bundle 3, with no staging directories left behind
+    assert sorted(tmpdir.listdir(), key=str) == [tmpdir.join("starfleet_2.zip"), tmpdir.join("starfleet_3.zip")]
+
+
+def test_publisher_reports_each_bundle_as_it_is_written(tmpdir):
+    written = []
+    publisher = JourneyPublisher(str(tmpdir), bundle_size=2, on_written=written.append)
+
+    for i in range(3):
+        journey = StarfleetJourney(str(tmpdir), in_memory=True)
+        journey.create_journey()
+        publisher.publish(i, journey)
+
+        # The first bundle should be reported as soon as the next one is started, before the publisher is closed
+        if i == 2:
+            assert written == ["starfleet_0.zip"]
+    publisher.close()
+
+    assert written == ["starfleet_0.zip", "starfleet_1.zip"]
@@ -15,3 +15,17 @@ def test_starfleet_journey_generates_valid_jsons(tmpdir):
 
             # JSONs should contain the correct documents for starfleet
             assert json.load(json_file)
+
+
+def test_seeded_starfleet_journeys_are_reproducible(tmpdir):
+
+    journeys = []
+    for _ in range(2):
+        starfleet = StarfleetJourney(str(tmpdir), in_memory=True, seed=7)
+        starfleet.create_journey()
+        journeys.append(starfleet)
+
+    # The user id, steps and documents should all be the same for the same seed
+    assert journeys[0].user_id == journeys[1].user_id
+    assert journeys[0].journey_metadata == journeys[1].journey_metadata
+    assert journeys[0].step_files == journeys[1].step_files
@@ -0,0 +1,53 @@
+import copy
+import json
+from zipfile import ZipFile
+
+from journey_providers import StarfleetJourney
+from journey_providers.step_delta import StepMaterializer, apply_patch, diff_documents, materialize_journey
+
+
+def test_diff_and_apply_round_trip():
+    base = {"id": "a", "auth": {"logins": [{"at": 1}]}, "a/b": 1, "gone": True, "flag": 1, "tags": ["x", "y", "z"]}
+    document = {"id": "b", "auth": {"logins": [{"at": 1}, {"at": 2}]}, "a/b": 2, "new": None, "flag": True, "tags": ["x"]}
+
+    patch = diff_documents(base, document)
+    assert apply_patch(copy.deepcopy(base), patch) == document
+
+    # A list that only grew is patched with just its new items
+    assert diff_documents(base["auth"], document["auth"]) == [{"op": "add", "path": "/logins/-", "value": {"at": 2}}]
+    assert diff_documents(base, base) == []
+
+
+def test_diff_replaces_the_whole_document_when_its_type_changes():
+    patch = diff_documents({"a": 1}, [1])
+    assert patch == [{"op": "replace", "path": "", "value": [1]}]
+    assert apply_patch({"a": 1}, patch) == [1]
+
+
+def test_delta_steps_are_materialized_to_the_full_documents(tmpdir):
+    journeys = []
+    for delta_steps in (False, True):
+        journey = StarfleetJourney(str(tmpdir), in_memory=True, seed=3, delta_steps=delta_steps)
+        journey.create_journey()
+        journey.publish_journey(str(tmpdir.mkdir(f"delta_{delta_steps}")))
+        journeys.append(journey)
+
+    full, delta = journeys
+    zip_path = str(tmpdir.join("delta_True", delta.zip_file_name))
+
+    # Every login step should be stored as a patch against the account step before it
+    assert [step.get("baseStep") for step in delta.journey_metadata["steps"][1:-1]] == list(
+        range(len(delta.journey_metadata["steps"]) - 2)
+    )
+
+    with ZipFile(str(tmpdir.join("delta_False", full.zip_file_name))) as full_zip, ZipFile(zip_path) as delta_zip:
+        assert sum(info.file_size for info in delta_zip.infolist()) < sum(info.file_size for info in full_zip.infolist())
+
+        materialized = list(materialize_journey(delta_zip, delta.journey_metadata))
+        assert [name for name, _ in materialized] == [step["fileName"] for step in full.journey_metadata["steps"]]
+        for name, data in materialized:
+            assert json.loads(data) == json.loads(full_zip.read(name))
+
+        # A materializer without the journey registered reads the steps as they are stored
+        last_login = delta.journey_metadata["steps"][-2]["fileName"]
+        assert isinstance(json.loads(StepMaterializer().read(delta_zip, last_login)), list)
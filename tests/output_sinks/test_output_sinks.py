@@ -0,0 +1,157 @@
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import pytest
+from generate_errors import DataOutputError
+from output_sinks import (
+    select_output_sink, JsonFilesSink, JsonlSink, HttpUploadSink, NamedPipeSink, SocketSink, ParquetSink, ArrowSink
+)
+from output_sinks.compression import train_zstd_dictionary
+
+
+fake_document = {"id": "foo", "class": "bar"}
+
+
+def test_output_sink_format_names_are_resolved_correctly(tmpdir):
+
+    assert type(select_output_sink("json-files", str(tmpdir), "fake")) == JsonFilesSink
+    assert type(select_output_sink("jsonl", str(tmpdir), "fake")) == JsonlSink
+
+
+def test_json_files_sink_writes_one_file_per_document(tmpdir):
+
+    with JsonFilesSink(str(tmpdir), "fake") as sink:
+        for i in range(3):
+            sink.write(i, fake_document)
+
+    assert set(os.listdir(tmpdir)) == {"fake_0.json", "fake_1.json", "fake_2.json"}
+
+
+def test_jsonl_sink_rotates_shards_by_index(tmpdir):
+
+    with JsonlSink(str(tmpdir), "fake", shard_size=2) as sink:
+        for i in range(5):
+            sink.write(i, fake_document)
+
+    # Five documents in shards of two should produce three shard files
+    assert set(os.listdir(tmpdir)) == {"fake_0.jsonl", "fake_1.jsonl", "fake_2.jsonl"}
+
+    with open(tmpdir.join("fake_1.jsonl")) as shard:
+        lines = shard.read().splitlines()
+
+    # Every line should be a complete JSON document
+    assert [json.loads(line) for line in lines] == [fake_document, fake_document]
+
+
+def test_http_upload_sink_uploads_one_blob_per_document(stub_http_server, tmpdir):
+
+    with HttpUploadSink(str(tmpdir), "fake", upload_url=stub_http_server.url + "/container", upload_concurrency=2) as sink:
+        for i in range(3):
+            sink.write(i, fake_document)
+
+    # Every document should have been uploaded by the time the sink is closed
+    assert {path: json.loads(body) for path, body in stub_http_server.received.items()} == {
+        f"/container/fake/fake_{i}.json": fake_document for i in range(3)
+    }
+
+
+def test_jsonl_sink_stream_compresses_shards(tmpdir):
+
+    with JsonlSink(str(tmpdir), "fake", shard_size=2, compression="gzip") as sink:
+        for i in range(3):
+            sink.write(i, fake_document)
+
+    assert set(os.listdir(tmpdir)) == {"fake_0.jsonl.gz", "fake_1.jsonl.gz"}
+    with gzip.open(tmpdir.join("fake_0.jsonl.gz")) as shard:
+        assert [json.loads(line) for line in shard] == [fake_document, fake_document]
+
+
+def test_json_files_sink_compresses_each_document_with_a_zstd_dictionary(tmpdir):
+    zstandard = pytest.importorskip("zstandard")
+    samples = [json.dumps({"id": i, "class": "bar", "rank": "Ensign"}).encode() for i in range(200)]
+    dictionary = train_zstd_dictionary(samples, 1024)
+
+    with JsonFilesSink(str(tmpdir), "fake", compression="zstd", compression_dictionary=dictionary) as sink:
+        sink.write(0, fake_document)
+
+    # The document should only be readable with the dictionary it was compressed with
+    decompressor = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(dictionary))
+    assert json.loads(decompressor.decompress(tmpdir.join("fake_0.json.zst").read_binary())) == fake_document
+
+
+def test_socket_sink_streams_json_lines(tmpdir):
+    server = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def receive():
+        connection, _ = server.accept()
+        with connection, connection.makefile("rb") as stream:
+            received.extend(json.loads(line) for line in stream)
+
+    receiver = threading.Thread(target=receive)
+    receiver.start()
+
+    with SocketSink(str(tmpdir), "fake", target=f"127.0.0.1:{server.getsockname()[1]}") as sink:
+        for i in range(3):
+            sink.write(i, fake_document)
+
+    receiver.join()
+    server.close()
+    assert received == [fake_document] * 3
+
+
+def test_named_pipe_sink_creates_the_pipe(tmpdir):
+    pipe_path = str(tmpdir.join("documents.pipe"))
+    received = []
+
+    def receive():
+        # Wait for the sink to create the pipe
+        while not os.path.exists(pipe_path):
+            time.sleep(0.01)
+        with open(pipe_path, "rb") as stream:
+            received.extend(json.loads(line) for line in stream)
+
+    receiver = threading.Thread(target=receive)
+    receiver.start()
+
+    with NamedPipeSink(str(tmpdir), "fake", target=pipe_path) as sink:
+        for i in range(3):
+            sink.write(i, fake_document)
+
+    receiver.join()
+    assert received == [fake_document] * 3
+
+
+def test_stream_sinks_need_a_target(tmpdir):
+    with pytest.raises(DataOutputError):
+        SocketSink(str(tmpdir), "fake")
+
+
+def test_parquet_sink_writes_a_row_group_per_record_batch(tmpdir):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    document = {"id": "foo", "details": {"rank": "Ensign"}, "record": [{"comments": ["bar", "baz"]}]}
+
+    with ParquetSink(str(tmpdir), "fake", shard_size=5, batch_size=2) as sink:
+        for i in range(7):
+            sink.write(i, document)
+
+    # Five documents in batches of two should make three row groups in the first shard, and the rest the second
+    assert set(os.listdir(tmpdir)) == {"fake_0.parquet", "fake_1.parquet"}
+    shard = parquet.ParquetFile(str(tmpdir.join("fake_0.parquet")))
+    assert shard.metadata.num_row_groups == 3
+
+    # Nested documents and lists should round trip as structs and lists
+    assert shard.read().to_pylist() == [document] * 5
+
+
+def test_arrow_sink_rejects_documents_not_matching_the_schema(tmpdir):
+    pytest.importorskip("pyarrow")
+
+    # Without a declared schema, an empty list can only be inferred as a list of nulls
+    with pytest.raises(DataOutputError):
+        with ArrowSink(str(tmpdir), "fake", batch_size=1) as sink:
+            sink.write(0, {"logins": []})
+            sink.write(1, {"logins": ["foo"]})
@@ -0,0 +1,30 @@
+import asyncio
+import os
+from replay_sinks import select_replay_sink, DirectorySink, HttpSink
+
+
+def test_replay_sink_names_are_resolved_correctly(tmpdir):
+
+    assert type(select_replay_sink("directory", str(tmpdir))) == DirectorySink
+    assert type(select_replay_sink("http", "http://localhost")) == HttpSink
+
+
+def test_directory_sink_writes_each_step_to_a_file(tmpdir):
+    sink = DirectorySink(str(tmpdir.join("replay")))
+
+    asyncio.run(sink.emit("0.fake.0.json", b"{}"))
+
+    assert os.listdir(tmpdir.join("replay")) == ["0.fake.0.json"]
+
+
+def test_http_sink_puts_each_step_to_the_target(stub_http_server):
+    sink = HttpSink(stub_http_server.url + "/documents/", concurrency=2)
+
+    async def emit_all():
+        await asyncio.gather(*[sink.emit(f"{i}.fake.{i}.json", b'{"id":%d}' % i) for i in range(5)])
+        await sink.close()
+
+    asyncio.run(emit_all())
+
+    # Every step should arrive at its own path under the target
+    assert stub_http_server.received == {f"/documents/{i}.fake.{i}.json": b'{"id":%d}' % i for i in range(5)}
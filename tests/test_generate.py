@@ -1,8 +1,14 @@
 import json
 import os
+import pstats
+from zipfile import ZIP_DEFLATED, ZipFile
 from click.testing import CliRunner
 import pytest
+from document_providers import document_provider_mapping
+from journey_providers import journey_provider_mapping
+from output_sinks import output_sink_mapping
 from generate import cli
+from generate_manifest import RunManifest
 
 
 runner = CliRunner()
@@ -87,3 +93,666 @@ def test_generate_journey_rejects_invalid_journey(tmpdir):
     )
     # Should return a usage error
     assert response.exit_code == 2
+
+
+def test_generate_document_with_workers_outputs_contiguous_files(tmpdir):
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_account",
+            "--quantity",
+            10,
+            "--workers",
+            3,
+        ],
+    )
+    assert response.exit_code == 0
+
+    # Every index should be written exactly once, regardless of which worker generated it
+    file_names = set(os.listdir(tmpdir.join("starfleet_account")))
+    assert file_names == {f"starfleet_account_{i}.json" for i in range(10)}
+
+
+def test_generate_journey_with_workers_publishes_every_journey(tmpdir):
+    response = runner.invoke(
+        cli,
+        [
+            "journey",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet",
+            "--quantity",
+            6,
+            "--workers",
+            3,
+        ],
+    )
+    assert response.exit_code == 0
+
+    # Each journey should be published as a zip and metadata file, with no staging directories left behind
+    file_names = os.listdir(tmpdir)
+    assert len([name for name in file_names if name.endswith(".zip")]) == 6
+    assert len([name for name in file_names if name.endswith(".metadata.json")]) == 6
+    assert len(file_names) == 12
+
+
+def test_generate_document_jsonl_shards_with_workers(tmpdir):
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_account",
+            "--quantity",
+            25,
+            "--workers",
+            2,
+            "--format",
+            "jsonl",
+            "--shard-size",
+            10,
+        ],
+    )
+    assert response.exit_code == 0
+
+    # Shards should be filled by index, whichever worker wrote them
+    directory = tmpdir.join("starfleet_account")
+    line_counts = {}
+    for file in os.listdir(directory):
+        with open(directory.join(file)) as shard:
+            line_counts[file] = len([json.loads(line) for line in shard])
+
+    assert line_counts == {"starfleet_account_0.jsonl": 10, "starfleet_account_1.jsonl": 10, "starfleet_account_2.jsonl": 5}
+
+
+def test_generate_document_parquet_matches_jsonl(tmpdir):
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    documents = {}
+    for output_format in ["jsonl", "parquet"]:
+        output_path = tmpdir.mkdir(output_format)
+        response = runner.invoke(
+            cli,
+            [
+                "document",
+                "--output_path",
+                str(output_path),
+                "--provider",
+                "starfleet_application",
+                "--quantity",
+                25,
+                "--format",
+                output_format,
+                "--record-batch-size",
+                10,
+                "--seed",
+                42,
+            ],
+        )
+        assert response.exit_code == 0
+        documents[output_format] = output_path.join("starfleet_application", f"starfleet_application_0.{output_format}")
+
+    # Seeded documents written as Parquet should read back the same as written as JSON lines
+    with open(documents["jsonl"]) as shard:
+        assert parquet.read_table(str(documents["parquet"])).to_pylist() == [json.loads(line) for line in shard]
+
+
+def test_generate_journey_staged_in_memory(tmpdir):
+    response = runner.invoke(
+        cli,
+        ["journey", "--output_path", str(tmpdir), "--provider", "starfleet", "--quantity", 2, "--staging", "memory"],
+    )
+    assert response.exit_code == 0
+
+    # Only the published zip and metadata files should be written
+    assert len(os.listdir(tmpdir)) == 4
+
+
+def test_generate_document_with_columnar_backend(tmpdir):
+    pytest.importorskip("numpy")
+
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_application",
+            "--quantity",
+            3,
+            "--backend",
+            "columnar",
+        ],
+    )
+    assert response.exit_code == 0
+    assert len(os.listdir(tmpdir.join("starfleet_application"))) == 3
+
+
+def test_bench_writes_results_for_every_provider_and_format(tmpdir):
+    results_file = tmpdir.join("bench.json")
+
+    response = runner.invoke(
+        cli, ["bench", "--quantity", 5, "--journeys", 2, "--results_file", str(results_file)]
+    )
+    assert response.exit_code == 0
+
+    with open(results_file) as fp:
+        results = json.load(fp)
+
+    assert set(results["document_providers"]) == set(document_provider_mapping)
+    assert set(results["journey_providers"]) == set(journey_provider_mapping)
+    assert set(results["output_formats"]) == {name for name in output_sink_mapping if not output_sink_mapping[name].streaming}
+    assert results["document_providers"]["starfleet_account"]["mimesis"]["quantity"] == 5
+
+
+def test_generate_document_with_seed_is_the_same_whatever_the_workers(tmpdir):
+    outputs = []
+    for workers in [1, 3]:
+        output_path = tmpdir.mkdir(f"workers_{workers}")
+        response = runner.invoke(
+            cli,
+            [
+                "document",
+                "--output_path",
+                str(output_path),
+                "--provider",
+                "starfleet_application",
+                "--quantity",
+                7,
+                "--workers",
+                workers,
+                "--seed",
+                42,
+            ],
+        )
+        assert response.exit_code == 0
+
+        directory = output_path.join("starfleet_application")
+        outputs.append({file: directory.join(file).read() for file in os.listdir(directory)})
+
+    assert outputs[0] == outputs[1]
+
+
+def test_generate_document_resume_skips_completed_chunks(tmpdir):
+    # Checkpoint the first of two chunks, as an interrupted run would have
+    manifest = RunManifest.open(
+        str(tmpdir.join("starfleet_account", ".starfleet_account.manifest.json")),
+        {"provider": "starfleet_account", "quantity": 4, "format": "json-files", "shard_size": 100000,
+         "compress": None, "compress_level": None, "zstd_dictionary": False, "backend": "mimesis", "seed": None, "upload_url": None},
+        [(0, 2), (2, 4)],
+    )
+    manifest.complete((0, 2))
+
+    response = runner.invoke(
+        cli,
+        ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--quantity", 4, "--resume"],
+    )
+    assert response.exit_code == 0
+
+    # Only the chunk that hadn't completed should be generated, and the manifest removed once the run completes
+    assert sorted(os.listdir(tmpdir.join("starfleet_account"))) == ["starfleet_account_2.json", "starfleet_account_3.json"]
+
+
+def test_generate_journey_cleans_up_interrupted_staging(tmpdir):
+    tmpdir.mkdir(".staging-starfleet").mkdir("chunk-interrupted").join("starfleet.half-written.zip").write("")
+    tmpdir.mkdir(".staging-starfleet.shard-1-of-2").mkdir("chunk-in-flight")
+
+    response = runner.invoke(
+        cli,
+        ["journey", "--output_path", str(tmpdir), "--provider", "starfleet", "--quantity", 2],
+    )
+    assert response.exit_code == 0
+
+    # The interrupted run's staging directory should be gone, leaving the published journeys and the staging of
+    # other runs sharing the output path
+    assert len(os.listdir(tmpdir)) == 5
+    assert os.listdir(tmpdir.join(".staging-starfleet.shard-1-of-2")) == ["chunk-in-flight"]
+
+
+def test_generate_journey_resume_removes_published_chunks_it_did_not_checkpoint(tmpdir, monkeypatch):
+    monkeypatch.setattr("generate.JOURNEYS_PER_CHECKPOINT", 2)
+    complete = RunManifest.complete
+
+    def interrupted_complete(manifest, chunk):
+        # Interrupt the run after the second chunk's journeys are published, but before it's checkpointed
+        if tuple(chunk) == (2, 4):
+            raise KeyboardInterrupt()
+        complete(manifest, chunk)
+
+    monkeypatch.setattr(RunManifest, "complete", interrupted_complete)
+    options = ["journey", "--output_path", str(tmpdir), "--provider", "starfleet", "--quantity", 6]
+    response = runner.invoke(cli, options)
+    assert response.exit_code != 0
+    assert len([name for name in os.listdir(tmpdir) if name.endswith(".zip")]) == 4
+
+    monkeypatch.setattr(RunManifest, "complete", complete)
+    response = runner.invoke(cli, [*options, "--resume"])
+    assert response.exit_code == 0
+
+    # The second chunk's journeys should have been replaced by those it was generated again with, not added to
+    published = os.listdir(tmpdir)
+    assert len([name for name in published if name.endswith(".zip")]) == 6
+    assert len([name for name in published if name.endswith(".metadata.json")]) == 6
+
+
+def test_replay_publishes_every_journey_step(tmpdir):
+    journeys_path = tmpdir.mkdir("journeys")
+    runner.invoke(
+        cli,
+        ["journey", "--output_path", str(journeys_path), "--provider", "starfleet", "--quantity", 3, "--seed", 1],
+    )
+
+    response = runner.invoke(
+        cli,
+        ["replay", "--input_path", str(journeys_path), "--target", str(tmpdir.join("replay")), "--speedup", 0],
+    )
+    assert response.exit_code == 0
+
+    # Every step file named in the journeys' metadata should have been published
+    step_files = set()
+    for file in os.listdir(journeys_path):
+        if file.endswith(".metadata.json"):
+            step_files.update(step["fileName"] for step in json.loads(journeys_path.join(file).read())["steps"])
+
+    assert set(os.listdir(tmpdir.join("replay"))) == step_files
+
+
+def test_generate_document_uploads_over_http_with_workers(tmpdir, stub_http_server):
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_account",
+            "--quantity",
+            6,
+            "--workers",
+            2,
+            "--format",
+            "http",
+            "--upload-url",
+            stub_http_server.url + "/documents?sig=secret",
+        ],
+    )
+    assert response.exit_code == 0
+
+    # Every document should be uploaded (keeping the URL's query), and none written locally
+    assert set(stub_http_server.received) == {
+        f"/documents/starfleet_account/starfleet_account_{i}.json?sig=secret" for i in range(6)
+    }
+    assert os.listdir(tmpdir.join("starfleet_account")) == []
+
+
+def test_generate_journey_uploads_over_http(tmpdir, stub_http_server):
+    response = runner.invoke(
+        cli,
+        ["journey", "--output_path", str(tmpdir), "--provider", "starfleet", "--quantity", 2,
+         "--upload-url", stub_http_server.url + "/journeys"],
+    )
+    assert response.exit_code == 0
+
+    # Each journey's zip and metadata should be uploaded rather than left in the output path
+    uploaded = list(stub_http_server.received)
+    assert len([path for path in uploaded if path.endswith(".zip")]) == 2
+    assert len([path for path in uploaded if path.endswith(".metadata.json")]) == 2
+    assert os.listdir(tmpdir) == []
+
+
+def test_generate_document_with_zstd_dictionary(tmpdir):
+    pytest.importorskip("zstandard")
+
+    response = runner.invoke(
+        cli,
+        ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--quantity", 2,
+         "--compress", "zstd", "--zstd-dictionary"],
+    )
+    assert response.exit_code == 0
+
+    # The dictionary should be saved alongside the compressed documents, to decompress them with
+    assert set(os.listdir(tmpdir.join("starfleet_account"))) == {
+        "starfleet_account.zstd-dict", "starfleet_account_0.json.zst", "starfleet_account_1.json.zst"
+    }
+
+
+def test_generate_journey_bundles_are_replayed(tmpdir):
+    journeys_path = tmpdir.mkdir("journeys")
+    response = runner.invoke(
+        cli,
+        ["journey", "--output_path", str(journeys_path), "--provider", "starfleet", "--quantity", 5, "--workers", 2,
+         "--bundle-size", 2, "--zip-compression", "deflated", "--zip-threads", 2],
+    )
+    assert response.exit_code == 0
+
+    # Journeys should be packed into bundles of two, by index
+    assert sorted(os.listdir(journeys_path)) == ["starfleet_0.zip", "starfleet_1.zip", "starfleet_2.zip"]
+    with ZipFile(journeys_path.join("starfleet_2.zip")) as bundle:
+        assert len([name for name in bundle.namelist() if name.endswith(".metadata.json")]) == 1
+        assert all(info.compress_type == ZIP_DEFLATED for info in bundle.infolist())
+
+    response = runner.invoke(
+        cli,
+        ["replay", "--input_path", str(journeys_path), "--target", str(tmpdir.join("replay")), "--speedup", 0],
+    )
+    assert response.exit_code == 0
+    assert "from 5 journeys" in response.output
+
+
+def test_generate_document_is_the_same_whatever_the_pipeline_depth(tmpdir):
+    outputs = []
+    for pipeline_depth in [0, 2]:
+        output_path = tmpdir.mkdir(f"depth_{pipeline_depth}")
+        response = runner.invoke(
+            cli,
+            [
+                "document",
+                "--output_path",
+                str(output_path),
+                "--provider",
+                "starfleet_application",
+                "--quantity",
+                250,
+                "--format",
+                "jsonl",
+                "--seed",
+                42,
+                "--pipeline-depth",
+                pipeline_depth,
+            ],
+        )
+        assert response.exit_code == 0
+        assert "Pipeline throughput (documents): generate" in response.output
+
+        directory = output_path.join("starfleet_application")
+        outputs.append({file: directory.join(file).read() for file in os.listdir(directory)})
+
+    assert outputs[0] == outputs[1]
+
+
+def test_generate_journey_writes_metrics_file(tmpdir):
+    metrics_file = tmpdir.join("metrics.json")
+    response = runner.invoke(
+        cli,
+        [
+            "journey",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet",
+            "--quantity",
+            3,
+            "--metrics-file",
+            str(metrics_file),
+        ],
+    )
+    assert response.exit_code == 0
+
+    metrics = json.loads(metrics_file.read())
+    assert metrics["items"] == 3
+    assert metrics["bytes"] > 0
+    assert set(metrics["stages"]) == {"generate", "zip"}
+    assert metrics["stages"]["zip"]["items"] == 3
+
+
+def test_generate_document_profiles_fields(tmpdir):
+    metrics_file = tmpdir.join("metrics.json")
+    profile_output = tmpdir.join("run.prof")
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_account",
+            "--quantity",
+            5,
+            "--profile",
+            "--profile-output",
+            str(profile_output),
+            "--metrics-file",
+            str(metrics_file),
+        ],
+    )
+    assert response.exit_code == 0
+    assert "Field profile" in response.output
+
+    metrics = json.loads(metrics_file.read())
+    assert all(counters["calls"] >= 5 for counters in metrics["fields"].values())
+    assert pstats.Stats(str(profile_output)).total_calls > 0
+
+
+def test_generate_document_profile_needs_a_single_worker(tmpdir):
+    response = runner.invoke(
+        cli,
+        ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--workers", 2, "--profile"],
+    )
+    assert response.exit_code == 2
+
+
+def test_generate_document_http_needs_an_upload_url(tmpdir):
+    response = runner.invoke(
+        cli, ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--format", "http"]
+    )
+    assert response.exit_code == 2
+
+    # The options should be rejected before a run manifest is written
+    assert not tmpdir.join("starfleet_account").exists()
+
+
+def test_generate_document_socket_needs_a_target(tmpdir):
+    response = runner.invoke(
+        cli, ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--format", "socket"]
+    )
+    assert response.exit_code == 2
+    assert "--target" in response.output
+
+
+def test_generate_document_rejects_out_of_range_compress_levels(tmpdir):
+    for compress, compress_level in [("gzip", 15), ("zstd", 0), ("zstd", 23)]:
+        response = runner.invoke(
+            cli,
+            [
+                "document",
+                "--output_path",
+                str(tmpdir),
+                "--provider",
+                "starfleet_account",
+                "--format",
+                "jsonl",
+                "--compress",
+                compress,
+                "--compress-level",
+                compress_level,
+            ],
+        )
+        assert response.exit_code == 2
+        assert "--compress-level" in response.output
+
+    assert os.listdir(tmpdir) == []
+
+
+def test_generate_document_compression_options_need_compress(tmpdir):
+    for option in [["--compress-level", 6], ["--zstd-dictionary"]]:
+        response = runner.invoke(
+            cli, ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", *option]
+        )
+        assert response.exit_code == 2
+        assert option[0] in response.output
+
+    assert os.listdir(tmpdir) == []
+
+
+def test_generate_journey_rejects_invalid_zip_levels(tmpdir):
+    for zip_compression, zip_level in [("deflated", 20), ("bzip2", 0), ("stored", 6), ("lzma", 6)]:
+        response = runner.invoke(
+            cli,
+            [
+                "journey",
+                "--output_path",
+                str(tmpdir),
+                "--provider",
+                "starfleet",
+                "--zip-compression",
+                zip_compression,
+                "--zip-level",
+                zip_level,
+            ],
+        )
+        assert response.exit_code == 2
+        assert "--zip-level" in response.output
+
+    # Nothing is generated (or staged) before the options are checked
+    assert os.listdir(tmpdir) == []
+
+
+def test_generate_document_with_pooled_fields(tmpdir):
+    response = runner.invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_application",
+            "--quantity",
+            3,
+            "--pool",
+            "text.sentence",
+            "--pool",
+            "person.title",
+            "--pool-size",
+            100,
+        ],
+    )
+    assert response.exit_code == 0
+    assert len(os.listdir(tmpdir.join("starfleet_application"))) == 3
+
+
+def test_generate_document_at_a_rate_to_stdout(tmpdir):
+    metrics_file = tmpdir.join("metrics.json")
+    response = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "document",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet_account",
+            "--format",
+            "stdout",
+            "--rate",
+            "200/s",
+            "--duration",
+            1,
+            "--metrics-file",
+            str(metrics_file),
+        ],
+    )
+    assert response.exit_code == 0
+    assert "against a target of 200/sec" in response.stderr
+
+    # Only documents are written to stdout, paced to the rate for the duration
+    documents = [json.loads(line) for line in response.stdout.splitlines()]
+    assert 150 <= len(documents) <= 200
+
+    metrics = json.loads(metrics_file.read())
+    assert metrics["pacing"]["documents"] == len(documents)
+    assert metrics["pacing"]["target_per_second"] == 200
+
+
+def test_generate_document_at_a_rate_needs_a_single_worker(tmpdir):
+    response = runner.invoke(
+        cli,
+        ["document", "--output_path", str(tmpdir), "--provider", "starfleet_account", "--workers", 2, "--rate", "10/s"],
+    )
+    assert response.exit_code == 2
+
+
+def test_replay_materializes_delta_steps(tmpdir):
+    for delta_steps in (False, True):
+        journeys_path = tmpdir.mkdir(f"journeys_{delta_steps}")
+        options = ["journey", "--output_path", str(journeys_path), "--provider", "starfleet", "--quantity", 3, "--seed", 1]
+        response = runner.invoke(cli, options + (["--delta-steps"] if delta_steps else []))
+        assert response.exit_code == 0
+
+        replay_path = str(tmpdir.join(f"replay_{delta_steps}"))
+        response = runner.invoke(cli, ["replay", "--input_path", str(journeys_path), "--target", replay_path, "--speedup", 0])
+        assert response.exit_code == 0
+
+    # Replaying delta steps should publish the same full documents
+    replayed = [
+        {file: json.loads(tmpdir.join(directory, file).read()) for file in os.listdir(tmpdir.join(directory))}
+        for directory in ("replay_False", "replay_True")
+    ]
+    assert replayed[0] == replayed[1]
+
+
+def test_generate_journey_index_is_queried(tmpdir):
+    response = runner.invoke(
+        cli,
+        [
+            "journey",
+            "--output_path",
+            str(tmpdir),
+            "--provider",
+            "starfleet",
+            "--quantity",
+            6,
+            "--workers",
+            2,
+            "--bundle-size",
+            2,
+            "--index",
+        ],
+    )
+    assert response.exit_code == 0
+
+    index_path = str(tmpdir.join("journeys.sqlite"))
+    response = runner.invoke(cli, ["journeys", "query", "--index", index_path, "--count"])
+    assert response.output.strip() == "6"
+
+    # Every journey should be found in the bundle it was published to
+    response = runner.invoke(cli, ["journeys", "query", "--index", index_path, "--min-steps", 3])
+    journeys = [json.loads(line) for line in response.output.splitlines()]
+    assert journeys
+    for journey in journeys:
+        with ZipFile(tmpdir.join(journey["archive"])) as bundle:
+            assert journey["metadataFile"] in bundle.namelist()
+            assert len(json.loads(bundle.read(journey["metadataFile"]))["steps"]) == journey["steps"] >= 3
+
+
+def test_generate_document_shards_match_a_single_run_and_merge(tmpdir):
+    options = ["--provider", "starfleet_account", "--quantity", 25, "--format", "jsonl", "--shard-size", 4, "--seed", 7]
+
+    single_path = tmpdir.mkdir("single")
+    assert runner.invoke(cli, ["document", "--output_path", str(single_path)] + options).exit_code == 0
+
+    sharded_path = tmpdir.mkdir("sharded")
+    for shard in ["0/3", "1/3", "2/3"]:
+        response = runner.invoke(cli, ["document", "--output_path", str(sharded_path), "--shard", shard] + options)
+        assert response.exit_code == 0
+
+    # The shards together should be the same documents, in the same files, as a single run
+    single_directory = single_path.join("starfleet_account")
+    sharded_directory = sharded_path.join("starfleet_account")
+    file_names = sorted(name for name in os.listdir(single_directory))
+    assert sorted(name for name in os.listdir(sharded_directory) if not name.startswith(".")) == file_names
+    for file_name in file_names:
+        assert sharded_directory.join(file_name).read() == single_directory.join(file_name).read()
+
+    # Merging the shards' manifests should leave nothing for the run to resume
+    response = runner.invoke(cli, ["merge-manifest", str(sharded_directory)])
+    assert response.exit_code == 0
+    manifest = RunManifest.load(str(sharded_directory.join(".starfleet_account.manifest.json")))
+    assert manifest.pending == []
+    assert manifest.completed_quantity == 25
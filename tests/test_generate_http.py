@@ -0,0 +1,45 @@
+import pytest
+from generate_errors import DataOutputError
+from generate_http import HttpUploader, redact_url
+
+
+def test_uploader_keeps_the_base_url_query_on_blob_urls():
+    uploader = HttpUploader("https://account.blob.core.windows.net/container/?sv=token&sig=abc")
+
+    try:
+        url = uploader.url("starfleet/starfleet_0.json")
+    finally:
+        uploader.close()
+
+    assert url == "https://account.blob.core.windows.net/container/starfleet/starfleet_0.json?sv=token&sig=abc"
+
+
+def test_redact_url_removes_secrets_in_the_query():
+
+    assert redact_url("https://account.blob.core.windows.net/container?sig=abc") == (
+        "https://account.blob.core.windows.net/container"
+    )
+
+
+def test_uploader_retries_failed_uploads(stub_http_server):
+    stub_http_server.failures = [503, 500]
+
+    with HttpUploader(stub_http_server.url + "/container", backoff=0.01) as uploader:
+        uploader.upload("blob.json", b"{}")
+
+    # The upload should have succeeded on its third attempt
+    assert stub_http_server.requests == ["/container/blob.json"] * 3
+    assert stub_http_server.received == {"/container/blob.json": b"{}"}
+    assert uploader.retried == 2
+
+
+def test_uploader_raises_uploads_that_cant_be_retried(stub_http_server):
+    stub_http_server.failures = [403]
+
+    uploader = HttpUploader(stub_http_server.url, backoff=0.01)
+    uploader.upload("blob.json", b"{}")
+
+    with pytest.raises(DataOutputError):
+        uploader.close()
+
+    assert stub_http_server.requests == ["/blob.json"]
@@ -0,0 +1,52 @@
+import pytest
+from generate_errors import DataGenerationError
+from generate_manifest import RunManifest
+
+
+def test_manifest_checkpoints_completed_chunks(tmpdir):
+    path = str(tmpdir.join(".run.manifest.json"))
+    manifest = RunManifest.open(path, {"quantity": 10}, [(0, 4), (4, 8), (8, 10)])
+
+    manifest.complete((4, 8))
+
+    # Reopening the manifest to resume should only leave the chunks that didn't complete
+    resumed = RunManifest.open(path, {"quantity": 10}, [], resume=True)
+    assert resumed.pending == [(0, 4), (8, 10)]
+    assert resumed.completed_quantity == 4
+
+
+def test_manifest_is_planned_afresh_without_resume(tmpdir):
+    path = str(tmpdir.join(".run.manifest.json"))
+    RunManifest.open(path, {"quantity": 10}, [(0, 10)]).complete((0, 10))
+
+    manifest = RunManifest.open(path, {"quantity": 10}, [(0, 5), (5, 10)])
+
+    assert manifest.pending == [(0, 5), (5, 10)]
+
+
+def test_manifest_refuses_to_resume_a_run_with_different_options(tmpdir):
+    path = str(tmpdir.join(".run.manifest.json"))
+    RunManifest.open(path, {"quantity": 10}, [(0, 10)])
+
+    with pytest.raises(DataGenerationError):
+        RunManifest.open(path, {"quantity": 20}, [(0, 20)], resume=True)
+
+
+def test_shard_manifests_merge_into_the_run_manifest(tmpdir):
+    shards = []
+    for index, chunks in enumerate([[(0, 4), (4, 8)], [(8, 10)]]):
+        path = str(tmpdir.join(f".run.shard-{index}-of-2.manifest.json"))
+        shards.append(RunManifest.open(path, {"quantity": 10, "shard": [index, 2]}, chunks))
+    shards[0].complete((0, 4))
+    shards[1].complete((8, 10))
+
+    path = str(tmpdir.join(".run.manifest.json"))
+    RunManifest.merge(path, shards)
+
+    # The merged manifest should resume the run as a whole, with the chunks no shard completed
+    resumed = RunManifest.open(path, {"quantity": 10}, [], resume=True)
+    assert resumed.pending == [(4, 8)]
+
+    # Every shard's manifest is needed
+    with pytest.raises(DataGenerationError):
+        RunManifest.merge(path, shards[:1])
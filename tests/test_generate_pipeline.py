@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from generate_pipeline import Pipeline, merge_stats
+
+
+@pytest.mark.parametrize("queue_size", [8, 0])
+def test_pipeline_passes_every_item_through_its_stages_in_order(queue_size):
+    written = []
+
+    with Pipeline([("double", lambda item: item * 2), ("write", written.append)], queue_size, batch_size=3) as pipeline:
+        for i in range(10):
+            pipeline.put(i)
+
+    assert written == [i * 2 for i in range(10)]
+
+    # Every stage should have counted every item
+    stats = pipeline.stats()
+    assert list(stats) == ["generate", "double", "write"]
+    assert all(counters["items"] == 10 for counters in stats.values())
+
+
+def test_pipeline_blocks_the_producer_once_its_queues_are_full():
+    release = threading.Event()
+    pipeline = Pipeline([("write", lambda item: release.wait())], queue_size=1, batch_size=1)
+
+    # The stage holds one item and the queue one more, so the producer can't put a third
+    pipeline.put(0)
+    pipeline.put(1)
+    producer = threading.Thread(target=pipeline.put, args=(2,), daemon=True)
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()
+
+    release.set()
+    producer.join(1)
+    pipeline.close()
+    assert pipeline.stats()["write"]["items"] == 3
+
+
+def test_pipeline_raises_stage_errors():
+    def fail(item):
+        if item == 5:
+            raise ValueError("Unable to write")
+
+    with pytest.raises(ValueError):
+        with Pipeline([("write", fail)], batch_size=2) as pipeline:
+            for i in range(100):
+                pipeline.put(i)
+
+
+def test_merge_stats_adds_up_counters():
+    stats = merge_stats({}, {"write": {"items": 10, "busy_seconds": 1.0, "blocked_seconds": 0.0}})
+    stats = merge_stats(stats, {"write": {"items": 30, "busy_seconds": 1.0, "blocked_seconds": 0.5}})
+
+    assert stats["write"]["items"] == 40
+    assert stats["write"]["blocked_seconds"] == 0.5
+    assert stats["write"]["per_second"] == 20
@@ -0,0 +1,40 @@
+import io
+
+from generate_progress import ProgressReporter, format_bytes, format_duration
+
+
+class TerminalStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_progress_is_rate_limited_on_a_terminal():
+    stream = TerminalStream()
+    progress = ProgressReporter(100000, "documents", stream=stream, updates_per_second=4)
+
+    for _ in range(100000):
+        progress.advance(written_bytes=10)
+
+    # Generating that many documents takes well under a second, so the line shouldn't have been redrawn for each
+    assert 1 <= stream.getvalue().count("\r") < 10
+    assert "ETA" in stream.getvalue()
+
+
+def test_progress_is_silent_until_finished_when_not_a_terminal():
+    stream = io.StringIO()
+    progress = ProgressReporter(10, "documents", completed=5, stream=stream)
+
+    for _ in range(5):
+        progress.advance(written_bytes=2000)
+    assert stream.getvalue() == ""
+
+    progress.finish()
+    assert stream.getvalue().startswith("Generated 5 documents (10.0 KB) in")
+    assert progress.metrics()["bytes"] == 10000
+
+
+def test_formats_sizes_and_durations():
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(12345678) == "12.3 MB"
+    assert format_duration(42) == "42s"
+    assert format_duration(3723) == "1h 02m 03s"
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from document_providers import select_document_provider
+from generate_serializer import dumps
+from generate_rate import TokenBucket, generate_at_rate, parse_rate
+from output_sinks import OutputSink
+
+
+class ListSink(OutputSink):
+    streaming = True
+
+    def __init__(self):
+        super().__init__(None, "fake")
+        self.written = []
+        self.documents = []
+
+    def write_serialized(self, index: int, data: bytes):
+        self.written.append(index)
+        self.documents.append(data)
+
+
+def test_parses_rates_per_unit():
+    assert parse_rate("500") == 500
+    assert parse_rate("500/s") == 500
+    assert parse_rate("120/m") == 2
+    assert parse_rate("7200/h") == 2
+
+    for rate in ("fast", "10/d", "0/s"):
+        with pytest.raises(ValueError):
+            parse_rate(rate)
+
+
+def test_token_bucket_paces_to_the_rate():
+    bucket = TokenBucket(1000)
+
+    started = time.perf_counter()
+    for _ in range(50):
+        bucket.take(10)
+
+    # 500 tokens at 1000/sec can't be taken in under half a second, as the bucket starts empty
+    assert time.perf_counter() - started >= 0.49
+    assert not bucket.take(10, deadline=time.perf_counter())
+
+
+def test_generate_at_rate_stops_at_the_quantity():
+    output_sink = ListSink()
+    stats, pacing = generate_at_rate(select_document_provider("starfleet_account"), output_sink, rate=5000, quantity=120)
+
+    assert output_sink.written == list(range(120))
+    assert pacing["documents"] == 120
+    assert stats["write"]["items"] == 120
+
+
+def test_generate_at_rate_counts_the_documents_of_partial_batches():
+    document_provider = select_document_provider("starfleet_account")
+    generate = document_provider.iter_generate
+
+    def interrupted_generate(quantity):
+        yield from generate(130)
+        raise KeyboardInterrupt()
+
+    def exhausted_generate(quantity):
+        return generate(130)
+
+    # Documents should be counted up to where a batch was interrupted, or the documents ran out
+    for iter_generate, interrupted in [(interrupted_generate, True), (exhausted_generate, False)]:
+        document_provider.iter_generate = iter_generate
+        output_sink = ListSink()
+        stats, pacing = generate_at_rate(document_provider, output_sink, rate=5000, quantity=200)
+
+        assert output_sink.written == list(range(130))
+        assert pacing["documents"] == 130
+        assert pacing["interrupted"] is interrupted
+
+
+def test_generate_at_rate_generates_seeded_columnar_batches_once():
+    pytest.importorskip("numpy")
+    document_provider = select_document_provider("starfleet_account", seed=1, columnar=True)
+    batch_sizes = []
+    create_batch = document_provider.create_batch
+
+    def counting_create_batch(columns, size):
+        batch_sizes.append(size)
+        return create_batch(columns, size)
+
+    document_provider.create_batch = counting_create_batch
+    output_sink = ListSink()
+    generate_at_rate(document_provider, output_sink, rate=50000, quantity=1500)
+
+    # Paced batches should be taken from the run's two columnar batches, rather than each generating one
+    assert batch_sizes == [1000, 1000]
+    expected = select_document_provider("starfleet_account", seed=1, columnar=True).generate_many(1500)
+    assert output_sink.documents == [dumps(document) for document in expected]
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import types
+
+import pytest
+
+from generate_registry import ProviderRegistry, lazy_attribute
+
+
+def test_registry_only_imports_a_provider_when_looked_up(monkeypatch):
+    module = types.ModuleType("registry_test_providers")
+    module.Provider = object
+    registry = ProviderRegistry("data_generator.registry_test", {"test": "registry_test_providers:Provider"})
+
+    # Listing and checking the names imports nothing
+    assert list(registry) == ["test"]
+    assert "test" in registry
+    assert "missing" not in registry
+    assert registry.loaded == {}
+
+    monkeypatch.setitem(sys.modules, "registry_test_providers", module)
+    assert registry["test"] is object
+    assert registry.loaded == {"test": object}
+
+    with pytest.raises(KeyError):
+        registry["missing"]
+
+
+def test_lazy_attribute_raises_attribute_error_for_unknown_names():
+    assert lazy_attribute("tests", {"ProviderRegistry": "generate_registry"}, "ProviderRegistry") is ProviderRegistry
+
+    with pytest.raises(AttributeError):
+        lazy_attribute("tests", {}, "Missing")
+
+
+def test_listing_providers_does_not_import_mimesis():
+    check = (
+        "import sys, document_providers, journey_providers, output_sinks, replay_sinks\n"
+        "names = [*document_providers.document_provider_mapping, *journey_providers.journey_provider_mapping]\n"
+        "assert 'mimesis' not in sys.modules, 'mimesis imported'\n"
+        "assert document_providers.select_document_provider(names[0]).generate_many(1)"
+    )
+    subprocess.run([sys.executable, "-c", check], check=True)
+
+
+def test_cli_startup_does_not_import_codecs_or_multiprocessing():
+    check = (
+        "import sys, generate\n"
+        "for name in ('mimesis', 'zstandard', 'multiprocessing', 'numpy', 'pyarrow'):\n"
+        "    assert name not in sys.modules, f'{name} imported'"
+    )
+    subprocess.run([sys.executable, "-c", check], check=True)
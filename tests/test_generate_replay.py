@@ -0,0 +1,72 @@
+import asyncio
+from zipfile import ZipFile
+from generate_replay import ZipCache, merge_timeline, replay_timeline
+
+
+class RecordingSink:
+    concurrency = 10
+
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, file_name, data):
+        self.emitted.append(file_name)
+
+    async def close(self):
+        pass
+
+
+def test_merge_timeline_orders_steps_across_journeys():
+    journeys = [
+        ("a.zip", [(0, "a0"), (5, "a1")]),
+        ("b.zip", [(1, "b0"), (2, "b1"), (9, "b2")]),
+    ]
+
+    timeline = list(merge_timeline(journeys))
+
+    assert [file_name for _, file_name, _ in timeline] == ["a0", "b0", "b1", "a1", "b2"]
+
+
+def test_merge_timeline_spreads_journey_starts_over_the_ramp_up():
+    journeys = [("a.zip", [(0, "a0")]), ("b.zip", [(0, "b0")])]
+
+    timeline = list(merge_timeline(journeys, ramp_up=10))
+
+    # The second of two journeys should start halfway through the ramp up
+    assert [(due, file_name) for due, file_name, _ in timeline] == [(0, "a0"), (5, "b0")]
+
+
+def test_replay_timeline_publishes_steps_on_schedule(tmpdir):
+    zip_path = str(tmpdir.join("journey.zip"))
+    with ZipFile(zip_path, "w") as zip:
+        for name in ["a0", "a1"]:
+            zip.writestr(name, b"{}")
+
+    sink = RecordingSink()
+    stats = asyncio.run(replay_timeline([(0, "a0", zip_path), (0.2, "a1", zip_path)], sink, speedup=2))
+
+    # A delay of 0.2 seconds at double speed should take about 0.1 seconds
+    assert sink.emitted == ["a0", "a1"]
+    assert stats["steps"] == 2
+    assert 0.1 <= stats["seconds"] < 1
+
+
+def test_zip_cache_keeps_recently_used_zips_open(tmpdir):
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = str(tmpdir.join(f"{name}.zip"))
+        with ZipFile(path, "w") as zip:
+            zip.writestr("step.json", name)
+        paths.append(path)
+
+    zips = ZipCache(limit=2)
+    first = zips.open(paths[0])
+
+    # Reopening a zip should reuse its open handle, and opening more than the limit closes the least recently used
+    assert zips.open(paths[0]) is first
+    zips.open(paths[1])
+    zips.open(paths[2])
+    assert first.fp is None
+    assert zips.open(paths[2]).read("step.json") == b"c"
+
+    zips.close()
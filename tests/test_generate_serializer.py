@@ -0,0 +1,28 @@
+import json
+import pytest
+from document_providers import StarfleetApplication
+from generate_serializer import dumps, dumps_json, dumps_orjson
+
+
+def test_serializer_outputs_parseable_json_bytes():
+
+    document = StarfleetApplication().generate()
+    data = dumps(document)
+
+    assert isinstance(data, bytes)
+    assert json.loads(data) == document
+
+
+def test_json_serializer_writes_compact_json():
+
+    assert dumps_json({"forename": "Zoë", "logins": []}) == b'{"forename":"Zo\\u00eb","logins":[]}'
+
+
+def test_orjson_and_json_serializers_are_compatible():
+    pytest.importorskip("orjson")
+
+    document = StarfleetApplication().generate()
+
+    # Both should produce the same JSON, byte for byte where the document is ASCII
+    assert json.loads(dumps_orjson(document)) == json.loads(dumps_json(document))
+    assert dumps_orjson({"id": "foo", "logins": [1, 2]}) == dumps_json({"id": "foo", "logins": [1, 2]})
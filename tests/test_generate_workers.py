@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from generate_workers import clean_journey_staging, journey_staging_root, parse_shard, shard_range, split_quantity
+
+
+def test_split_quantity_covers_range_contiguously():
+
+    chunks = split_quantity(10, 4)
+
+    # Chunks should be contiguous and cover every index exactly once
+    assert chunks == [(0, 3), (3, 6), (6, 8), (8, 10)]
+
+
+def test_split_quantity_never_creates_empty_chunks():
+
+    chunks = split_quantity(2, 8)
+
+    # There can't be more chunks than there are documents
+    assert chunks == [(0, 1), (1, 2)]
+
+
+def test_split_quantity_aligns_chunks_to_shards():
+
+    chunks = split_quantity(25, 4, alignment=10)
+
+    # Chunks should only break on shard boundaries, with the last chunk taking the remainder
+    assert chunks == [(0, 10), (10, 20), (20, 25)]
+
+
+def test_shard_ranges_partition_the_run():
+
+    ranges = [shard_range(25, (index, 4), alignment=5) for index in range(4)]
+
+    # Shards should cover every index exactly once, starting on alignment boundaries
+    assert ranges == [(0, 10), (10, 15), (15, 20), (20, 25)]
+
+    # Shards beyond the run's blocks of indices should have nothing to generate
+    assert shard_range(3, (3, 4)) == (3, 3)
+
+
+def test_parse_shard_rejects_shards_out_of_range():
+
+    assert parse_shard("2/4") == (2, 4)
+
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+
+
+def test_clean_journey_staging_removes_only_the_runs_staging(tmpdir):
+    staging_root = journey_staging_root(str(tmpdir), "starfleet")
+    os.makedirs(os.path.join(staging_root, "chunk-abc123"))
+    os.makedirs(os.path.join(journey_staging_root(str(tmpdir), "starfleet", (1, 2)), "chunk-def456"))
+    tmpdir.join("starfleet.9b2f6c4e-3f5a-4b8e-9d1c-7a6e5f4d3c2b.zip").write("")
+
+    removed = clean_journey_staging(staging_root)
+
+    # The run's staging should be removed, leaving other runs' (i.e. other shards') and anything else
+    assert removed == 1
+    assert sorted(os.listdir(tmpdir)) == [".staging-starfleet.shard-1-of-2", "starfleet.9b2f6c4e-3f5a-4b8e-9d1c-7a6e5f4d3c2b.zip"]